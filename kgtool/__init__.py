@@ -3,4 +3,6 @@ from .pipeline import (
     build_graph,
     discover_topics,
     extract_topic_context,
+    iter_topic_context,
 )
+from .graph import KnowledgeGraph
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import OrderedDict
+from typing import Iterable
+
+HASH_BLOCK = 1 << 20
+HASH_MEMO_SIZE = 64
+GRAPH_KEY = re.compile(rb'"graph":\s*')
+
+# (path, device, inode, size, mtime_ns) -> content hash, so unchanged files
+# are hashed once. Outputs are replaced by rename, so a rebuilt file has a
+# new inode even when its size and (coarse) mtime are unchanged.
+_hash_memo: OrderedDict = OrderedDict()
+
+
+def file_content_hash(path: str) -> str:
+    """sha256 of a file's content, memoized (LRU) on its identity and mtime."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    digest = _hash_memo.get(memo_key)
+    if digest is not None:
+        _hash_memo.move_to_end(memo_key)
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    digest = _hash_memo[memo_key] = h.hexdigest()
+    while len(_hash_memo) > HASH_MEMO_SIZE:
+        _hash_memo.popitem(last=False)
+    return digest
+
+
+def graph_attributes(graph_path: str) -> dict:
+    """
+    The graph-level attributes of a node_link_data graph.json. They come
+    before the nodes, so only the head of the file is read.
+    """
+    with open(graph_path, "rb") as f:
+        head = f.read(HASH_BLOCK)
+    match = GRAPH_KEY.search(head)
+    if match is None:
+        return {}
+    try:
+        attributes, _ = json.JSONDecoder().raw_decode(
+            head[match.end():].decode("utf-8", errors="replace")
+        )
+    except ValueError:
+        return {}
+    return attributes if isinstance(attributes, dict) else {}
+
+
+def graph_version(graph_path: str, sidecars: Iterable[str] = ()) -> str:
+    """
+    Content hash of graph.json, its body store (if any) and the given
+    sidecar files next to it that exist (e.g. index.bin for queries).
+    """
+    graph_dir = os.path.dirname(graph_path)
+    names = list(sidecars)
+    store = graph_attributes(graph_path).get("body_store")
+    if store:
+        names.insert(0, store)
+    digests = [file_content_hash(graph_path)] + [
+        f"{name}:{file_content_hash(os.path.join(graph_dir, name))}"
+        for name in names
+        if os.path.exists(os.path.join(graph_dir, name))
+    ]
+    if len(digests) == 1:
+        return digests[0]
+    return hashlib.sha256("\n".join(digests).encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    Cache of extraction results keyed on (graph content hash, parameters).
+    sidecars names the files next to graph.json a query reads besides the
+    graph and its body store; their content is part of the hash.
+
+    Entries live in an in-memory LRU of maxsize items. With a directory, they
+    are also stored on disk under <directory>/<graph hash>/, so separate CLI
+    runs share them. A rebuilt graph has a new hash, which invalidates every
+    old entry; on-disk entries for other hashes are removed the first time the
+    new version is seen.
+    """
+
+    def __init__(self, maxsize: int = 128, directory: str | None = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._entries: OrderedDict = OrderedDict()
+        self._pruned_for = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _params_key(params: dict) -> str:
+        encoded = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, version: str, params_key: str) -> str:
+        return os.path.join(self.directory, version, f"{params_key}.md")
+
+    def get(self, graph_path: str, params: dict, sidecars: Iterable[str] = ()) -> str | None:
+        version = graph_version(graph_path, sidecars)
+        key = (version, self._params_key(params))
+
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        if self.directory:
+            path = self._disk_path(*key)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    value = f.read()
+                self._remember(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(
+        self, graph_path: str, params: dict, value: str, sidecars: Iterable[str] = ()
+    ) -> None:
+        version = graph_version(graph_path, sidecars)
+        key = (version, self._params_key(params))
+        self._remember(key, value)
+
+        if self.directory:
+            self._prune_disk(version)
+            path = self._disk_path(*key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _remember(self, key, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _prune_disk(self, version: str) -> None:
+        """Drop on-disk entries of other graph versions."""
+        if self._pruned_for == version or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != version:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        self._pruned_for = version
@@ -1,5 +1,32 @@
 import argparse
-from .pipeline import build_graph, discover_topics, extract_topic_context
+import json
+import os
+
+from .cache import QueryCache
+from .concepts import find_concept, load_concept_layer, related_concepts
+from .embeddings import semantic_search
+from .export import FORMATS, export_graph
+from .pipeline import build_graph, discover_topics, extract_topic_context, write_json_atomic
+from .prune import parse_prune_spec
+from .search import SearchIndex, index_path
+from .shards import build_graph_sharded, build_shard, collect_input_files, merge_shards
+from .stats import graph_stats, print_stats
+from .synth import generate_corpus
+from .watch import watch
+
+
+def prune_spec(value: str) -> str:
+    try:
+        parse_prune_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+PRUNE_HELP = (
+    "Prune similarity edges: knn[:k] (mutual k-NN), adaptive[:z] (per-node "
+    "mean + z*std) or backbone[:alpha] (disparity filter); keeps connectivity"
+)
 
 
 def main():
@@ -13,18 +40,28 @@ def main():
         "discover-topics",
         help="Discover topics from a document using unsupervised clustering.",
     )
-    disc.add_argument("--input", required=True, help="Input markdown file")
+    disc.add_argument("--input", required=True, help="Input document (markdown, HTML or reST)")
     disc.add_argument("--output", required=True, help="Output JSON file for topic terms")
     disc.add_argument("--num-topics", type=int, default=5, help="Number of topics")
     disc.add_argument(
         "--terms-per-topic", type=int, default=10, help="Terms per topic"
     )
+    disc.add_argument(
+        "--previous",
+        default=None,
+        help="Earlier topic_terms.json: warm-start from it, keep its names, report drift",
+    )
 
     # build
     build = subparsers.add_parser(
         "build", help="Build knowledge graph from document."
     )
-    build.add_argument("--input", required=True, help="Input markdown file")
+    build.add_argument(
+        "--input",
+        required=True,
+        nargs="+",
+        help="Input document: markdown, HTML or reST (several files or directories with --shards)",
+    )
     build.add_argument("--output", required=True, help="Output directory for graph/nodes")
     build.add_argument(
         "--min-sim", type=float, default=0.3, help="Min similarity for edges"
@@ -34,6 +71,121 @@ def main():
         "--top-keyphrases", type=int, default=5, help="Top YAKE keyphrases"
     )
     build.add_argument("--topics", default=None, help="Path to topic_terms.json")
+    build.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Stream chunks from disk and vectorize in on-disk shards",
+    )
+    build.add_argument(
+        "--shard-size", type=int, default=10000, help="Chunks per out-of-core shard"
+    )
+    build.add_argument(
+        "--analytics",
+        action="store_true",
+        help="Precompute communities, PageRank and betweenness per node",
+    )
+    build.add_argument("--prune", type=prune_spec, default=None, help=PRUNE_HELP)
+    build.add_argument(
+        "--max-chunk-chars",
+        type=int,
+        default=None,
+        help="Split sections longer than this into sequential sub-nodes",
+    )
+    build.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=0,
+        help="Characters of overlap between split sub-nodes",
+    )
+    build.add_argument(
+        "--compress-bodies",
+        action="store_true",
+        help="Store node bodies once in a compressed bodies.bin (no nodes/*.md)",
+    )
+    build.add_argument(
+        "--concepts",
+        action="store_true",
+        help="Write a keyphrase concept layer with co-occurrence links (concepts.json)",
+    )
+    build.add_argument(
+        "--lean",
+        action="store_true",
+        help="Memory-lean build: bodies stay in the mmap'd input, node metadata in compact records",
+    )
+    build.add_argument(
+        "--no-search-index",
+        dest="search_index",
+        action="store_false",
+        help="Skip writing the full-text search index (index.bin)",
+    )
+    build.add_argument(
+        "--embedding-dims",
+        type=int,
+        default=None,
+        help="Project TF-IDF to N LSA dimensions (64-256, e.g. 128) for edges, topics and "
+        "semantic search; saved as embeddings.npy",
+    )
+    build.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Build on N worker processes, then merge (accepts many files/directories)",
+    )
+
+    # build-shard
+    build_shard_cmd = subparsers.add_parser(
+        "build-shard", help="Build one shard of a sharded build (merge with 'merge')."
+    )
+    build_shard_cmd.add_argument(
+        "--input", required=True, nargs="+", help="Source files/directories for this shard"
+    )
+    build_shard_cmd.add_argument("--output", required=True, help="Shard output directory")
+    build_shard_cmd.add_argument(
+        "--top-keyphrases", type=int, default=5, help="Top YAKE keyphrases"
+    )
+    build_shard_cmd.add_argument(
+        "--max-chunk-chars", type=int, default=None, help="Split sections longer than this"
+    )
+    build_shard_cmd.add_argument(
+        "--chunk-overlap", type=int, default=0, help="Overlap between split sub-nodes"
+    )
+
+    # merge
+    merge = subparsers.add_parser(
+        "merge", help="Merge shard directories into one knowledge graph."
+    )
+    merge.add_argument(
+        "--shards", required=True, nargs="+", help="Shard directories, in node order"
+    )
+    merge.add_argument("--output", required=True, help="Output directory for graph/nodes")
+    merge.add_argument(
+        "--min-sim", type=float, default=0.3, help="Min similarity for edges"
+    )
+    merge.add_argument("--top-keywords", type=int, default=5, help="Top TF-IDF keywords")
+    merge.add_argument("--topics", default=None, help="Path to topic_terms.json")
+    merge.add_argument(
+        "--analytics", action="store_true", help="Precompute communities and centralities"
+    )
+    merge.add_argument("--prune", type=prune_spec, default=None, help=PRUNE_HELP)
+    merge.add_argument(
+        "--compress-bodies", action="store_true", help="Store bodies in compressed bodies.bin"
+    )
+    merge.add_argument(
+        "--concepts", action="store_true", help="Write the keyphrase concept layer"
+    )
+    merge.add_argument(
+        "--no-search-index",
+        dest="search_index",
+        action="store_false",
+        help="Skip writing the full-text search index",
+    )
+
+    # mentions
+    mentions = subparsers.add_parser(
+        "mentions", help="List sections mentioning a concept (needs 'build --concepts')."
+    )
+    mentions.add_argument("--graph", required=True, help="Path to graph.json")
+    mentions.add_argument("--phrase", required=True, help="Concept to look up")
 
     # extract
     extract = subparsers.add_parser(
@@ -41,12 +193,121 @@ def main():
     )
     extract.add_argument("--topic", required=True, help="Topic to extract")
     extract.add_argument("--graph", required=True, help="Path to graph.json")
-    extract.add_argument("--output", required=True, help="Output markdown file")
+    extract.add_argument(
+        "--output", required=True, help="Output markdown file, or - to stream to stdout"
+    )
     extract.add_argument(
         "--include-neighbors",
         action="store_true",
         help="Include neighbors of matching nodes",
     )
+    extract.add_argument(
+        "--order-by",
+        choices=["id", "pagerank", "score"],
+        default="id",
+        help="Node order in output (pagerank needs 'build --analytics'; score is the topic score)",
+    )
+    extract.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse results cached in <graph dir>/.kgtool_cache until the graph changes",
+    )
+    extract.add_argument(
+        "--query",
+        default=None,
+        help="Keep only topic nodes matching this full-text query (words or \"phrases\")",
+    )
+    extract.add_argument(
+        "--min-score",
+        type=float,
+        default=None,
+        help="Select nodes whose stored topic score is at least this, instead of build-time tags",
+    )
+
+    # search
+    search = subparsers.add_parser(
+        "search", help="BM25 full-text search over node titles and bodies."
+    )
+    search.add_argument("--graph", required=True, help="Path to graph.json")
+    search.add_argument(
+        "--query", required=True, help='Words (any may match) and "quoted phrases" (must match)'
+    )
+    search.add_argument("--top-k", type=int, default=10, help="Number of results")
+    search.add_argument(
+        "--semantic",
+        action="store_true",
+        help="Rank by LSA embedding similarity (needs a build with --embedding-dims)",
+    )
+    search.add_argument(
+        "--json", action="store_true", help="Print results as JSON"
+    )
+
+    # stats
+    stats = subparsers.add_parser(
+        "stats", help="Print graph statistics in one streaming pass."
+    )
+    stats.add_argument("--graph", required=True, help="Path to graph.json")
+    stats.add_argument(
+        "--json", action="store_true", help="Print statistics as JSON"
+    )
+
+    # export
+    export = subparsers.add_parser(
+        "export", help="Export a graph to Parquet/Arrow, Neo4j bulk-import CSV or SQLite."
+    )
+    export.add_argument("--graph", required=True, help="Path to graph.json")
+    export.add_argument("--format", required=True, choices=FORMATS, help="Export format")
+    export.add_argument("--output", required=True, help="Output directory")
+    export.add_argument(
+        "--no-bodies", dest="include_bodies", action="store_false", help="Leave out node bodies"
+    )
+
+    # synth
+    synth = subparsers.add_parser(
+        "synth", help="Generate a reproducible synthetic markdown corpus for load tests."
+    )
+    synth.add_argument("--output", required=True, help="Output markdown file")
+    synth.add_argument("--sections", type=int, default=10000, help="Number of sections")
+    synth.add_argument("--vocabulary", type=int, default=5000, help="Vocabulary size")
+    synth.add_argument("--topics", type=int, default=8, help="Number of latent topics")
+    synth.add_argument("--mean-words", type=int, default=200, help="Mean words per section")
+    synth.add_argument(
+        "--length-sigma", type=float, default=0.6, help="Lognormal shape of section lengths"
+    )
+    synth.add_argument(
+        "--duplicate-rate", type=float, default=0.05, help="Share of sections repeating an earlier body"
+    )
+    synth.add_argument(
+        "--topic-mix", type=float, default=0.3, help="Share of a section's words from its topic"
+    )
+    synth.add_argument(
+        "--topic-skew", type=float, default=0.0, help="Topic popularity skew (0 = uniform)"
+    )
+    synth.add_argument("--seed", type=int, default=42, help="Random seed")
+    synth.add_argument(
+        "--topic-terms", default=None, help="Also write the generating topics as topic_terms.json"
+    )
+
+    # watch
+    watch_cmd = subparsers.add_parser(
+        "watch", help="Watch a docs directory and rebuild the graph on changes."
+    )
+    watch_cmd.add_argument("--input", required=True, help="Directory of source documents")
+    watch_cmd.add_argument("--output", required=True, help="Output directory for graph/nodes")
+    watch_cmd.add_argument(
+        "--min-sim", type=float, default=0.3, help="Min similarity for edges"
+    )
+    watch_cmd.add_argument("--top-keywords", type=int, default=5, help="Top TF-IDF keywords")
+    watch_cmd.add_argument(
+        "--top-keyphrases", type=int, default=5, help="Top YAKE keyphrases"
+    )
+    watch_cmd.add_argument("--topics", default=None, help="Path to topic_terms.json")
+    watch_cmd.add_argument(
+        "--interval", type=float, default=1.0, help="Seconds between change checks"
+    )
+    watch_cmd.add_argument(
+        "--debounce", type=float, default=0.5, help="Quiet seconds before rebuilding"
+    )
 
     args = parser.parse_args()
 
@@ -56,22 +317,153 @@ def main():
             output_file=args.output,
             num_topics=args.num_topics,
             terms_per_topic=args.terms_per_topic,
+            previous=args.previous,
+        )
+    elif args.command == "build" and (
+        args.shards or len(args.input) > 1 or os.path.isdir(args.input[0])
+    ):
+        if args.out_of_core or args.lean:
+            parser.error("--out-of-core and --lean take a single input file and no --shards")
+        if args.embedding_dims:
+            parser.error("--embedding-dims takes a single input file and no --shards")
+        build_graph_sharded(
+            inputs=args.input,
+            output_dir=args.output,
+            shards=args.shards or 1,
+            min_similarity=args.min_sim,
+            top_keywords=args.top_keywords,
+            top_keyphrases=args.top_keyphrases,
+            topic_terms_path=args.topics,
+            analytics=args.analytics,
+            prune=args.prune,
+            max_chunk_chars=args.max_chunk_chars,
+            chunk_overlap=args.chunk_overlap,
+            compress_bodies=args.compress_bodies,
+            concepts=args.concepts,
+            search_index=args.search_index,
         )
     elif args.command == "build":
         build_graph(
-            input_file=args.input,
+            input_file=args.input[0],
             output_dir=args.output,
             min_similarity=args.min_sim,
             top_keywords=args.top_keywords,
             top_keyphrases=args.top_keyphrases,
             topic_terms_path=args.topics,
+            out_of_core=args.out_of_core,
+            lean=args.lean,
+            shard_size=args.shard_size,
+            analytics=args.analytics,
+            prune=args.prune,
+            max_chunk_chars=args.max_chunk_chars,
+            chunk_overlap=args.chunk_overlap,
+            compress_bodies=args.compress_bodies,
+            concepts=args.concepts,
+            search_index=args.search_index,
+            embedding_dims=args.embedding_dims,
+        )
+    elif args.command == "build-shard":
+        shard_dir = build_shard(
+            files=collect_input_files(args.input),
+            shard_dir=args.output,
+            top_keyphrases=args.top_keyphrases,
+            max_chunk_chars=args.max_chunk_chars,
+            chunk_overlap=args.chunk_overlap,
+        )
+        print(f"Shard written to: {shard_dir}/")
+    elif args.command == "merge":
+        merge_shards(
+            shard_dirs=args.shards,
+            output_dir=args.output,
+            min_similarity=args.min_sim,
+            top_keywords=args.top_keywords,
+            topic_terms_path=args.topics,
+            analytics=args.analytics,
+            prune=args.prune,
+            compress_bodies=args.compress_bodies,
+            concepts=args.concepts,
+            search_index=args.search_index,
         )
+    elif args.command == "mentions":
+        layer = load_concept_layer(args.graph)
+        concept = find_concept(layer, args.phrase)
+        if concept is None:
+            print(f"No concept found for '{args.phrase}'")
+        else:
+            print(f"Concept: {concept['label']} (variants: {', '.join(concept['variants'])})")
+            print(f"Sections: {', '.join(str(s) for s in concept['sections'])}")
+            related = related_concepts(layer, concept["id"])[:10]
+            if related:
+                print("Related: " + ", ".join(f"{c['label']} ({n})" for c, n in related))
     elif args.command == "extract":
         extract_topic_context(
             topic=args.topic,
             graph_path=args.graph,
             output_file=args.output,
             include_neighbors=args.include_neighbors,
+            order_by=args.order_by,
+            cache=QueryCache(
+                directory=os.path.join(os.path.dirname(args.graph), ".kgtool_cache")
+            ) if args.cache else None,
+            query=args.query,
+            min_score=args.min_score,
+        )
+    elif args.command == "search":
+        if args.semantic:
+            results = semantic_search(args.graph, args.query, top_k=args.top_k)
+        else:
+            with SearchIndex(index_path(args.graph)) as index:
+                results = index.search(args.query, top_k=args.top_k)
+        if args.json:
+            print(json.dumps(
+                [{"id": node_id, "title": title, "score": score} for node_id, title, score in results],
+                indent=2,
+                ensure_ascii=False,
+            ))
+        elif not results:
+            print(f"No nodes match '{args.query}'")
+        else:
+            for node_id, title, score in results:
+                print(f"{score:8.3f}  [{node_id}] {title}")
+    elif args.command == "stats":
+        result = graph_stats(args.graph)
+        if args.json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print_stats(result)
+    elif args.command == "export":
+        counts = export_graph(args.graph, args.output, args.format, args.include_bodies)
+        print(f"Exported {counts['nodes']} nodes and {counts['edges']} edges to: {args.output}/")
+    elif args.command == "synth":
+        summary = generate_corpus(
+            output_file=args.output,
+            sections=args.sections,
+            vocabulary=args.vocabulary,
+            topics=args.topics,
+            mean_words=args.mean_words,
+            length_sigma=args.length_sigma,
+            duplicate_rate=args.duplicate_rate,
+            topic_mix=args.topic_mix,
+            topic_skew=args.topic_skew,
+            seed=args.seed,
+        )
+        if args.topic_terms:
+            write_json_atomic(args.topic_terms, summary["topic_terms"])
+        print(
+            f"Corpus written to: {args.output} ({summary['sections']} sections, "
+            f"{summary['duplicates']} duplicates, {summary['words']} words, "
+            f"{summary['bytes'] / 2**20:.1f} MB)"
+        )
+    elif args.command == "watch":
+        watch(
+            input_dir=args.input,
+            output_dir=args.output,
+            interval=args.interval,
+            debounce=args.debounce,
+            min_similarity=args.min_sim,
+            top_keywords=args.top_keywords,
+            top_keyphrases=args.top_keyphrases,
+            topic_terms_path=args.topics,
         )
 
 
@@ -0,0 +1,202 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from rapidfuzz import fuzz, process
+
+CONCEPTS_FILE = "concepts.json"
+CDIST_BLOCK = 2048
+CDIST_CELLS = 64 * 1024 * 1024  # largest score matrix (uint8) per cdist call
+
+
+# ----------------------------------------------------------
+# Normalization and deduplication
+# ----------------------------------------------------------
+
+def normalize_phrase(phrase: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]+", " ", phrase.lower()).split())
+
+
+def group_similar_phrases(phrases: List[str], similarity: int = 90) -> List[int]:
+    """
+    Union-find over phrase pairs whose rapidfuzz ratio >= similarity.
+    Returns a group index per phrase.
+
+    ratio is 200 * LCS / (len(a) + len(b)), so a pair can only reach
+    similarity if the longer phrase has at most (200 - similarity) /
+    similarity times the length of the shorter one. Phrases are sorted by
+    length and each block of rows is scored only against the longer phrases
+    in its band, with blocks sized so a score matrix stays under CDIST_CELLS
+    bytes.
+    """
+    parent = list(range(len(phrases)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    order = sorted(range(len(phrases)), key=lambda i: len(phrases[i]))
+    ordered = [phrases[i] for i in order]
+    lengths = np.array([len(p) for p in ordered], dtype=np.int64)
+    stretch = (200 - similarity) / similarity if similarity > 0 else float("inf")
+
+    def band_end(row: int) -> int:
+        if stretch == float("inf"):
+            return len(ordered)
+        return int(np.searchsorted(lengths, lengths[row] * stretch + 1e-9, side="right"))
+
+    start = 0
+    while start < len(ordered):
+        rows = min(CDIST_BLOCK, len(ordered) - start)
+        while rows > 1 and rows * (band_end(start + rows - 1) - start) > CDIST_CELLS:
+            rows //= 2
+        stop = start + rows
+        scores = process.cdist(
+            ordered[start:stop],
+            ordered[start:band_end(stop - 1)],
+            scorer=fuzz.ratio,
+            score_cutoff=similarity,
+            dtype=np.uint8,
+            workers=-1,
+        )
+        for i, j in zip(*np.nonzero(scores)):
+            a, b = find(order[start + int(i)]), find(order[start + int(j)])
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        start = stop
+
+    return [find(i) for i in range(len(phrases))]
+
+
+# ----------------------------------------------------------
+# Concept layer
+# ----------------------------------------------------------
+
+def build_concept_layer(
+    G: nx.Graph,
+    similarity: int = 90,
+    min_cooccurrence: int = 2,
+) -> dict:
+    """
+    Second graph layer of concept nodes built from node keyphrases and keywords.
+
+    Phrases are normalized and near-duplicates merged (rapidfuzz ratio >=
+    similarity). A sparse section x concept incidence matrix M gives the
+    concept -> sections inverted index, and M.T @ M gives co-occurrence
+    counts; concept pairs sharing at least min_cooccurrence sections are linked.
+    """
+    return concept_layer_from_phrases(
+        (
+            (node_id, list(data.get("keyphrases", [])) + list(data.get("keywords", [])))
+            for node_id, data in G.nodes(data=True)
+        ),
+        similarity,
+        min_cooccurrence,
+    )
+
+
+def concept_layer_from_phrases(
+    node_phrase_lists: Iterable[Tuple[int, List[str]]],
+    similarity: int = 90,
+    min_cooccurrence: int = 2,
+) -> dict:
+    """build_concept_layer over (node id, phrases) pairs instead of a graph."""
+    node_ids = []
+    node_phrases = []
+    variant_counts = Counter()
+    for node_id, raw_phrases in node_phrase_lists:
+        phrases = {normalize_phrase(p) for p in raw_phrases}
+        phrases.discard("")
+        node_ids.append(node_id)
+        node_phrases.append(phrases)
+        variant_counts.update(phrases)
+
+    variants = sorted(variant_counts)
+    groups = group_similar_phrases(variants, similarity)
+
+    # Concept ids in order of first variant; label = most frequent variant
+    concept_of_group: Dict[int, int] = {}
+    members: List[List[str]] = []
+    variant_to_concept = {}
+    for variant, group in zip(variants, groups):
+        if group not in concept_of_group:
+            concept_of_group[group] = len(members)
+            members.append([])
+        concept_id = concept_of_group[group]
+        members[concept_id].append(variant)
+        variant_to_concept[variant] = concept_id
+
+    rows, cols = [], []
+    for row, phrases in enumerate(node_phrases):
+        for concept_id in {variant_to_concept[p] for p in phrases}:
+            rows.append(row)
+            cols.append(concept_id)
+    M = sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(node_ids), len(members)),
+    )
+
+    postings = M.T.tocsr()
+    concepts = []
+    for concept_id, variants_of in enumerate(members):
+        sections = postings.indices[postings.indptr[concept_id]:postings.indptr[concept_id + 1]]
+        label = min(variants_of, key=lambda v: (-variant_counts[v], len(v), v))
+        concepts.append({
+            "id": concept_id,
+            "label": label,
+            "variants": variants_of,
+            "sections": sorted(node_ids[i] for i in sections),
+        })
+
+    C = sp.triu(M.T @ M, k=1).tocoo()
+    keep = C.data >= min_cooccurrence
+    cooccurrence = [
+        {"source": int(a), "target": int(b), "count": int(n)}
+        for a, b, n in zip(C.row[keep], C.col[keep], C.data[keep])
+    ]
+    cooccurrence.sort(key=lambda e: (e["source"], e["target"]))
+
+    return {
+        "concepts": concepts,
+        "cooccurrence": cooccurrence,
+        "index": variant_to_concept,
+    }
+
+
+def load_concept_layer(path: str) -> dict:
+    """Load concepts.json; path may also be the graph.json next to it."""
+    if os.path.basename(path) != CONCEPTS_FILE:
+        path = os.path.join(os.path.dirname(path), CONCEPTS_FILE)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_concept(layer: dict, phrase: str, similarity: int = 90) -> dict | None:
+    """Concept for a phrase: exact variant lookup first, fuzzy match second."""
+    key = normalize_phrase(phrase)
+    concept_id = layer["index"].get(key)
+    if concept_id is None:
+        match = process.extractOne(key, layer["index"].keys(), scorer=fuzz.ratio, score_cutoff=similarity)
+        if match is None:
+            return None
+        concept_id = layer["index"][match[0]]
+    return layer["concepts"][concept_id]
+
+
+def related_concepts(layer: dict, concept_id: int) -> List[tuple]:
+    """(concept, co-occurrence count) pairs, most frequent first."""
+    related = []
+    for edge in layer["cooccurrence"]:
+        if edge["source"] == concept_id:
+            related.append((layer["concepts"][edge["target"]], edge["count"]))
+        elif edge["target"] == concept_id:
+            related.append((layer["concepts"][edge["source"]], edge["count"]))
+    return sorted(related, key=lambda r: -r[1])
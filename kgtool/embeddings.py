@@ -0,0 +1,75 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from .pipeline import EMBEDDING_MODEL_FILE, EMBEDDINGS_FILE, load_graph, make_build_vectorizer
+from .search import SearchIndex, index_path
+
+MIN_SCORE = 1e-5
+
+
+def embeddings_path(graph_path: str) -> str:
+    return os.path.join(os.path.dirname(graph_path), EMBEDDINGS_FILE)
+
+
+class EmbeddingIndex:
+    """
+    Read side of the LSA embeddings saved next to graph.json.
+
+    The node matrix is memory-mapped (row = node id), so opening the index
+    costs nothing and searching reads it once, in a single matrix-vector
+    product. Queries are projected with the saved vocabulary, idf and SVD
+    components, exactly as the build projected the nodes.
+    """
+
+    def __init__(self, graph_path: str):
+        path = embeddings_path(graph_path)
+        if not os.path.exists(path):
+            raise ValueError(f"No embeddings next to {graph_path}; build with --embedding-dims.")
+        self.vectors = np.load(path, mmap_mode="r")
+        with np.load(os.path.join(os.path.dirname(graph_path), EMBEDDING_MODEL_FILE)) as model:
+            self.components = model["components"]
+            self.vectorizer = make_build_vectorizer(vocabulary=model["vocabulary"].tolist())
+            self.vectorizer.idf_ = model["idf"].astype(np.float64)
+
+    @property
+    def dims(self) -> int:
+        return self.vectors.shape[1]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings of arbitrary texts."""
+        X = self.vectorizer.transform(texts)
+        return normalize(np.asarray(X @ self.components.T, dtype=np.float32))
+
+    def similarities(self, text: str) -> np.ndarray:
+        """Cosine similarity of every node to text."""
+        return self.vectors @ self.embed([text])[0]
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """(node id, cosine similarity) of the top_k nodes closest to the query."""
+        scores = self.similarities(query)
+        top_k = min(top_k, scores.size)
+        if top_k == 0:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.lexsort((top, -scores[top]))]
+        # Nodes sharing no query term still score ~1e-8 from float32 rounding
+        return [(int(i), float(scores[i])) for i in top if scores[i] > MIN_SCORE]
+
+
+def semantic_search(graph_path: str, query: str, top_k: int = 10) -> List[Tuple[int, str, float]]:
+    """
+    Embedding-ranked (node id, title, score) triples, like SearchIndex.search.
+    Titles come from index.bin when present, else from graph.json.
+    """
+    results = EmbeddingIndex(graph_path).search(query, top_k)
+    if os.path.exists(index_path(graph_path)):
+        with SearchIndex(index_path(graph_path)) as index:
+            docs = np.searchsorted(index.doc_ids, [node_id for node_id, _ in results])
+            titles = [index.title(int(doc)) for doc in docs]
+    else:
+        G = load_graph(graph_path)
+        titles = [G.nodes[node_id]["title"] for node_id, _ in results]
+    return [(node_id, title, score) for (node_id, score), title in zip(results, titles)]
@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+import sqlite3
+from typing import Iterable, Iterator, List, Tuple
+
+import networkx as nx
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the parquet and arrow formats need it
+    pa = pq = None
+
+from .stats import iter_graph_records
+from .store import BodyStore
+
+EXPORT_BATCH = 50_000
+FORMATS = ("parquet", "arrow", "neo4j", "sqlite")
+
+# (column, kind); kind is "int", "float", "str" or "list" (of strings)
+NODE_COLUMNS = [
+    ("id", "int"),
+    ("title", "str"),
+    ("body", "str"),
+    ("tags", "list"),
+    ("keywords", "list"),
+    ("keyphrases", "list"),
+    ("parent", "int"),
+    ("community", "int"),
+    ("pagerank", "float"),
+    ("betweenness", "float"),
+    ("hub_rank", "int"),
+]
+EDGE_COLUMNS = [
+    ("source", "int"),
+    ("target", "int"),
+    ("weight", "float"),
+    ("relation", "str"),
+]
+DEFAULT_RELATION = "similarity"
+
+
+def node_columns(include_bodies: bool = True) -> List[Tuple[str, str]]:
+    return [c for c in NODE_COLUMNS if include_bodies or c[0] != "body"]
+
+
+def _edge_row(record: dict) -> dict:
+    # Rows may carry extra keys; writers only read the export columns
+    if not record.get("relation"):
+        record["relation"] = DEFAULT_RELATION
+    return record
+
+
+# ----------------------------------------------------------
+# Record sources
+# ----------------------------------------------------------
+
+def iter_export_records(graph_path: str, include_bodies: bool = True) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream ("node", row) and ("edge", row) pairs from graph.json, one record
+    at a time (see iter_graph_records), keyed by the export column names.
+    Bodies in a compressed body store are decompressed node by node.
+    """
+    columns = node_columns(include_bodies)
+    store = None
+    try:
+        for kind, record in iter_graph_records(graph_path):
+            if kind == "meta":
+                key, value = record
+                if key == "graph" and include_bodies and value.get("body_store"):
+                    store = BodyStore(os.path.join(os.path.dirname(graph_path), value["body_store"]))
+            elif kind == "node":
+                if include_bodies and "body" not in record and store is not None:
+                    record["body"] = store.get(record["body_ref"])
+                yield "node", {name: record.get(name) for name, _ in columns}
+            else:
+                yield "edge", _edge_row(record)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def graph_export_records(G: nx.Graph, include_bodies: bool = True) -> Iterator[Tuple[str, dict]]:
+    """Same rows as iter_export_records, from an in-memory graph."""
+    columns = node_columns(include_bodies)
+    for node_id, data in G.nodes(data=True):
+        yield "node", {name: node_id if name == "id" else data.get(name) for name, _ in columns}
+    for source, target, data in G.edges(data=True):
+        yield "edge", _edge_row({"source": source, "target": target, **data})
+
+
+# ----------------------------------------------------------
+# Writers
+# ----------------------------------------------------------
+
+class ArrowExporter:
+    """
+    nodes and edges tables as Parquet (.parquet) or Arrow IPC (.arrow) files,
+    written in record batches of EXPORT_BATCH rows.
+    """
+
+    ARROW_TYPES = {"int": "int64", "float": "float64", "str": "string"}
+
+    def __init__(self, output_dir: str, include_bodies: bool = True, fmt: str = "parquet"):
+        if pa is None:
+            raise ValueError(f"'{fmt}' export requires the 'pyarrow' package.")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.columns = {"node": node_columns(include_bodies), "edge": EDGE_COLUMNS}
+        self._schemas = {
+            kind: pa.schema([
+                (name, pa.list_(pa.string()) if k == "list" else pa.type_for_alias(self.ARROW_TYPES[k]))
+                for name, k in columns
+            ])
+            for kind, columns in self.columns.items()
+        }
+        self._pending = {kind: [] for kind in self.columns}
+        self._writers = {}
+
+    def write(self, kind: str, row: dict) -> None:
+        pending = self._pending[kind]
+        pending.append(row)
+        if len(pending) >= EXPORT_BATCH:
+            self._flush(kind)
+
+    def _flush(self, kind: str) -> None:
+        writer = self._writers.get(kind)
+        if writer is None:
+            path = os.path.join(self.output_dir, f"{kind}s.{self.fmt}")
+            if self.fmt == "parquet":
+                writer = pq.ParquetWriter(path, self._schemas[kind])
+            else:
+                writer = pa.ipc.new_file(path, self._schemas[kind])
+            self._writers[kind] = writer
+        pending = self._pending[kind]
+        writer.write_batch(pa.RecordBatch.from_pylist(pending, schema=self._schemas[kind]))
+        pending.clear()
+
+    def close(self) -> None:
+        for kind in self._pending:
+            self._flush(kind)
+            self._writers[kind].close()
+
+
+class Neo4jCsvExporter:
+    """
+    nodes.csv and edges.csv with neo4j-admin import headers. Nodes get the
+    label Section, edges their relation (upper-cased) as type; list columns
+    use ';', neo4j-admin's default array delimiter.
+    """
+
+    NEO4J_TYPES = {"int": "long", "float": "double", "str": "string", "list": "string[]"}
+    LABEL = "Section"
+
+    def __init__(self, output_dir: str, include_bodies: bool = True):
+        self.columns = node_columns(include_bodies)
+        self._files = {
+            kind: open(os.path.join(output_dir, f"{kind}s.csv"), "w", encoding="utf-8", newline="")
+            for kind in ("node", "edge")
+        }
+        self._writers = {kind: csv.writer(f) for kind, f in self._files.items()}
+        self._writers["node"].writerow(
+            ["id:ID"]
+            + [f"{name}:{self.NEO4J_TYPES[k]}" for name, k in self.columns[1:]]
+            + [":LABEL"]
+        )
+        self._writers["edge"].writerow([":START_ID", ":END_ID", "weight:double", ":TYPE"])
+
+    def write(self, kind: str, row: dict) -> None:
+        if kind == "edge":
+            self._writers["edge"].writerow(
+                [row["source"], row["target"], row.get("weight"), row["relation"].upper()]
+            )
+            return
+        values = []
+        for name, k in self.columns:
+            value = row[name]
+            if value is None:
+                value = ""
+            elif k == "list":
+                value = ";".join(value)
+            values.append(value)
+        self._writers["node"].writerow(values + [self.LABEL])
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class SqliteExporter:
+    """
+    graph.sqlite with nodes, edges and a node_tags(node_id, tag) table.
+    List columns are stored as JSON text. Rows are bulk-inserted in one
+    transaction, and indexes (tags, edge endpoints) are built afterwards.
+    """
+
+    SQL_TYPES = {"int": "INTEGER", "float": "REAL", "str": "TEXT", "list": "TEXT"}
+    INDEXES = [
+        "CREATE INDEX node_tags_tag ON node_tags (tag)",
+        "CREATE INDEX node_tags_node ON node_tags (node_id)",
+        "CREATE INDEX edges_source ON edges (source)",
+        "CREATE INDEX edges_target ON edges (target)",
+    ]
+
+    def __init__(self, output_dir: str, include_bodies: bool = True):
+        self.columns = node_columns(include_bodies)
+        self.path = os.path.join(output_dir, "graph.sqlite")
+        self._tmp_path = f"{self.path}.tmp{os.getpid()}"
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._db = sqlite3.connect(self._tmp_path)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        node_defs = ", ".join(
+            f"{name} {self.SQL_TYPES[k]}{' PRIMARY KEY' if name == 'id' else ''}"
+            for name, k in self.columns
+        )
+        self._db.execute(f"CREATE TABLE nodes ({node_defs})")
+        self._db.execute("CREATE TABLE node_tags (node_id INTEGER, tag TEXT)")
+        self._db.execute("CREATE TABLE edges (source INTEGER, target INTEGER, weight REAL, relation TEXT)")
+        self._insert = {
+            "node": f"INSERT INTO nodes VALUES ({', '.join('?' * len(self.columns))})",
+            "tag": "INSERT INTO node_tags VALUES (?, ?)",
+            "edge": "INSERT INTO edges VALUES (?, ?, ?, ?)",
+        }
+        self._pending = {kind: [] for kind in self._insert}
+
+    def write(self, kind: str, row: dict) -> None:
+        if kind == "edge":
+            self._queue("edge", (row["source"], row["target"], row.get("weight"), row["relation"]))
+            return
+        self._queue("node", tuple(
+            json.dumps(row[name], ensure_ascii=False) if k == "list" and row[name] is not None
+            else row[name]
+            for name, k in self.columns
+        ))
+        for tag in row["tags"] or []:
+            self._queue("tag", (row["id"], tag))
+
+    def _queue(self, kind: str, values: tuple) -> None:
+        pending = self._pending[kind]
+        pending.append(values)
+        if len(pending) >= EXPORT_BATCH:
+            self._db.executemany(self._insert[kind], pending)
+            pending.clear()
+
+    def close(self) -> None:
+        for kind, pending in self._pending.items():
+            self._db.executemany(self._insert[kind], pending)
+            pending.clear()
+        for statement in self.INDEXES:
+            self._db.execute(statement)
+        self._db.commit()
+        self._db.close()
+        os.replace(self._tmp_path, self.path)
+
+
+# ----------------------------------------------------------
+# Export
+# ----------------------------------------------------------
+
+def make_exporter(fmt: str, output_dir: str, include_bodies: bool = True):
+    if fmt in ("parquet", "arrow"):
+        return ArrowExporter(output_dir, include_bodies, fmt)
+    if fmt == "neo4j":
+        return Neo4jCsvExporter(output_dir, include_bodies)
+    if fmt == "sqlite":
+        return SqliteExporter(output_dir, include_bodies)
+    raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(FORMATS)}.")
+
+
+def export_records(
+    records: Iterable[Tuple[str, dict]],
+    output_dir: str,
+    fmt: str,
+    include_bodies: bool = True,
+) -> dict:
+    """Write ("node"/"edge", row) records in fmt; returns node and edge counts."""
+    os.makedirs(output_dir, exist_ok=True)
+    exporter = make_exporter(fmt, output_dir, include_bodies)
+    counts = {"nodes": 0, "edges": 0}
+    for kind, row in records:
+        exporter.write(kind, row)
+        counts[f"{kind}s"] += 1
+    exporter.close()
+    return counts
+
+
+def export_graph(graph_path: str, output_dir: str, fmt: str, include_bodies: bool = True) -> dict:
+    """
+    Export a saved graph to bulk-load files in output_dir:
+    parquet / arrow: nodes.<fmt> and edges.<fmt> (needs pyarrow);
+    neo4j: nodes.csv and edges.csv for neo4j-admin database import;
+    sqlite: graph.sqlite with indexes on tags and edge endpoints.
+    graph.json is streamed, so memory does not grow with graph size.
+    """
+    return export_records(
+        iter_export_records(graph_path, include_bodies), output_dir, fmt, include_bodies
+    )
@@ -0,0 +1,182 @@
+import io
+import os
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Tuple
+
+import networkx as nx
+
+from .concepts import build_concept_layer
+from .export import export_records, graph_export_records
+from .pipeline import (
+    assign_topic_tags,
+    build_knowledge_graph,
+    compute_graph_analytics,
+    discover_topic_terms,
+    extract_chunks,
+    hydrate_bodies,
+    load_graph,
+    save_graph,
+    select_topic_nodes,
+    split_chunks,
+    topic_context_sections,
+    vectorize_chunks,
+    write_topic_context,
+)
+from .prune import prune_edges
+
+
+class KnowledgeGraph:
+    """
+    In-memory knowledge graph for embedding kgtool in other programs.
+
+    Keeps the networkx graph, the fitted TF-IDF vectorizer and the TF-IDF
+    matrix between calls, so discovering topics, re-tagging and extracting
+    context never round-trip through disk. Nothing is printed.
+
+        kg = KnowledgeGraph.from_text(markdown)
+        kg.classify(kg.discover_topics(num_topics=5))
+        context = kg.extract("topic_0")
+        kg.save("kg_output")
+    """
+
+    def __init__(self, graph: nx.Graph, vectorizer=None, matrix=None, cache_size: int = 128):
+        self.graph = graph
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        # extract() results, dropped whenever tags or analytics change
+        self._extract_cache: OrderedDict = OrderedDict()
+        self._cache_size = cache_size
+
+    @classmethod
+    def from_text(
+        cls,
+        text: str,
+        max_chunk_chars: int | None = None,
+        chunk_overlap: int = 0,
+        **options,
+    ) -> "KnowledgeGraph":
+        """
+        Build from markdown text. Sections longer than max_chunk_chars are
+        split into sequential sub-nodes. Other options are those of from_chunks.
+        """
+        chunks = extract_chunks(text)
+        if max_chunk_chars:
+            pieces = list(split_chunks(chunks, max_chunk_chars, chunk_overlap))
+            chunks = [(title, body) for title, body, _ in pieces]
+            options["parents"] = [parent for _, _, parent in pieces]
+        return cls.from_chunks(chunks, **options)
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: List[Tuple[str, str]],
+        min_similarity: float = 0.3,
+        top_keywords: int = 5,
+        top_keyphrases: int = 5,
+        topic_terms: Dict[str, List[str]] | None = None,
+        parents: List[int | None] | None = None,
+    ) -> "KnowledgeGraph":
+        """Build from (title, body) pairs; parents as returned by split_chunks."""
+        G, vectorizer, X = build_knowledge_graph(
+            chunks,
+            min_similarity=min_similarity,
+            top_keywords=top_keywords,
+            top_keyphrases=top_keyphrases,
+            topic_terms=topic_terms,
+            parents=parents,
+        )
+        return cls(G, vectorizer, X)
+
+    @classmethod
+    def load(cls, path: str) -> "KnowledgeGraph":
+        """Load a saved graph; path is graph.json or the directory holding it."""
+        if os.path.isdir(path):
+            path = os.path.join(path, "graph.json")
+        G = load_graph(path)
+        hydrate_bodies(G, G.nodes, os.path.dirname(path))
+        return cls(G)
+
+    def save(self, output_dir: str, compress_bodies: bool = False, search_index: bool = True) -> None:
+        """Write the same layout as 'kgtool build' (see save_graph)."""
+        save_graph(
+            self.graph, output_dir, verbose=False,
+            compress_bodies=compress_bodies, search_index=search_index,
+        )
+
+    def export(self, output_dir: str, fmt: str, include_bodies: bool = True) -> dict:
+        """Write bulk-load files without saving graph.json first (see export_graph)."""
+        return export_records(
+            graph_export_records(self.graph, include_bodies), output_dir, fmt, include_bodies
+        )
+
+    @property
+    def chunks(self) -> List[Tuple[str, str]]:
+        return [(data["title"], data["body"]) for _, data in self.graph.nodes(data=True)]
+
+    def discover_topics(
+        self, num_topics: int = 5, terms_per_topic: int = 10
+    ) -> Dict[str, List[str]]:
+        """Cluster node bodies into topics; same result as 'kgtool discover-topics'."""
+        return discover_topic_terms(self.chunks, num_topics, terms_per_topic)
+
+    def classify(self, topic_terms: Dict[str, List[str]]) -> None:
+        """Re-tag every node against topic_terms using the in-memory vectors."""
+        if self.vectorizer is None:
+            # Loaded from disk: refit on the stored bodies, as build did.
+            self.vectorizer, self.matrix = vectorize_chunks(self.chunks)
+        assign_topic_tags(self.graph, self.matrix, self.vectorizer, topic_terms)
+        self._extract_cache.clear()
+
+    def analyze(self) -> None:
+        """Store communities, PageRank and betweenness on the nodes."""
+        compute_graph_analytics(self.graph)
+        self._extract_cache.clear()
+
+    def prune(self, method: str, param: float | None = None, keep_connected: bool = True) -> int:
+        """Remove weak similarity edges (see prune_edges); returns how many were removed."""
+        removed = prune_edges(self.graph, method, param, keep_connected)
+        self._extract_cache.clear()
+        return removed
+
+    def concepts(self, similarity: int = 90, min_cooccurrence: int = 2) -> dict:
+        """Keyphrase concept layer (see build_concept_layer)."""
+        return build_concept_layer(self.graph, similarity, min_cooccurrence)
+
+    def nodes_for(
+        self, topic: str, include_neighbors: bool = True, order_by: str = "id"
+    ) -> List:
+        """Ids of nodes tagged with topic (and optionally their neighbors)."""
+        return select_topic_nodes(self.graph, topic, include_neighbors, order_by)
+
+    def extract(
+        self, topic: str, include_neighbors: bool = True, order_by: str = "id"
+    ) -> str:
+        """
+        Topic context markdown, as 'kgtool extract' would write it.
+        Returns an empty string if no node matches the topic.
+        Results are cached (LRU) until the graph is re-tagged or analyzed.
+        """
+        key = (topic, include_neighbors, order_by)
+        if key in self._extract_cache:
+            self._extract_cache.move_to_end(key)
+            return self._extract_cache[key]
+
+        node_ids = self.nodes_for(topic, include_neighbors, order_by)
+        context = ""
+        if node_ids:
+            buffer = io.StringIO()
+            write_topic_context(buffer, self.graph, topic, node_ids)
+            context = buffer.getvalue()
+
+        self._extract_cache[key] = context
+        if len(self._extract_cache) > self._cache_size:
+            self._extract_cache.popitem(last=False)
+        return context
+
+    def iter_extract(
+        self, topic: str, include_neighbors: bool = True, order_by: str = "id"
+    ) -> Iterator[str]:
+        """extract() as a generator: the header, then one section per node in order."""
+        node_ids = self.nodes_for(topic, include_neighbors, order_by)
+        if node_ids:
+            yield from topic_context_sections(self.graph, topic, node_ids)
@@ -1,17 +1,32 @@
+import itertools
 import json
+import mmap
 import os
-import pathlib
 import re
-from typing import Dict, List, Tuple
+import sys
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
 
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 import yake
 from rapidfuzz import fuzz
-from sklearn.cluster import KMeans
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans, kmeans_plusplus
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
 from networkx.readwrite import json_graph
 
+from .cache import QueryCache
+from .concepts import CONCEPTS_FILE, build_concept_layer, concept_layer_from_phrases
+from .prune import parse_prune_spec, prune_edges
+from .readers import markdown_source, read_source, source_encoding
+from .search import INDEX_FILE, SearchIndex, build_search_index, index_path
+from .store import TRAINING_SAMPLES, BodyStore, write_body_store
+
 
 # ----------------------------------------------------------
 # Chunking
@@ -40,6 +55,170 @@ def extract_chunks(text: str) -> List[Tuple[str, str]]:
     return chunks
 
 
+HEADING_LINE = re.compile(r"^(#{1,6})\s+(.+)$")
+
+
+def iter_chunks(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (title, body) pairs from a UTF-8 markdown file line by line.
+    Same chunking rules as extract_chunks, without reading the whole file.
+    Raises ValueError if the file is not valid UTF-8.
+    """
+    title = None
+    lines: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            for line in f:
+                match = HEADING_LINE.match(line.rstrip("\r\n"))
+                if match:
+                    if title is not None:
+                        yield title, "".join(lines).strip()
+                    title = match.group(2).strip()
+                    lines = []
+                elif title is not None:
+                    lines.append(line)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"{path} is not valid UTF-8: {e.reason}.") from None
+
+    if title is None:
+        raise ValueError("No headings found in document. Cannot chunk.")
+    yield title, "".join(lines).strip()
+
+
+# ----------------------------------------------------------
+# Size-bounded chunk splitting
+# ----------------------------------------------------------
+
+PARAGRAPH = re.compile(r"(?:[^\n]|\n(?![ \t]*\n))+")
+SENTENCE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+WORD_RUN = re.compile(r"\S+")
+
+
+def _stripped_spans(pattern: re.Pattern, text: str, start: int, end: int):
+    spans = []
+    for match in pattern.finditer(text, start, end):
+        s, e = match.span()
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            spans.append((s, e))
+    return spans
+
+
+def _unit_spans(body: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    Split body into (start, end) spans no longer than max_chars: paragraphs,
+    then sentences for oversized paragraphs, then word-aligned windows.
+    """
+    units = []
+    for p_start, p_end in _stripped_spans(PARAGRAPH, body, 0, len(body)):
+        if p_end - p_start <= max_chars:
+            units.append((p_start, p_end))
+            continue
+        for s_start, s_end in _stripped_spans(SENTENCE, body, p_start, p_end):
+            if s_end - s_start <= max_chars:
+                units.append((s_start, s_end))
+                continue
+            window_start = window_end = None
+            for w_start, w_end in _stripped_spans(WORD_RUN, body, s_start, s_end):
+                if window_start is not None and w_end - window_start > max_chars:
+                    units.append((window_start, window_end))
+                    window_start = None
+                if window_start is None:
+                    window_start = w_start
+                window_end = w_end
+            if window_start is not None:
+                units.append((window_start, window_end))
+    return units
+
+
+def split_body(body: str, max_chars: int, overlap: int = 0) -> List[str]:
+    """
+    Split a section body into pieces of at most max_chars characters, cutting
+    on paragraph, then sentence, then word boundaries. Consecutive pieces
+    share up to overlap characters of whole trailing units.
+    (A single word longer than max_chars is kept whole.)
+    """
+    return [body[start:end] for start, end in split_body_spans(body, max_chars, overlap)]
+
+
+def check_chunking(max_chars: int | None, overlap: int = 0) -> None:
+    """Raise ValueError unless overlap fits inside max_chars."""
+    if max_chars and overlap >= max_chars:
+        raise ValueError("chunk overlap must be smaller than the max chunk size.")
+
+
+def split_body_spans(body: str, max_chars: int, overlap: int = 0) -> List[Tuple[int, int]]:
+    """(start, end) offsets into body of the pieces split_body returns."""
+    check_chunking(max_chars, overlap)
+    if len(body) <= max_chars:
+        return [(0, len(body))]
+
+    spans = _unit_spans(body, max_chars)
+    pieces = []
+    i = 0
+    while i < len(spans):
+        start = spans[i][0]
+        j = i
+        while j + 1 < len(spans) and spans[j + 1][1] - start <= max_chars:
+            j += 1
+        pieces.append((start, spans[j][1]))
+        if j + 1 == len(spans):
+            break
+        # Step back over trailing units that fit in the overlap, as long as
+        # the next piece still has room for the following unit
+        k = j + 1
+        while (
+            k - 1 > i
+            and spans[j][1] - spans[k - 1][0] <= overlap
+            and spans[j + 1][1] - spans[k - 1][0] <= max_chars
+        ):
+            k -= 1
+        i = k
+    return pieces
+
+
+def split_chunks(
+    chunks: Iterable[Tuple[str, str]],
+    max_chars: int,
+    overlap: int = 0,
+) -> Iterator[Tuple[str, str, int | None]]:
+    """
+    Size-bound a stream of (title, body) chunks.
+    Yields (title, body, parent): the first piece of a section keeps its
+    title and has parent None; continuation pieces are titled
+    "<title> (part N)" and carry the index of the section's first piece.
+    """
+    check_chunking(max_chars, overlap)
+    index = 0
+    for title, body in chunks:
+        head = index
+        for k, piece in enumerate(split_body(body, max_chars, overlap)):
+            if k == 0:
+                yield title, piece, None
+            else:
+                yield f"{title} (part {k + 1})", piece, head
+            index += 1
+
+
+def link_sub_nodes(G: nx.Graph, parents: List[int | None]) -> None:
+    """
+    Mark continuation pieces with their heading node (parent attribute) and
+    chain each piece to the previous one with a "sequence" edge.
+    A piece pair that is already similarity-linked keeps its similarity
+    weight; only unlinked pairs get a weight of 1.0.
+    """
+    for i, parent in enumerate(parents):
+        if parent is not None:
+            G.nodes[i]["parent"] = parent
+            if G.has_edge(i - 1, i):
+                G.edges[i - 1, i]["relation"] = "sequence"
+            else:
+                G.add_edge(i - 1, i, weight=1.0, relation="sequence")
+
+
 # ----------------------------------------------------------
 # Keyword extraction from TF-IDF
 # ----------------------------------------------------------
@@ -52,10 +231,32 @@ def tfidf_keywords_for_row(row, feature_names: List[str], top_n: int) -> List[st
     return [feature_names[i] for i in top_indices]
 
 
+def hashed_keywords_for_row(
+    row, body: str, vectorizer: HashingVectorizer, top_n: int
+) -> List[str]:
+    """
+    Like tfidf_keywords_for_row, for hashed vectors.
+    Hashing has no vocabulary, so the row's top buckets are mapped back to
+    terms by re-analyzing the chunk body.
+    """
+    if row.nnz == 0:
+        return []
+    n_features = vectorizer.n_features
+    bucket_terms = {}
+    for term in vectorizer.build_analyzer()(body):
+        bucket_terms.setdefault(abs(murmurhash3_32(term, seed=0)) % n_features, term)
+
+    order = row.data.argsort()[::-1][:top_n]
+    return [bucket_terms[row.indices[i]] for i in order if row.indices[i] in bucket_terms]
+
+
 # ----------------------------------------------------------
 # Topic classification
 # ----------------------------------------------------------
 
+TOPIC_THRESHOLD = 0.15
+
+
 def load_topic_terms(path: str | None) -> Dict[str, List[str]] | None:
     if not path:
         return None
@@ -85,26 +286,38 @@ def classify_node_topics(
     topic_terms: Dict[str, List[str]],
     topic_vecs,
     vectorizer: TfidfVectorizer,
+    node_terms: List[str] | None = None,
+    topic_scores: np.ndarray | None = None,
+    threshold: float = TOPIC_THRESHOLD,
 ) -> List[str]:
     """
     Classify node into topics based on cosine similarity with topic vectors.
     Returns list of topic names with similarity > threshold.
+    node_terms overrides the top terms used by the fuzzy fallback; pass it
+    when the vectorizer has no vocabulary (hashed vectors).
+    topic_scores holds precomputed similarities in topic_vecs order (a row
+    of topic_score_matrix).
     """
-    threshold = 0.15
     assigned = []
 
-    for topic_name, topic_vec in topic_vecs.items():
-        sim = cosine_similarity(node_vector, topic_vec)[0][0]
-        if sim > threshold:
-            assigned.append(topic_name)
+    if topic_scores is not None:
+        assigned = [name for name, sim in zip(topic_vecs, topic_scores) if sim > threshold]
+    else:
+        for topic_name, topic_vec in topic_vecs.items():
+            sim = cosine_similarity(node_vector, topic_vec)[0][0]
+            if sim > threshold:
+                assigned.append(topic_name)
 
     # Fallback: fuzzy match node keywords against topic terms
     if not assigned:
-        node_vec_array = node_vector.toarray().flatten()
-        node_top_indices = node_vec_array.argsort()[-10:][::-1]
-        node_top_terms = [
-            vectorizer.get_feature_names_out()[i] for i in node_top_indices
-        ]
+        if node_terms is not None:
+            node_top_terms = node_terms
+        else:
+            node_vec_array = node_vector.toarray().flatten()
+            node_top_indices = node_vec_array.argsort()[-10:][::-1]
+            node_top_terms = [
+                vectorizer.get_feature_names_out()[i] for i in node_top_indices
+            ]
 
         best_topic = None
         best_score = 0
@@ -122,23 +335,125 @@ def classify_node_topics(
     return assigned
 
 
+# ----------------------------------------------------------
+# Topic scores
+# ----------------------------------------------------------
+
+TOPIC_SCORES_FILE = "topic_scores.npz"
+
+
+def topic_score_matrix(X, topic_vecs, embeddings: "LsaEmbeddings | None" = None) -> np.ndarray:
+    """nodes x topics cosine similarities (topics in topic_vecs order), in one product."""
+    if embeddings is not None:
+        return embeddings.topic_scores(topic_vecs)
+    T = normalize(sp.vstack(list(topic_vecs.values())))
+    return (normalize(sp.csr_matrix(X)) @ T.T).toarray()
+
+
+def write_topic_scores(output_dir: str, scores, topics: List[str]) -> str:
+    """
+    Save a nodes x topics score matrix (dense or sparse; row = node id) as
+    topic_scores.npz. Only positive scores are kept, as float32, stored per
+    topic in descending score order: the file is both the sparse matrix (in
+    column-major form) and a per-topic ranked index.
+    """
+    S = sp.csc_matrix(scores, dtype=np.float32)
+    S.data[S.data < 0] = 0
+    S.eliminate_zeros()
+    columns = np.repeat(np.arange(S.shape[1]), np.diff(S.indptr))
+    order = np.lexsort((S.indices, -S.data, columns))
+    path = os.path.join(output_dir, TOPIC_SCORES_FILE)
+    tmp_path = f"{path}.tmp{os.getpid()}.npz"
+    np.savez(
+        tmp_path,
+        topics=np.asarray(topics, dtype=str),
+        shape=np.asarray(S.shape, dtype=np.int64),
+        indptr=S.indptr.astype(np.int64),
+        nodes=S.indices[order].astype(np.int64),
+        scores=S.data[order],
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def topic_scores_path(graph_path: str) -> str:
+    return os.path.join(os.path.dirname(graph_path), TOPIC_SCORES_FILE)
+
+
+class TopicScores:
+    """Reader for topic_scores.npz (see write_topic_scores)."""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise ValueError(f"No topic scores at {path}; rebuild the graph with --topics.")
+        with np.load(path) as data:
+            self.topics = data["topics"].tolist()
+            self.shape = tuple(data["shape"])
+            self._indptr = data["indptr"]
+            self._nodes = data["nodes"]
+            self._scores = data["scores"]
+
+    def ranked(self, topic: str, min_score: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """(node ids, scores) of one topic with score >= min_score, best first."""
+        k = self.topics.index(topic)
+        start, end = self._indptr[k], self._indptr[k + 1]
+        scores = self._scores[start:end]
+        # Scores are descending, so the cut is a binary search
+        cut = np.searchsorted(-scores, -np.float32(min_score), side="right")
+        return self._nodes[start:start + cut], scores[:cut]
+
+    def node_scores(self, topic: str, min_score: float = 0.0) -> Dict[int, float]:
+        """
+        node id -> score for topics whose name contains topic (case-insensitive,
+        as tags are matched), best first; a node's best matching topic counts.
+        """
+        best: Dict[int, float] = {}
+        for name in self.topics:
+            if topic.lower() in name.lower():
+                for node, score in zip(*self.ranked(name, min_score)):
+                    if score > best.get(int(node), -1.0):
+                        best[int(node)] = float(score)
+        return dict(sorted(best.items(), key=lambda item: (-item[1], item[0])))
+
+    def matrix(self) -> sp.csr_matrix:
+        """The full nodes x topics score matrix."""
+        return sp.csc_matrix((self._scores, self._nodes, self._indptr), shape=self.shape).tocsr()
+
+
 # ----------------------------------------------------------
 # Topic discovery
 # ----------------------------------------------------------
 
-def discover_topics(
-    input_file: str,
-    output_file: str,
+def discover_topic_terms(
+    chunks: List[Tuple[str, str]],
     num_topics: int = 5,
     terms_per_topic: int = 10,
-) -> None:
+) -> Dict[str, List[str]]:
     """
-    Discover topics from document using KMeans clustering on TF-IDF vectors.
-    Writes topic_terms.json with topic_0, topic_1, etc.
+    Cluster chunk bodies with KMeans on TF-IDF vectors.
+    Returns dict: topic_0, topic_1, ... -> top terms of each cluster center.
     """
-    text = pathlib.Path(input_file).read_text(encoding="utf-8")
-    chunks = extract_chunks(text)
+    return discover_topic_model(chunks, num_topics, terms_per_topic)["topics"]
+
 
+def discover_topic_model(
+    chunks: List[Tuple[str, str]],
+    num_topics: int = 5,
+    terms_per_topic: int = 10,
+    previous: dict | None = None,
+) -> dict:
+    """
+    Cluster chunk bodies with KMeans on TF-IDF vectors.
+
+    Returns a topic model dict: topics (name -> terms), names, vocabulary
+    and centroids (in names order), and drift (name -> 1 - cosine between
+    the previous and new centroid, None for new topics).
+
+    With a previous model (see load_topic_model), KMeans is warm-started from
+    the previous centroids mapped onto the new vocabulary, new clusters are
+    matched to old ones by Hungarian assignment on centroid cosine distance,
+    and matched clusters keep their previous (possibly hand-edited) names.
+    """
     docs = [body for _, body in chunks]
     vectorizer = TfidfVectorizer(
         max_features=200, stop_words="english", ngram_range=(1, 2)
@@ -151,30 +466,156 @@ def discover_topics(
             "Reduce num_topics or add more sections."
         )
 
-    kmeans = KMeans(n_clusters=num_topics, random_state=42, n_init=10)
-    kmeans.fit(X)
+    feature_names = list(vectorizer.get_feature_names_out())
 
-    feature_names = vectorizer.get_feature_names_out()
-    topic_terms = {}
+    if previous is None:
+        kmeans = KMeans(n_clusters=num_topics, random_state=42, n_init=10)
+        kmeans.fit(X)
+        centers = kmeans.cluster_centers_
+        names = [f"topic_{i}" for i in range(num_topics)]
+        drift = {name: None for name in names}
+    else:
+        old_centers = project_centroids(previous, feature_names)
+        init = old_centers[:num_topics]
+        if len(init) < num_topics:
+            extra, _ = kmeans_plusplus(X, num_topics - len(init), random_state=42)
+            init = np.vstack([init, extra.toarray() if sp.issparse(extra) else extra])
+        kmeans = KMeans(n_clusters=num_topics, init=init, n_init=1)
+        kmeans.fit(X)
+        centers, names, drift = match_topics(previous, old_centers, kmeans.cluster_centers_, feature_names)
 
-    for i in range(num_topics):
-        center = kmeans.cluster_centers_[i]
+    topic_terms = {}
+    for name, center in zip(names, centers):
         top_indices = center.argsort()[-terms_per_topic:][::-1]
-        terms = [feature_names[idx] for idx in top_indices]
-        topic_terms[f"topic_{i}"] = terms
+        topic_terms[name] = [feature_names[idx] for idx in top_indices]
+
+    return {
+        "topics": topic_terms,
+        "names": names,
+        "vocabulary": feature_names,
+        "centroids": np.round(centers, 6).tolist(),
+        "drift": drift,
+    }
+
+
+def project_centroids(model: dict, feature_names: List[str]) -> np.ndarray:
+    """Re-express a model's centroids over another vocabulary (unknown terms -> 0)."""
+    old_index = {term: i for i, term in enumerate(model["vocabulary"])}
+    old = np.asarray(model["centroids"], dtype=np.float64)
+    projected = np.zeros((len(old), len(feature_names)))
+    for j, term in enumerate(feature_names):
+        i = old_index.get(term)
+        if i is not None:
+            projected[:, j] = old[:, i]
+    return projected
+
+
+def centroid_drift(model: dict, old_row: int, center: np.ndarray, feature_names: List[str]) -> float:
+    """1 - cosine between an old and a new centroid over their union vocabulary."""
+    old = dict(zip(model["vocabulary"], model["centroids"][old_row]))
+    new = dict(zip(feature_names, center))
+    dot = sum(w * new.get(term, 0.0) for term, w in old.items())
+    norm = np.sqrt(sum(w * w for w in old.values())) * np.sqrt(sum(w * w for w in new.values()))
+    return round(float(1.0 - dot / norm), 6) if norm else 1.0
+
+
+def match_topics(previous: dict, old_centers: np.ndarray, new_centers: np.ndarray, feature_names):
+    """
+    Hungarian assignment of new clusters to previous topics.
+    Returns (centers, names, drift) with matched topics first, in previous order.
+    """
+    cost = 1.0 - cosine_similarity(old_centers, new_centers)
+    old_rows, new_rows = linear_sum_assignment(cost)
+
+    centers, names, drift = [], [], {}
+    for old_row, new_row in sorted(zip(old_rows, new_rows)):
+        name = previous["names"][old_row]
+        centers.append(new_centers[new_row])
+        names.append(name)
+        drift[name] = centroid_drift(previous, old_row, new_centers[new_row], feature_names)
+
+    n = 0
+    for new_row in sorted(set(range(len(new_centers))) - set(new_rows)):
+        while f"topic_{n}" in previous["names"] or f"topic_{n}" in names:
+            n += 1
+        names.append(f"topic_{n}")
+        centers.append(new_centers[new_row])
+        drift[f"topic_{n}"] = None
+
+    return np.array(centers), names, drift
+
+
+def topic_model_path(topic_terms_path: str) -> str:
+    """Sidecar file holding the centroids behind a topic_terms.json."""
+    return os.path.splitext(topic_terms_path)[0] + ".model.json"
+
+
+def load_topic_model(topic_terms_path: str) -> dict:
+    """
+    Load the model behind a (possibly hand-edited) topic_terms.json.
+    Topic names are taken from the topic file, in order, so renamed topics
+    stay renamed; centroids come from the sidecar model file.
+    """
+    names = list(load_topic_terms(topic_terms_path))
+    model_path = topic_model_path(topic_terms_path)
+    if not os.path.exists(model_path):
+        raise ValueError(
+            f"No topic model found at {model_path}. "
+            "Run discover-topics once without --previous first."
+        )
+    with open(model_path, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    if len(names) != len(model["centroids"]):
+        raise ValueError(
+            f"{topic_terms_path} has {len(names)} topics but its model has "
+            f"{len(model['centroids'])}. Topics can be renamed, not added or removed."
+        )
+    model["names"] = names
+    return model
+
+
+def discover_topics(
+    input_file: str,
+    output_file: str,
+    num_topics: int = 5,
+    terms_per_topic: int = 10,
+    previous: str | None = None,
+) -> None:
+    """
+    Discover topics from document using KMeans clustering on TF-IDF vectors.
+    Writes topic_terms.json with topic_0, topic_1, etc., plus a
+    topic_terms.model.json sidecar with the centroids.
+    With previous (an earlier topic_terms.json), clustering is warm-started
+    from it, topic names are preserved and per-topic drift is reported.
+    """
+    chunks = extract_chunks(read_source(input_file))
+    previous_model = load_topic_model(previous) if previous else None
+    model = discover_topic_model(chunks, num_topics, terms_per_topic, previous_model)
 
     with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(topic_terms, f, indent=2, ensure_ascii=False)
+        json.dump(model["topics"], f, indent=2, ensure_ascii=False)
+    write_json_atomic(
+        topic_model_path(output_file),
+        {key: model[key] for key in ("names", "vocabulary", "centroids", "drift")},
+    )
 
     print(f"Topic discovery complete: {output_file}")
-    print("Edit the topic names manually (e.g., topic_0 -> 'frontend').")
-    print("Then pass this file to 'kgtool build --topics topic_terms.json'.")
+    if previous_model:
+        print("Topic drift (0 = unchanged, 1 = unrelated; new topics marked 'new'):")
+        for name, value in model["drift"].items():
+            print(f"  {name}: {'new' if value is None else f'{value:.3f}'}")
+    else:
+        print("Edit the topic names manually (e.g., topic_0 -> 'frontend').")
+        print("Then pass this file to 'kgtool build --topics topic_terms.json'.")
 
 
 # ----------------------------------------------------------
 # Graph building
 # ----------------------------------------------------------
 
+BODY_STORE = "bodies.bin"
+
+
 def build_graph(
     input_file: str,
     output_dir: str,
@@ -182,36 +623,166 @@ def build_graph(
     top_keywords: int = 5,
     top_keyphrases: int = 5,
     topic_terms_path: str | None = None,
+    out_of_core: bool = False,
+    shard_size: int = 10000,
+    analytics: bool = False,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+    compress_bodies: bool = False,
+    concepts: bool = False,
+    search_index: bool = True,
+    lean: bool = False,
+    embedding_dims: int | None = None,
+    prune: str | None = None,
 ) -> None:
     """
     Build knowledge graph from document.
     Each heading becomes a node.
     Edges connect nodes with similarity > min_similarity.
     Nodes are tagged with topics if topic_terms_path is provided.
+    With out_of_core=True, chunks are streamed from disk and vectorized in
+    shards of shard_size (see build_graph_out_of_core).
+    With analytics=True, communities and centralities are stored on the
+    nodes (see compute_graph_analytics).
+    With max_chunk_chars, sections longer than that are split into
+    sequential sub-nodes overlapping by chunk_overlap characters.
+    With compress_bodies=True, bodies are stored once, compressed, in
+    bodies.bin instead of inline in graph.json and nodes/*.md.
+    With concepts=True, a keyphrase concept layer is written to
+    concepts.json (see build_concept_layer).
+    A BM25 full-text index over titles and bodies is written to index.bin
+    unless search_index is False (see build_search_index).
+    With lean=True, bodies stay in the memory-mapped input file and node
+    metadata in slotted records (see build_graph_lean); the output is the same.
+    Both streaming modes read markdown only, decoded and normalized like the
+    default build (see markdown_source).
+    With embedding_dims, TF-IDF vectors are projected to that many LSA
+    dimensions (see LsaEmbeddings); the embeddings drive edges and topic
+    tags and are saved as embeddings.npy.
+    With prune ("knn", "adaptive" or "backbone", optionally ":parameter"),
+    weak similarity edges are removed before analytics (see prune_edges).
     """
-    text = pathlib.Path(input_file).read_text(encoding="utf-8")
-    chunks = extract_chunks(text)
+    if prune:
+        parse_prune_spec(prune)
+    check_chunking(max_chunk_chars, chunk_overlap)
+    if out_of_core and lean:
+        raise ValueError("out_of_core and lean are separate build modes; pick one.")
+    if out_of_core and embedding_dims:
+        raise ValueError("Embeddings are not supported by the out-of-core build.")
+    if out_of_core or lean:
+        # Both stream the input in place, so decode and normalize it first
+        os.makedirs(output_dir, exist_ok=True)
+        with markdown_source(input_file, spill_dir=output_dir) as source_file:
+            if lean:
+                build_graph_lean(
+                    input_file=source_file,
+                    output_dir=output_dir,
+                    min_similarity=min_similarity,
+                    top_keywords=top_keywords,
+                    top_keyphrases=top_keyphrases,
+                    topic_terms_path=topic_terms_path,
+                    analytics=analytics,
+                    max_chunk_chars=max_chunk_chars,
+                    chunk_overlap=chunk_overlap,
+                    compress_bodies=compress_bodies,
+                    concepts=concepts,
+                    search_index=search_index,
+                    embedding_dims=embedding_dims,
+                    prune=prune,
+                )
+            else:
+                build_graph_out_of_core(
+                    input_file=source_file,
+                    output_dir=output_dir,
+                    min_similarity=min_similarity,
+                    top_keywords=top_keywords,
+                    top_keyphrases=top_keyphrases,
+                    topic_terms_path=topic_terms_path,
+                    shard_size=shard_size,
+                    analytics=analytics,
+                    max_chunk_chars=max_chunk_chars,
+                    chunk_overlap=chunk_overlap,
+                    compress_bodies=compress_bodies,
+                    concepts=concepts,
+                    search_index=search_index,
+                    prune=prune,
+                )
+        return
 
-    os.makedirs(output_dir, exist_ok=True)
-    nodes_dir = os.path.join(output_dir, "nodes")
-    os.makedirs(nodes_dir, exist_ok=True)
+    chunks = extract_chunks(read_source(input_file))
+    parents = None
+    if max_chunk_chars:
+        pieces = list(split_chunks(chunks, max_chunk_chars, chunk_overlap))
+        chunks = [(title, body) for title, body, _ in pieces]
+        parents = [parent for _, _, parent in pieces]
 
-    # TF-IDF vectorization
-    docs = [body for _, body in chunks]
-    vectorizer = TfidfVectorizer(
-        max_features=500, stop_words="english", ngram_range=(1, 2)
+    topic_terms = load_topic_terms(topic_terms_path)
+    vectors = vectorize_chunks(chunks)
+    embeddings = LsaEmbeddings.fit(*vectors, embedding_dims) if embedding_dims else None
+    scores = None
+    if topic_terms:
+        topic_vecs = build_topic_vectors(topic_terms, vectors[0])
+        scores = topic_score_matrix(vectors[1], topic_vecs, embeddings)
+    G, _, _ = build_knowledge_graph(
+        chunks,
+        min_similarity=min_similarity,
+        top_keywords=top_keywords,
+        top_keyphrases=top_keyphrases,
+        topic_terms=topic_terms,
+        parents=parents,
+        vectors=vectors,
+        embeddings=embeddings,
+        topic_scores=scores,
     )
-    X = vectorizer.fit_transform(docs)
+    if prune:
+        prune_edges(G, *parse_prune_spec(prune))
+    if analytics:
+        compute_graph_analytics(G)
+    save_graph(G, output_dir, compress_bodies=compress_bodies, search_index=search_index)
+    if scores is not None:
+        print(f"Topic scores written to: {write_topic_scores(output_dir, scores, list(topic_terms))}")
+    else:
+        remove_stale_output(output_dir, TOPIC_SCORES_FILE)
+    if embeddings is not None:
+        print(f"Embeddings ({embeddings.dims} dims) written to: {embeddings.save(output_dir)}")
+    else:
+        remove_embeddings(output_dir)
+    if concepts:
+        write_concept_layer(G, output_dir)
+    else:
+        remove_stale_output(output_dir, CONCEPTS_FILE)
+
+
+def build_knowledge_graph(
+    chunks: List[Tuple[str, str]],
+    min_similarity: float = 0.3,
+    top_keywords: int = 5,
+    top_keyphrases: int = 5,
+    topic_terms: Dict[str, List[str]] | None = None,
+    keyphrases: List[List[str]] | None = None,
+    parents: List[int | None] | None = None,
+    vectors: Tuple[TfidfVectorizer, sp.csr_matrix] | None = None,
+    embeddings: "LsaEmbeddings | None" = None,
+    topic_scores: np.ndarray | None = None,
+) -> Tuple[nx.Graph, TfidfVectorizer, sp.csr_matrix]:
+    """
+    Build the in-memory knowledge graph for a list of (title, body) chunks.
+    Returns (graph, fitted vectorizer, TF-IDF matrix) so callers can keep
+    working with the vectors without refitting.
+    keyphrases may hold precomputed YAKE keyphrases per chunk to skip YAKE.
+    parents (from split_chunks) links split pieces as sequential sub-nodes.
+    vectors may hold a precomputed vectorize_chunks result. With embeddings
+    (fitted on those vectors), edges and topic scores use the dense LSA
+    vectors instead of the sparse TF-IDF rows. topic_scores may hold the
+    precomputed topic_score_matrix.
+    """
+    # TF-IDF vectorization
+    vectorizer, X = vectors if vectors is not None else vectorize_chunks(chunks)
     feature_names = vectorizer.get_feature_names_out()
 
     # YAKE keyphrase extraction
-    kw_extractor = yake.KeywordExtractor(top=top_keyphrases, stopwords=None)
-
-    # Load topic terms if provided
-    topic_terms = load_topic_terms(topic_terms_path)
-    topic_vecs = None
-    if topic_terms:
-        topic_vecs = build_topic_vectors(topic_terms, vectorizer)
+    if keyphrases is None:
+        keyphrases = extract_keyphrases([body for _, body in chunks], top_keyphrases)
 
     # Build graph
     G = nx.Graph()
@@ -219,56 +790,879 @@ def build_graph(
     for i, (title, body) in enumerate(chunks):
         # Extract keywords
         keywords = tfidf_keywords_for_row(X[i], feature_names, top_keywords)
-        keyphrases = [kw for kw, _ in kw_extractor.extract_keywords(body)]
-
-        # Classify topics
-        tags = []
-        if topic_terms and topic_vecs:
-            node_vec = X[i]
-            tags = classify_node_topics(node_vec, topic_terms, topic_vecs, vectorizer)
-
-        # Fallback: use title + keywords as tags
-        if not tags:
-            tags = [title.lower().replace(" ", "_")]
 
         G.add_node(
             i,
             title=title,
             body=body,
             keywords=keywords,
-            keyphrases=keyphrases,
-            tags=tags,
+            keyphrases=keyphrases[i],
+            tags=[],
         )
 
+    # Classify topics
+    assign_topic_tags(G, X, vectorizer, topic_terms, embeddings, topic_scores)
+
     # Add edges based on similarity
-    similarity_matrix = cosine_similarity(X)
-    for i in range(len(chunks)):
-        for j in range(i + 1, len(chunks)):
-            sim = similarity_matrix[i, j]
-            if sim >= min_similarity:
-                G.add_edge(i, j, weight=float(sim))
+    add_similarity_edges(G, X if embeddings is None else embeddings.vectors, min_similarity)
+    if parents:
+        link_sub_nodes(G, parents)
 
-    # Save graph
+    return G, vectorizer, X
+
+
+def extract_keyphrases(bodies: List[str], top_keyphrases: int) -> List[List[str]]:
+    """YAKE keyphrases for each body."""
+    kw_extractor = yake.KeywordExtractor(top=top_keyphrases, stopwords=None)
+    return [[kw for kw, _ in kw_extractor.extract_keywords(body)] for body in bodies]
+
+
+def make_build_vectorizer(vocabulary=None) -> TfidfVectorizer:
+    """The build TF-IDF vectorizer; pass a saved vocabulary to reproduce a fitted one."""
+    return TfidfVectorizer(
+        max_features=500, stop_words="english", ngram_range=(1, 2), vocabulary=vocabulary
+    )
+
+
+def vectorize_chunks(chunks: List[Tuple[str, str]]):
+    """Fit the build TF-IDF vectorizer on chunk bodies; returns (vectorizer, X)."""
+    docs = [body for _, body in chunks]
+    vectorizer = make_build_vectorizer()
+    return vectorizer, vectorizer.fit_transform(docs)
+
+
+def assign_topic_tags(
+    G: nx.Graph,
+    X,
+    vectorizer: TfidfVectorizer,
+    topic_terms: Dict[str, List[str]] | None,
+    embeddings: "LsaEmbeddings | None" = None,
+    scores: np.ndarray | None = None,
+) -> None:
+    """
+    (Re)tag every node from its TF-IDF row (node id == row index).
+    Topic similarities come from one topic_score_matrix product (over the
+    LSA vectors with embeddings) unless precomputed scores are given.
+    Nodes that match no topic are tagged with their normalized title.
+    """
+    topic_vecs = None
+    if topic_terms:
+        topic_vecs = build_topic_vectors(topic_terms, vectorizer)
+        if scores is None:
+            scores = topic_score_matrix(X, topic_vecs, embeddings)
+    threshold = EMBEDDING_TOPIC_THRESHOLD if embeddings else TOPIC_THRESHOLD
+
+    for i, data in G.nodes(data=True):
+        data["tags"] = topic_tags_for_row(
+            X[i], data["title"], topic_terms, topic_vecs, vectorizer,
+            None if scores is None else scores[i], threshold,
+        )
+
+
+def topic_tags_for_row(
+    row, title: str, topic_terms, topic_vecs, vectorizer, topic_scores=None,
+    threshold: float = TOPIC_THRESHOLD,
+) -> List[str]:
+    tags = []
+    if topic_terms and topic_vecs:
+        tags = classify_node_topics(
+            row, topic_terms, topic_vecs, vectorizer, topic_scores=topic_scores, threshold=threshold
+        )
+
+    # Fallback: use title as tag
+    if not tags:
+        tags = [title.lower().replace(" ", "_")]
+    return tags
+
+
+SIMILARITY_BLOCK = 1024
+
+
+def add_similarity_edges(G: nx.Graph, X, min_similarity: float) -> None:
+    """
+    Connect every node pair whose cosine similarity >= min_similarity.
+    Similarities are products of SIMILARITY_BLOCK rows against all rows, so
+    the N x N matrix is never materialized. X is a sparse TF-IDF matrix or
+    dense (LSA) embeddings.
+    """
+    dense = not sp.issparse(X)
+    X = normalize(X) if dense else normalize(sp.csr_matrix(X))
+    for start in range(0, X.shape[0], SIMILARITY_BLOCK):
+        S = X[start:start + SIMILARITY_BLOCK] @ X.T
+        if dense:
+            rows, cols = np.nonzero(S >= min_similarity)
+            data = S[rows, cols]
+        else:
+            S = S.tocoo()
+            keep = S.data >= min_similarity
+            rows, cols, data = S.row[keep], S.col[keep], S.data[keep]
+        rows = rows + start
+        upper = rows < cols
+        for i, j, sim in sorted(zip(rows[upper], cols[upper], data[upper])):
+            G.add_edge(int(i), int(j), weight=float(sim))
+
+
+def save_graph(
+    G: nx.Graph,
+    output_dir: str,
+    verbose: bool = True,
+    compress_bodies: bool = False,
+    search_index: bool = True,
+) -> None:
+    """
+    Write graph.json and one markdown file per node into output_dir.
+    With compress_bodies=True, bodies are stored once in a compressed block
+    store (bodies.bin) referenced from graph.json, and no node files are written.
+    With search_index=True, the full-text index (index.bin) is written too;
+    otherwise an index left by an earlier build is removed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if search_index:
+        write_search_index(output_dir, graph_search_docs(G), verbose)
+    else:
+        remove_stale_output(output_dir, INDEX_FILE)
     graph_path = os.path.join(output_dir, "graph.json")
     graph_data = json_graph.node_link_data(G)
-    with open(graph_path, "w", encoding="utf-8") as f:
-        json.dump(graph_data, f, indent=2, ensure_ascii=False)
 
-    print(f"Graph saved: {graph_path}")
-    print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+    if compress_bodies:
+        bodies = [node.pop("body") for node in graph_data["nodes"]]
+        refs = write_body_store(os.path.join(output_dir, BODY_STORE), bodies, bodies)
+        for node, ref in zip(graph_data["nodes"], refs):
+            node["body_ref"] = ref
+        graph_data["graph"] = {**graph_data["graph"], "body_store": BODY_STORE}
+        write_json_atomic(graph_path, graph_data)
+        if verbose:
+            print(f"Graph saved: {graph_path}")
+            print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+            print(f"Compressed bodies written to: {os.path.join(output_dir, BODY_STORE)}")
+        return
+
+    nodes_dir = os.path.join(output_dir, "nodes")
+    os.makedirs(nodes_dir, exist_ok=True)
+
+    # Save graph
+    write_json_atomic(graph_path, graph_data)
 
     # Save individual node markdown files
     for node_id, data in G.nodes(data=True):
-        node_file = os.path.join(nodes_dir, f"node_{node_id}.md")
-        with open(node_file, "w", encoding="utf-8") as f:
-            f.write(f"# {data['title']}\n\n")
-            f.write(f"**Tags:** {', '.join(data['tags'])}\n\n")
-            f.write(f"**Keywords:** {', '.join(data['keywords'])}\n\n")
-            f.write(f"**Keyphrases:** {', '.join(data['keyphrases'])}\n\n")
-            f.write("---\n\n")
-            f.write(data["body"] + "\n")
+        write_node_markdown(nodes_dir, node_id, data, data["body"])
+
+    if verbose:
+        print(f"Graph saved: {graph_path}")
+        print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+        print(f"Markdown nodes written to: {nodes_dir}/")
+
+
+def graph_search_docs(G: nx.Graph) -> Iterator[Tuple[int, str, str]]:
+    for node_id, data in G.nodes(data=True):
+        yield node_id, data["title"], data["body"]
+
 
-    print(f"Markdown nodes written to: {nodes_dir}/")
+def write_search_index(
+    output_dir: str, docs: Iterable[Tuple[int, str, str]], verbose: bool = True
+) -> None:
+    path = os.path.join(output_dir, INDEX_FILE)
+    n_docs = build_search_index(path, docs)
+    if verbose:
+        print(f"Search index written to: {path} ({n_docs} sections)")
+
+
+def write_concept_layer(G: nx.Graph, output_dir: str, layer: dict | None = None) -> None:
+    path = os.path.join(output_dir, CONCEPTS_FILE)
+    if layer is None:
+        layer = build_concept_layer(G)
+    write_json_atomic(path, layer)
+    print(f"Concept layer written to: {path} ({len(layer['concepts'])} concepts)")
+
+
+def remove_stale_output(output_dir: str, name: str) -> None:
+    """
+    Delete an optional output file a previous build left in output_dir, so
+    readers never pair it with a graph.json it does not describe.
+    """
+    try:
+        os.remove(os.path.join(output_dir, name))
+    except FileNotFoundError:
+        pass
+
+
+def load_graph(graph_path: str) -> nx.Graph:
+    with open(graph_path, "r", encoding="utf-8") as f:
+        graph_data = json.load(f)
+    return json_graph.node_link_graph(graph_data)
+
+
+def hydrate_bodies(G: nx.Graph, node_ids, graph_dir: str) -> None:
+    """
+    Fill in the body of node_ids from the graph's compressed body store,
+    decompressing only those nodes. No-op for graphs with inline bodies.
+    """
+    store_name = G.graph.get("body_store")
+    if not store_name:
+        return
+    with BodyStore(os.path.join(graph_dir, store_name)) as store:
+        for node_id in node_ids:
+            data = G.nodes[node_id]
+            if "body" not in data:
+                data["body"] = store.get(data["body_ref"])
+
+
+def write_json_atomic(path: str, data) -> None:
+    """
+    Write JSON to a temporary file next to path, then rename it into place,
+    so concurrent readers see either the old or the new file, never a partial one.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_node_markdown(nodes_dir: str, node_id, data: dict, body: str) -> None:
+    node_file = os.path.join(nodes_dir, f"node_{node_id}.md")
+    with open(node_file, "w", encoding="utf-8") as f:
+        f.write(f"# {data['title']}\n\n")
+        f.write(f"**Tags:** {', '.join(data['tags'])}\n\n")
+        f.write(f"**Keywords:** {', '.join(data['keywords'])}\n\n")
+        f.write(f"**Keyphrases:** {', '.join(data['keyphrases'])}\n\n")
+        f.write("---\n\n")
+        f.write(body + "\n")
+
+
+def write_graph_json(
+    G: nx.Graph,
+    graph_path: str,
+    bodies: Iterator[str] | None,
+    attributes: Iterator[dict] | None = None,
+) -> None:
+    """
+    Write node_link_data JSON for a graph whose nodes carry no body,
+    pulling bodies from an iterator (in node order) while writing.
+    Keeps only one body in memory at a time. attributes optionally yields
+    extra per-node fields kept outside the graph; bodies=None writes no body
+    (for graphs with a body store).
+    """
+    graph_data = json_graph.node_link_data(G)
+    edges_key = "links" if "links" in graph_data else "edges"
+
+    tmp_path = f"{graph_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for key in ("directed", "multigraph", "graph"):
+            f.write(f'  "{key}": {json.dumps(graph_data[key])},\n')
+        f.write('  "nodes": [')
+        if attributes is None:
+            attributes = itertools.repeat({})
+        for n, (node, extra) in enumerate(zip(graph_data["nodes"], attributes)):
+            node = {**extra, **node}
+            head = {"title": node.pop("title")}
+            if bodies is not None:
+                head["body"] = next(bodies)
+            node = {**head, **node}
+            f.write(",\n    " if n else "\n    ")
+            f.write(json.dumps(node, ensure_ascii=False))
+        f.write("\n  ],\n")
+        f.write(f'  "{edges_key}": [')
+        for n, edge in enumerate(graph_data[edges_key]):
+            f.write(",\n    " if n else "\n    ")
+            f.write(json.dumps(edge))
+        f.write("\n  ]\n}\n")
+    os.replace(tmp_path, graph_path)
+
+
+# ----------------------------------------------------------
+# Graph analytics
+# ----------------------------------------------------------
+
+def compute_graph_analytics(G: nx.Graph, betweenness_samples: int = 256) -> None:
+    """
+    Precompute graph analytics once and store them as node attributes:
+    community (Louvain, weighted), pagerank (weighted, scipy sparse power
+    iteration), betweenness (sampled from betweenness_samples pivots on
+    larger graphs), degree and hub_rank (1 = highest pagerank).
+    """
+    if G.number_of_nodes() == 0:
+        return
+
+    communities = nx.community.louvain_communities(G, weight="weight", seed=42)
+    # Largest community first, so community 0 is the main cluster
+    communities = sorted(communities, key=lambda c: (-len(c), min(c)))
+    for community_id, members in enumerate(communities):
+        for node_id in members:
+            G.nodes[node_id]["community"] = community_id
+
+    pagerank = nx.pagerank(G, weight="weight")
+
+    k = betweenness_samples if G.number_of_nodes() > betweenness_samples else None
+    betweenness = nx.betweenness_centrality(G, k=k, seed=42)
+
+    ranked = sorted(G.nodes, key=lambda n: (-pagerank[n], n))
+    for rank, node_id in enumerate(ranked, start=1):
+        data = G.nodes[node_id]
+        data["pagerank"] = round(pagerank[node_id], 6)
+        data["betweenness"] = round(betweenness[node_id], 6)
+        data["degree"] = G.degree(node_id)
+        data["hub_rank"] = rank
+
+    G.graph["communities"] = len(communities)
+
+
+# ----------------------------------------------------------
+# Out-of-core graph building
+# ----------------------------------------------------------
+
+HASH_FEATURES = 2**20
+# Hashed vectors keep the full (bigram) vocabulary instead of the fitted top
+# 500 terms, so topic cosines run at roughly 0.4x the fitted ones
+HASHED_TOPIC_THRESHOLD = 0.06
+
+
+def make_hashing_vectorizer() -> HashingVectorizer:
+    """Stateless vectorizer producing raw term counts; IDF is applied separately."""
+    return HashingVectorizer(
+        n_features=HASH_FEATURES,
+        stop_words="english",
+        ngram_range=(1, 2),
+        alternate_sign=False,
+        norm=None,
+    )
+
+
+def idf_from_document_frequency(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """Smoothed IDF, same formula as TfidfVectorizer's default."""
+    return np.log((1 + n_docs) / (1 + df)) + 1.0
+
+
+def apply_idf(X, idf: np.ndarray):
+    """Weight raw counts by IDF and L2-normalize rows."""
+    return normalize(sp.csr_matrix(X.multiply(idf), dtype=np.float32))
+
+
+def build_hashed_topic_vectors(
+    topic_terms: Dict[str, List[str]],
+    vectorizer: HashingVectorizer,
+    idf: np.ndarray,
+):
+    """Hashed counterpart of build_topic_vectors."""
+    return {
+        name: apply_idf(vectorizer.transform([" ".join(terms)]), idf)
+        for name, terms in topic_terms.items()
+    }
+
+
+def hashed_node_terms(
+    node_vec,
+    title: str,
+    body: str,
+    vectorizer: HashingVectorizer,
+    top_keywords: int,
+    topic_terms: Dict[str, List[str]] | None,
+    topic_vecs,
+    topic_scores: np.ndarray | None = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Keywords and topic tags for one hashed TF-IDF row; topic_scores may
+    hold the row's precomputed topic_score_matrix row. Tags use
+    HASHED_TOPIC_THRESHOLD, calibrated for hashed cosines.
+    """
+    keywords = hashed_keywords_for_row(node_vec, body, vectorizer, top_keywords)
+
+    tags = []
+    if topic_terms and topic_vecs:
+        node_terms = hashed_keywords_for_row(node_vec, body, vectorizer, 10)
+        tags = classify_node_topics(
+            node_vec, topic_terms, topic_vecs, vectorizer, node_terms=node_terms,
+            topic_scores=topic_scores, threshold=HASHED_TOPIC_THRESHOLD,
+        )
+    if not tags:
+        tags = [title.lower().replace(" ", "_")]
+    return keywords, tags
+
+
+def add_blockwise_similarity_edges(
+    G: nx.Graph, shard_paths: List[str], min_similarity: float
+) -> None:
+    """
+    Similarity join over row-normalized TF-IDF shards, two at a time.
+    Node ids are global row indices (shards concatenated in order).
+    """
+    sizes = [int(np.load(path)["shape"][0]) for path in shard_paths]
+    offsets = np.cumsum([0] + sizes)
+    for a, path_a in enumerate(shard_paths):
+        A = sp.load_npz(path_a)
+        for b in range(a, len(shard_paths)):
+            B = A if b == a else sp.load_npz(shard_paths[b])
+            S = (A @ B.T).tocoo()
+            keep = S.data >= min_similarity
+            rows = S.row[keep] + offsets[a]
+            cols = S.col[keep] + offsets[b]
+            for i, j, sim in zip(rows, cols, S.data[keep]):
+                if i < j:
+                    G.add_edge(int(i), int(j), weight=float(sim))
+
+
+def iter_batches(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_graph_out_of_core(
+    input_file: str,
+    output_dir: str,
+    min_similarity: float = 0.3,
+    top_keywords: int = 5,
+    top_keyphrases: int = 5,
+    topic_terms_path: str | None = None,
+    shard_size: int = 10000,
+    analytics: bool = False,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+    compress_bodies: bool = False,
+    concepts: bool = False,
+    search_index: bool = True,
+    prune: str | None = None,
+) -> None:
+    """
+    Build knowledge graph without holding the corpus in memory.
+
+    Chunks are streamed from disk through a HashingVectorizer, document
+    frequencies are accumulated per shard, and the TF-IDF matrix is written
+    to output_dir/matrix/shard_*.npz. Keywording, classification and the
+    blockwise similarity join then read those shards back one or two at a
+    time. Bodies are re-streamed from the input file whenever they are needed.
+    """
+    encoding = source_encoding(input_file)
+    if encoding != "utf-8":
+        raise ValueError(
+            f"{input_file} looks {encoding}-encoded; the out-of-core build streams UTF-8 only. "
+            "Use the default build to decode it."
+        )
+    os.makedirs(output_dir, exist_ok=True)
+    nodes_dir = os.path.join(output_dir, "nodes")
+    matrix_dir = os.path.join(output_dir, "matrix")
+    if not compress_bodies:
+        os.makedirs(nodes_dir, exist_ok=True)
+    os.makedirs(matrix_dir, exist_ok=True)
+
+    vectorizer = make_hashing_vectorizer()
+
+    # Pass 1: raw term counts per shard + document frequencies
+    df = np.zeros(HASH_FEATURES, dtype=np.int64)
+    n_docs = 0
+    shard_paths = []
+    def stream_chunks() -> Iterator[Tuple[str, str, int | None]]:
+        chunks = iter_chunks(input_file)
+        if max_chunk_chars:
+            return split_chunks(chunks, max_chunk_chars, chunk_overlap)
+        return ((title, body, None) for title, body in chunks)
+
+    for k, batch in enumerate(iter_batches(stream_chunks(), shard_size)):
+        counts = vectorizer.transform(body for _, body, _ in batch).tocsr()
+        df += np.bincount(counts.indices, minlength=HASH_FEATURES)
+        n_docs += counts.shape[0]
+        shard_path = os.path.join(matrix_dir, f"shard_{k:05d}.npz")
+        sp.save_npz(shard_path, counts)
+        shard_paths.append(shard_path)
+
+    # Pass 2: turn counts into TF-IDF in place
+    idf = idf_from_document_frequency(df, n_docs)
+    del df
+    for shard_path in shard_paths:
+        sp.save_npz(shard_path, apply_idf(sp.load_npz(shard_path), idf))
+
+    kw_extractor = yake.KeywordExtractor(top=top_keyphrases, stopwords=None)
+
+    topic_terms = load_topic_terms(topic_terms_path)
+    topic_vecs = None
+    if topic_terms:
+        topic_vecs = build_hashed_topic_vectors(topic_terms, vectorizer, idf)
+
+    # Pass 3: per-node keywords, keyphrases and tags
+    G = nx.Graph()
+    chunk_stream = stream_chunks()
+    parents = []
+    score_blocks = []
+    node_id = 0
+    for shard_path in shard_paths:
+        X = sp.load_npz(shard_path)
+        scores = topic_score_matrix(X, topic_vecs) if topic_vecs else None
+        if scores is not None:
+            score_blocks.append(sp.csr_matrix(scores, dtype=np.float32))
+        for row in range(X.shape[0]):
+            title, body, parent = next(chunk_stream)
+            parents.append(parent)
+            keywords, tags = hashed_node_terms(
+                X[row], title, body, vectorizer, top_keywords, topic_terms, topic_vecs,
+                None if scores is None else scores[row],
+            )
+            keyphrases = [kw for kw, _ in kw_extractor.extract_keywords(body)]
+
+            data = dict(title=title, keywords=keywords, keyphrases=keyphrases, tags=tags)
+            G.add_node(node_id, **data)
+            if not compress_bodies:
+                write_node_markdown(nodes_dir, node_id, data, body)
+            node_id += 1
+
+    # Pass 4: blockwise similarity join over shard pairs
+    add_blockwise_similarity_edges(G, shard_paths, min_similarity)
+    link_sub_nodes(G, parents)
+    if prune:
+        prune_edges(G, *parse_prune_spec(prune))
+
+    if analytics:
+        compute_graph_analytics(G)
+
+    if search_index:
+        write_search_index(output_dir, (
+            (node_id, title, body)
+            for node_id, (title, body, _) in enumerate(stream_chunks())
+        ))
+    else:
+        remove_stale_output(output_dir, INDEX_FILE)
+
+    graph_path = os.path.join(output_dir, "graph.json")
+    if compress_bodies:
+        store_path = os.path.join(output_dir, BODY_STORE)
+        samples = [body for _, body, _ in itertools.islice(stream_chunks(), TRAINING_SAMPLES)]
+        refs = write_body_store(store_path, (body for _, body, _ in stream_chunks()), samples)
+        for node_id, ref in enumerate(refs):
+            G.nodes[node_id]["body_ref"] = ref
+        G.graph["body_store"] = BODY_STORE
+        write_json_atomic(graph_path, json_graph.node_link_data(G))
+    else:
+        write_graph_json(G, graph_path, (body for _, body, _ in stream_chunks()))
+
+    print(f"Graph saved: {graph_path}")
+    print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+    if compress_bodies:
+        print(f"Compressed bodies written to: {store_path}")
+    else:
+        print(f"Markdown nodes written to: {nodes_dir}/")
+    if score_blocks:
+        scores_path = write_topic_scores(output_dir, sp.vstack(score_blocks), list(topic_terms))
+        print(f"Topic scores written to: {scores_path}")
+    else:
+        remove_stale_output(output_dir, TOPIC_SCORES_FILE)
+    if concepts:
+        write_concept_layer(G, output_dir)
+    else:
+        remove_stale_output(output_dir, CONCEPTS_FILE)
+    remove_embeddings(output_dir)
+    print(f"TF-IDF shards written to: {matrix_dir}/")
+
+
+# ----------------------------------------------------------
+# Memory-lean build
+# ----------------------------------------------------------
+
+HEADING_BYTES = re.compile(rb"^(#{1,6})\s+(.+)$", re.MULTILINE)
+
+
+class SourceText:
+    """
+    Read-only memory map of a markdown file. Section bodies are addressed by
+    (start, end) byte spans into it and decoded only when needed, with the
+    newline translation of reading the file in text mode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b""  # empty files cannot be mapped
+
+    def _decode(self, start: int, end: int) -> str:
+        try:
+            return self._map[start:end].decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise ValueError(f"{self.path} is not valid UTF-8: {e.reason}.") from None
+
+    def text(self, start: int, end: int) -> str:
+        data = self._decode(start, end)
+        return data.replace("\r\n", "\n").replace("\r", "\n")
+
+    def sections(self) -> Iterator[Tuple[str, int, int]]:
+        """
+        (title, body start, body end) per heading, chunked like extract_chunks.
+        Spans exclude the whitespace extract_chunks strips from bodies.
+        Raises ValueError on bytes that are not UTF-8.
+        """
+        # One search per heading rather than a finditer scanner: a suspended
+        # scanner keeps a buffer export on the map, and close() would fail
+        match = HEADING_BYTES.search(self._map)
+        if match is None:
+            raise ValueError("No headings found in document. Cannot chunk.")
+        while match is not None:
+            following = HEADING_BYTES.search(self._map, match.end())
+            start = match.end()
+            raw = self._decode(start, following.start() if following else len(self._map))
+            body = raw.lstrip()
+            start += len(raw[:len(raw) - len(body)].encode("utf-8"))
+            end = start + len(body.rstrip().encode("utf-8"))
+            yield self.text(*match.span(2)).strip(), start, end
+            match = following
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SourceText":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class NodeRecord:
+    """
+    Node metadata of a lean build, kept outside the networkx graph.
+    The body is a byte span of the SourceText; piece is the (start, end)
+    character slice of that section for split sub-nodes.
+    """
+
+    __slots__ = ("title", "start", "end", "piece", "keywords", "keyphrases", "tags")
+
+    def __init__(self, title: str, start: int, end: int, piece: Tuple[int, int] | None = None):
+        self.title = title
+        self.start = start
+        self.end = end
+        self.piece = piece
+        self.keywords: Tuple[str, ...] = ()
+        self.keyphrases: Tuple[str, ...] = ()
+        self.tags: Tuple[str, ...] = ()
+
+    def body(self, source: SourceText) -> str:
+        text = source.text(self.start, self.end)
+        return text if self.piece is None else text[self.piece[0]:self.piece[1]]
+
+    def attributes(self) -> dict:
+        return dict(
+            title=self.title,
+            keywords=list(self.keywords),
+            keyphrases=list(self.keyphrases),
+            tags=list(self.tags),
+        )
+
+
+def lean_node_records(
+    source: SourceText,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+) -> Tuple[List[NodeRecord], List[int | None]]:
+    """NodeRecords and parents for a source, split like split_chunks."""
+    check_chunking(max_chunk_chars, chunk_overlap)
+    records: List[NodeRecord] = []
+    parents: List[int | None] = []
+    for title, start, end in source.sections():
+        # A UTF-8 span has at least as many bytes as characters
+        spans = None
+        if max_chunk_chars and end - start > max_chunk_chars:
+            spans = split_body_spans(source.text(start, end), max_chunk_chars, chunk_overlap)
+        if not spans or len(spans) == 1:
+            records.append(NodeRecord(title, start, end))
+            parents.append(None)
+            continue
+        head = len(records)
+        for k, piece in enumerate(spans):
+            piece_title = title if k == 0 else f"{title} (part {k + 1})"
+            records.append(NodeRecord(piece_title, start, end, piece))
+            parents.append(None if k == 0 else head)
+    return records, parents
+
+
+def build_graph_lean(
+    input_file: str,
+    output_dir: str,
+    min_similarity: float = 0.3,
+    top_keywords: int = 5,
+    top_keyphrases: int = 5,
+    topic_terms_path: str | None = None,
+    analytics: bool = False,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+    compress_bodies: bool = False,
+    concepts: bool = False,
+    search_index: bool = True,
+    embedding_dims: int | None = None,
+    prune: str | None = None,
+) -> None:
+    """
+    Build the same graph as build_graph while keeping a single copy of the
+    corpus: the memory-mapped input file.
+
+    Nodes are NodeRecords (byte spans plus keyword and tag tuples); the
+    networkx graph holds only node ids, edges and the compact parent and
+    analytics attributes. Bodies are decoded one at a time for vectorizing,
+    YAKE and writing the outputs. input_file must be UTF-8 ATX markdown;
+    build_graph converts other markdown first (see markdown_source).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with SourceText(input_file) as source:
+        records, parents = lean_node_records(source, max_chunk_chars, chunk_overlap)
+
+        def bodies() -> Iterator[str]:
+            return (record.body(source) for record in records)
+
+        vectorizer = make_build_vectorizer()
+        X = vectorizer.fit_transform(bodies())
+        feature_names = vectorizer.get_feature_names_out()
+        topic_terms = load_topic_terms(topic_terms_path)
+        topic_vecs = build_topic_vectors(topic_terms, vectorizer) if topic_terms else None
+        embeddings = LsaEmbeddings.fit(vectorizer, X, embedding_dims) if embedding_dims else None
+        scores = topic_score_matrix(X, topic_vecs, embeddings) if topic_vecs else None
+        threshold = EMBEDDING_TOPIC_THRESHOLD if embeddings else TOPIC_THRESHOLD
+        kw_extractor = yake.KeywordExtractor(top=top_keyphrases, stopwords=None)
+
+        for i, (record, body) in enumerate(zip(records, bodies())):
+            record.keywords = tuple(tfidf_keywords_for_row(X[i], feature_names, top_keywords))
+            record.keyphrases = tuple(kw for kw, _ in kw_extractor.extract_keywords(body))
+            record.tags = tuple(topic_tags_for_row(
+                X[i], record.title, topic_terms, topic_vecs, vectorizer,
+                None if scores is None else scores[i], threshold,
+            ))
+
+        G = nx.Graph()
+        G.add_nodes_from(range(len(records)))
+        add_similarity_edges(G, X if embeddings is None else embeddings.vectors, min_similarity)
+        del X
+        link_sub_nodes(G, parents)
+        if prune:
+            prune_edges(G, *parse_prune_spec(prune))
+        if analytics:
+            compute_graph_analytics(G)
+
+        if search_index:
+            write_search_index(output_dir, (
+                (node_id, record.title, body)
+                for node_id, (record, body) in enumerate(zip(records, bodies()))
+            ))
+        else:
+            remove_stale_output(output_dir, INDEX_FILE)
+
+        graph_path = os.path.join(output_dir, "graph.json")
+        attributes = (record.attributes() for record in records)
+        if compress_bodies:
+            store_path = os.path.join(output_dir, BODY_STORE)
+            samples = list(itertools.islice(bodies(), TRAINING_SAMPLES))
+            refs = write_body_store(store_path, bodies(), samples)
+            for node_id, ref in enumerate(refs):
+                G.nodes[node_id]["body_ref"] = ref
+            G.graph["body_store"] = BODY_STORE
+            write_graph_json(G, graph_path, None, attributes)
+        else:
+            nodes_dir = os.path.join(output_dir, "nodes")
+            os.makedirs(nodes_dir, exist_ok=True)
+            write_graph_json(G, graph_path, bodies(), attributes)
+            for node_id, (record, body) in enumerate(zip(records, bodies())):
+                write_node_markdown(nodes_dir, node_id, record.attributes(), body)
+
+    print(f"Graph saved: {graph_path}")
+    print(f"Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+    if compress_bodies:
+        print(f"Compressed bodies written to: {store_path}")
+    else:
+        print(f"Markdown nodes written to: {nodes_dir}/")
+    if scores is not None:
+        print(f"Topic scores written to: {write_topic_scores(output_dir, scores, list(topic_terms))}")
+    else:
+        remove_stale_output(output_dir, TOPIC_SCORES_FILE)
+    if embeddings is not None:
+        print(f"Embeddings ({embeddings.dims} dims) written to: {embeddings.save(output_dir)}")
+    else:
+        remove_embeddings(output_dir)
+    if concepts:
+        write_concept_layer(G, output_dir, concept_layer_from_phrases(
+            (node_id, list(record.keyphrases) + list(record.keywords))
+            for node_id, record in enumerate(records)
+        ))
+    else:
+        remove_stale_output(output_dir, CONCEPTS_FILE)
+
+
+# ----------------------------------------------------------
+# LSA embeddings
+# ----------------------------------------------------------
+
+EMBEDDINGS_FILE = "embeddings.npy"
+EMBEDDING_MODEL_FILE = "embeddings.model.npz"
+EMBEDDING_TOPIC_THRESHOLD = 0.3  # LSA cosines run higher than sparse TF-IDF ones
+
+
+class LsaEmbeddings:
+    """
+    Dense, L2-normalized float32 node vectors from a truncated SVD of the
+    TF-IDF matrix. Cosine similarity is then a plain (BLAS) matrix product.
+
+    save() writes the node matrix as embeddings.npy, which readers can open
+    with np.load(mmap_mode="r"), and the projection (vocabulary, idf, SVD
+    components) as embeddings.model.npz for embedding queries.
+    """
+
+    def __init__(self, vectors: np.ndarray, components: np.ndarray, vocabulary, idf: np.ndarray):
+        self.vectors = vectors
+        self.components = components
+        self.vocabulary = vocabulary
+        self.idf = idf
+
+    @classmethod
+    def fit(cls, vectorizer: TfidfVectorizer, X, dims: int = 128) -> "LsaEmbeddings":
+        """Project the TF-IDF matrix X (from vectorizer) onto its top `dims` singular vectors."""
+        if dims < 1:
+            raise ValueError("Embedding dimensions must be positive.")
+        # TruncatedSVD needs fewer components than features
+        dims = max(1, min(dims, X.shape[1] - 1, X.shape[0]))
+        svd = TruncatedSVD(n_components=dims, random_state=42)
+        vectors = normalize(svd.fit_transform(X)).astype(np.float32)
+        return cls(
+            vectors,
+            svd.components_.astype(np.float32),
+            vectorizer.get_feature_names_out(),
+            vectorizer.idf_.astype(np.float32),
+        )
+
+    @property
+    def dims(self) -> int:
+        return self.components.shape[0]
+
+    def transform(self, X) -> np.ndarray:
+        """Project TF-IDF rows (same vocabulary) into the embedding space."""
+        return normalize(np.asarray(X @ self.components.T, dtype=np.float32))
+
+    def topic_scores(self, topic_vecs: Dict[str, sp.csr_matrix]) -> np.ndarray:
+        """nodes x topics cosine similarities, topics in topic_vecs order."""
+        topics = self.transform(sp.vstack(list(topic_vecs.values())))
+        return self.vectors @ topics.T
+
+    def save(self, output_dir: str) -> str:
+        path = os.path.join(output_dir, EMBEDDINGS_FILE)
+        tmp_path = f"{path}.tmp{os.getpid()}.npy"
+        np.save(tmp_path, self.vectors)
+        os.replace(tmp_path, path)
+        model_path = os.path.join(output_dir, EMBEDDING_MODEL_FILE)
+        tmp_path = f"{model_path}.tmp{os.getpid()}.npz"
+        np.savez(
+            tmp_path,
+            components=self.components,
+            vocabulary=np.asarray(self.vocabulary, dtype=str),
+            idf=self.idf,
+        )
+        os.replace(tmp_path, model_path)
+        return path
+
+
+def remove_embeddings(output_dir: str) -> None:
+    """Delete the embeddings files an earlier build left in output_dir (see remove_stale_output)."""
+    remove_stale_output(output_dir, EMBEDDINGS_FILE)
+    remove_stale_output(output_dir, EMBEDDING_MODEL_FILE)
 
 
 # ----------------------------------------------------------
@@ -280,50 +1674,202 @@ def extract_topic_context(
     graph_path: str,
     output_file: str,
     include_neighbors: bool = True,
+    order_by: str = "id",
+    cache: QueryCache | None = None,
+    query: str | None = None,
+    min_score: float | None = None,
 ) -> None:
     """
     Extract nodes related to a specific topic from the graph.
     If include_neighbors is True, also include connected nodes.
+    order_by is "id", "pagerank" or "score" (see select_topic_nodes).
+    With a query, only topic nodes matching it in the full-text index are
+    kept (before neighbor expansion).
+    With min_score, the topic's nodes are those scoring at least min_score
+    in topic_scores.npz instead of those tagged at build time.
+    With a cache, results are reused until graph.json or a file the query
+    reads (body store, index.bin, topic_scores.npz) changes.
+    output_file "-" streams the context to stdout section by section (see
+    iter_topic_context); status messages then go to stderr.
     """
-    with open(graph_path, "r", encoding="utf-8") as f:
-        graph_data = json.load(f)
+    params = dict(topic=topic, include_neighbors=include_neighbors, order_by=order_by)
+    if query:
+        params["query"] = query
+    if min_score is not None:
+        params["min_score"] = min_score
+    # Files the query reads besides the graph and its body store
+    sidecars = [INDEX_FILE] if query else []
+    if min_score is not None or order_by == "score":
+        sidecars.append(TOPIC_SCORES_FILE)
+    streaming = output_file == "-"
+    log = sys.stderr if streaming else sys.stdout
+    context = cache.get(graph_path, params, sidecars) if cache else None
+    if context is None:
+        parts = iter_topic_context(graph_path, **params)
+    else:
+        parts = [context] if context else []
+    collected = [] if cache and context is None else None
 
-    G = json_graph.node_link_graph(graph_data)
+    f = None
+    try:
+        for part in parts:
+            if f is None:
+                f = sys.stdout if streaming else open(output_file, "w", encoding="utf-8")
+            f.write(part)
+            if streaming:
+                f.flush()
+            if collected is not None:
+                collected.append(part)
+    finally:
+        if f is not None and not streaming:
+            f.close()
+
+    if collected is not None:
+        cache.put(graph_path, params, "".join(collected), sidecars)
+    if f is None:
+        print(f"No nodes found for topic '{topic}'", file=log)
+    elif not streaming:
+        print(f"Topic context for '{topic}' written to: {output_file}")
 
-    # Find nodes matching topic
-    matching_nodes = []
-    for node_id, data in G.nodes(data=True):
-        tags = data.get("tags", [])
-        if any(topic.lower() in tag.lower() for tag in tags):
-            matching_nodes.append(node_id)
 
-    if not matching_nodes:
-        print(f"No nodes found for topic '{topic}'")
+def render_topic_context(
+    graph_path: str,
+    topic: str,
+    include_neighbors: bool = True,
+    order_by: str = "id",
+    query: str | None = None,
+    min_score: float | None = None,
+) -> str:
+    """Topic context markdown for a saved graph; empty if no node matches."""
+    return "".join(
+        iter_topic_context(graph_path, topic, include_neighbors, order_by, query, min_score)
+    )
+
+
+def iter_topic_context(
+    graph_path: str,
+    topic: str,
+    include_neighbors: bool = True,
+    order_by: str = "id",
+    query: str | None = None,
+    min_score: float | None = None,
+) -> Iterator[str]:
+    """
+    Yield the topic context markdown of a saved graph piece by piece: the
+    header, then one section per node in selection order (node id, or rank
+    or score). Compressed bodies are decompressed just
+    before their section is yielded, so consumers can start on the first
+    sections while later ones are still being read. Yields nothing if no
+    node matches.
+    """
+    G = load_graph(graph_path)
+    matches = None
+    if query:
+        with SearchIndex(index_path(graph_path)) as index:
+            matches = {node_id for node_id, _, _ in index.search(query, top_k=None)}
+    scores = None
+    if min_score is not None or order_by == "score":
+        stored = TopicScores(topic_scores_path(graph_path))
+        if stored.shape[0] != G.number_of_nodes():
+            raise ValueError(
+                f"Topic scores cover {stored.shape[0]} nodes but {graph_path} has "
+                f"{G.number_of_nodes()}; rebuild the graph with --topics."
+            )
+        scores = stored.node_scores(topic)
+    selected_nodes = select_topic_nodes(
+        G, topic, include_neighbors, order_by, matches, scores, min_score
+    )
+    if not selected_nodes:
         return
 
+    store_name = G.graph.get("body_store")
+    store = BodyStore(os.path.join(os.path.dirname(graph_path), store_name)) if store_name else None
+    try:
+        yield from topic_context_sections(G, topic, selected_nodes, store)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def select_topic_nodes(
+    G: nx.Graph,
+    topic: str,
+    include_neighbors: bool = True,
+    order_by: str = "id",
+    matches: set | None = None,
+    scores: Dict[int, float] | None = None,
+    min_score: float | None = None,
+) -> List:
+    """
+    Return ids of nodes whose tags contain topic (case-insensitive substring),
+    plus their neighbors if include_neighbors is True.
+    With matches, only tagged nodes in that set seed the selection.
+    scores maps node ids to their topic score, best first (see
+    TopicScores.node_scores); with min_score, nodes scoring at least that
+    seed the selection instead of the tags.
+    Sorted by node id, by descending pagerank with order_by="pagerank"
+    (requires a graph built with analytics), or by descending topic score
+    with order_by="score" (requires scores).
+    """
+    if scores is None and (min_score is not None or order_by == "score"):
+        raise ValueError(
+            "min_score and order_by='score' need stored topic scores; "
+            "use a graph built with --topics (see TopicScores)."
+        )
+
+    # Find nodes matching topic
+    matching_nodes = []
+    if min_score is not None:
+        for node_id, score in scores.items():
+            if score < min_score:
+                break
+            if matches is None or node_id in matches:
+                matching_nodes.append(node_id)
+    else:
+        for node_id, data in G.nodes(data=True):
+            tags = data.get("tags", [])
+            if matches is not None and node_id not in matches:
+                continue
+            if any(topic.lower() in tag.lower() for tag in tags):
+                matching_nodes.append(node_id)
+
     # Optionally include neighbors
     expanded = set(matching_nodes)
     if include_neighbors:
         for node_id in matching_nodes:
             expanded.update(G.neighbors(node_id))
 
+    if order_by == "pagerank":
+        return sorted(expanded, key=lambda n: (-G.nodes[n].get("pagerank", 0.0), n))
+    if order_by == "score":
+        return sorted(expanded, key=lambda n: (-scores.get(n, 0.0), n))
+
     # Sort by node_id for consistent output
-    selected_nodes = sorted(expanded)
+    return sorted(expanded)
 
-    # Write output
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(f"# Topic Context: {topic}\n\n")
-        f.write(f"Extracted {len(selected_nodes)} nodes.\n\n")
-        f.write("---\n\n")
 
-        for node_id in selected_nodes:
-            data = G.nodes[node_id]
-            f.write(f"## [{node_id}] {data['title']}\n\n")
-            f.write(f"**Tags:** {', '.join(data['tags'])}\n\n")
-            f.write(f"**Keywords:** {', '.join(data['keywords'])}\n\n")
-            f.write(f"**Keyphrases:** {', '.join(data['keyphrases'])}\n\n")
-            f.write("---\n\n")
-            f.write(data["body"])
-            f.write("\n\n")
-
-    print(f"Topic context for '{topic}' written to: {output_file}")
+def write_topic_context(f: TextIO, G: nx.Graph, topic: str, node_ids: List) -> None:
+    """Write the topic context markdown for node_ids to a text stream."""
+    f.writelines(topic_context_sections(G, topic, node_ids))
+
+
+def topic_context_sections(
+    G: nx.Graph, topic: str, node_ids: List, store: BodyStore | None = None
+) -> Iterator[str]:
+    """
+    The topic context markdown as a header followed by one string per node.
+    Nodes without an inline body are read from store.
+    """
+    yield f"# Topic Context: {topic}\n\nExtracted {len(node_ids)} nodes.\n\n---\n\n"
+
+    for node_id in node_ids:
+        data = G.nodes[node_id]
+        body = data["body"] if "body" in data else store.get(data["body_ref"])
+        yield (
+            f"## [{node_id}] {data['title']}\n\n"
+            f"**Tags:** {', '.join(data['tags'])}\n\n"
+            f"**Keywords:** {', '.join(data['keywords'])}\n\n"
+            f"**Keyphrases:** {', '.join(data['keyphrases'])}\n\n"
+            "---\n\n"
+            f"{body}\n\n"
+        )
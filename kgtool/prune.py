@@ -0,0 +1,133 @@
+from typing import Tuple
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+# method -> default parameter: k for knn, z for adaptive, alpha for backbone
+PRUNE_METHODS = {"knn": 10, "adaptive": 1.0, "backbone": 0.05}
+
+
+def parse_prune_spec(spec: str) -> Tuple[str, float]:
+    """Parse "method" or "method:parameter" (e.g. "knn:5", "backbone:0.01")."""
+    method, _, value = spec.partition(":")
+    if method not in PRUNE_METHODS:
+        raise ValueError(
+            f"Unknown pruning method '{method}'. Choose from: {', '.join(PRUNE_METHODS)}."
+        )
+    try:
+        param = float(value) if value else float(PRUNE_METHODS[method])
+    except ValueError:
+        raise ValueError(f"Invalid pruning parameter in '{spec}'.") from None
+    if method == "knn" and (param < 1 or param != int(param)):
+        raise ValueError("knn pruning needs a positive integer k.")
+    if method == "backbone" and not 0 < param < 1:
+        raise ValueError("backbone pruning needs 0 < alpha < 1.")
+    return method, param
+
+
+# ----------------------------------------------------------
+# Edge masks
+# ----------------------------------------------------------
+# Each mask takes the node count and the edge list as arrays (u, v, w) and
+# returns a boolean keep-mask over the edges. Per-node statistics come from
+# both endpoints of every edge ("incidences"), gathered with bincount.
+
+def mutual_knn_mask(n: int, u: np.ndarray, v: np.ndarray, w: np.ndarray, k: int) -> np.ndarray:
+    """
+    Keep an edge if it is among the k strongest of both of its endpoints
+    (ties go to the lower neighbor id).
+    """
+    node = np.concatenate([u, v])
+    weight = np.concatenate([w, w])
+    order = np.lexsort((np.concatenate([v, u]), -weight, node))
+    counts = np.bincount(node, minlength=n)
+    starts = np.cumsum(counts) - counts
+    ranks = np.empty(order.size, dtype=np.int64)
+    ranks[order] = np.arange(order.size) - starts[node[order]]
+    return (ranks[:u.size] < k) & (ranks[u.size:] < k)
+
+
+def adaptive_mask(n: int, u: np.ndarray, v: np.ndarray, w: np.ndarray, z: float) -> np.ndarray:
+    """
+    Keep an edge if its weight reaches mean + z * std of the incident edge
+    weights of either endpoint, so each node is judged against its own scale.
+    """
+    node = np.concatenate([u, v])
+    weight = np.concatenate([w, w])
+    degree = np.maximum(np.bincount(node, minlength=n), 1)
+    mean = np.bincount(node, weight, minlength=n) / degree
+    variance = np.bincount(node, weight * weight, minlength=n) / degree - mean * mean
+    threshold = mean + z * np.sqrt(np.maximum(variance, 0)) - 1e-9
+    return (w >= threshold[u]) | (w >= threshold[v])
+
+
+def backbone_mask(n: int, u: np.ndarray, v: np.ndarray, w: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Disparity filter (Serrano, Boguna & Vespignani 2009): keep an edge if its
+    share of either endpoint's strength is significant at level alpha against
+    a uniform split of that strength over the node's edges. Edges of
+    degree-one nodes are kept.
+    """
+    node = np.concatenate([u, v])
+    weight = np.concatenate([w, w])
+    degree = np.bincount(node, minlength=n)
+    strength = np.bincount(node, weight, minlength=n)
+
+    def significance(end: np.ndarray) -> np.ndarray:
+        share = w / np.where(strength[end] > 0, strength[end], 1)
+        return np.where(degree[end] > 1, (1 - share) ** (degree[end] - 1), 0.0)
+
+    return (significance(u) < alpha) | (significance(v) < alpha)
+
+
+def spanning_forest_mask(n: int, u: np.ndarray, v: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Edges of a maximum-weight spanning forest (same components as the input)."""
+    if u.size == 0:
+        return np.zeros(0, dtype=bool)
+    # Costs in (0, 2]: csgraph treats stored zeros as missing edges
+    costs = 2.0 - np.minimum(w, 1.0)
+    tree = minimum_spanning_tree(sp.coo_matrix((costs, (u, v)), shape=(n, n))).tocoo()
+    lo, hi = np.minimum(tree.row, tree.col), np.maximum(tree.row, tree.col)
+    return np.isin(u.astype(np.int64) * n + v, lo.astype(np.int64) * n + hi)
+
+
+MASKS = {"knn": mutual_knn_mask, "adaptive": adaptive_mask, "backbone": backbone_mask}
+
+
+# ----------------------------------------------------------
+# Pruning
+# ----------------------------------------------------------
+
+def prune_edges(
+    G: nx.Graph, method: str, param: float | None = None, keep_connected: bool = True
+) -> int:
+    """
+    Remove weak similarity edges from G in place; returns the number removed.
+
+    method is "knn" (mutual k-nearest neighbours), "adaptive" (per-node
+    mean + z * std thresholds) or "backbone" (disparity filter at level
+    alpha); param is k, z or alpha (see PRUNE_METHODS for defaults). Edges
+    with a relation (e.g. "sequence" links between split pieces) are never
+    removed. With keep_connected, a maximum spanning forest of the
+    similarity edges is kept as well, so no component is split.
+    """
+    if param is None:
+        param = PRUNE_METHODS[method]
+    index = {node: i for i, node in enumerate(G)}
+    edges = [(a, b, data.get("weight", 0.0)) for a, b, data in G.edges(data=True)
+             if not data.get("relation")]
+    if not edges:
+        return 0
+    u = np.fromiter((index[a] for a, _, _ in edges), dtype=np.int64, count=len(edges))
+    v = np.fromiter((index[b] for _, b, _ in edges), dtype=np.int64, count=len(edges))
+    w = np.fromiter((weight for _, _, weight in edges), dtype=np.float64, count=len(edges))
+    u, v = np.minimum(u, v), np.maximum(u, v)
+
+    n = len(index)
+    keep = MASKS[method](n, u, v, w, int(param) if method == "knn" else param)
+    if keep_connected:
+        keep |= spanning_forest_mask(n, u, v, w)
+    G.remove_edges_from((edges[i][0], edges[i][1]) for i in np.flatnonzero(~keep))
+    return int((~keep).sum())
@@ -0,0 +1,421 @@
+import codecs
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, TextIO
+
+try:
+    import charset_normalizer
+except ImportError:  # optional: better guesses for legacy encodings
+    charset_normalizer = None
+
+SNIFF_BYTES = 8192
+DECODE_BLOCK_BYTES = 1 << 20
+GENERATED_MARKERS = (
+    b"@generated",
+    b"code generated",
+    b"do not edit this file",
+    b"auto-generated",
+    b"autogenerated",
+    b"this file was generated",
+    b"this file is generated",
+)
+GENERATED_LINES = 5  # markers only count near the top of a file
+MINIFIED_LINE_BYTES = 4096  # no newline within this many bytes: minified or data
+BINARY_RATIO = 0.1  # share of control bytes above which a file is binary
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+TEXT_CONTROLS = frozenset(b"\t\n\r\f\b\x1b")
+
+
+# ----------------------------------------------------------
+# Sniffing and decoding
+# ----------------------------------------------------------
+
+def sniff_bytes(head: bytes) -> str | None:
+    """
+    Why a file starting with head should be skipped ("binary" or
+    "generated"), or None if it looks like hand-written text.
+    """
+    if any(head.startswith(bom) for bom, _ in BOMS):
+        return None
+    if b"\0" in head:
+        return "binary"
+    controls = sum(1 for b in head if b < 32 and b not in TEXT_CONTROLS)
+    if head and controls / len(head) > BINARY_RATIO:
+        return "binary"
+    top = b"\n".join(head.split(b"\n", GENERATED_LINES)[:GENERATED_LINES]).lower()
+    if any(marker in top for marker in GENERATED_MARKERS):
+        return "generated"
+    if len(head) > MINIFIED_LINE_BYTES and b"\n" not in head[:MINIFIED_LINE_BYTES]:
+        return "generated"
+    return None
+
+
+def decode_bytes(data: bytes) -> str:
+    """
+    Decode file contents: a BOM wins, then strict UTF-8, then
+    charset_normalizer's best guess when installed, then cp1252 (latin-1 for
+    bytes cp1252 leaves undefined). Newlines are normalized to "\\n".
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            text = data.decode(encoding)
+            break
+    else:
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            best = charset_normalizer.from_bytes(data).best() if charset_normalizer else None
+            if best is not None:
+                text = str(best)
+            else:
+                try:
+                    text = data.decode("cp1252")
+                except UnicodeDecodeError:
+                    text = data.decode("latin-1")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _decodes(f: BinaryIO, encoding: str) -> bool:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for block in iter(lambda: f.read(DECODE_BLOCK_BYTES), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def source_encoding(path: str) -> str:
+    """
+    The encoding decode_bytes picks for the file at path, found by streaming
+    it in blocks rather than reading it whole (charset_normalizer, when
+    installed and needed, still sees the whole file).
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+        for bom, encoding in BOMS:
+            if head.startswith(bom):
+                return encoding
+        f.seek(0)
+        if _decodes(f, "utf-8"):
+            return "utf-8"
+    best = charset_normalizer.from_path(path).best() if charset_normalizer else None
+    if best is not None:
+        return best.encoding
+    with open(path, "rb") as f:
+        return "cp1252" if _decodes(f, "cp1252") else "latin-1"
+
+
+# ----------------------------------------------------------
+# Markdown
+# ----------------------------------------------------------
+
+FRONT_MATTER_OPEN = re.compile(r"(?:---|\+\+\+)[ \t]*")
+FRONT_MATTER_CLOSE = re.compile(r"(?:---|\.\.\.|\+\+\+)[ \t]*")
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+BLOCK_START = re.compile(r"^ {0,3}(?:#|>|[-*+][ \t]|\d+[.)][ \t]|<|\|)")
+
+
+def _skip_front_matter(lines: Iterator[str]) -> Iterator[str]:
+    """
+    Drop a leading YAML (---) or TOML (+++) front-matter block from a line
+    stream; only an unclosed block is buffered.
+    """
+    first = next(lines, None)
+    if first is None:
+        return
+    if FRONT_MATTER_OPEN.fullmatch(first):
+        block = [first]
+        for line in lines:
+            if len(block) > 1 and FRONT_MATTER_CLOSE.fullmatch(line):
+                break
+            block.append(line)
+        else:
+            yield from block
+    else:
+        yield first
+    yield from lines
+
+
+def iter_normalized_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    normalize_markdown over lines (without their newlines), holding only the
+    current paragraph: output lines are input lines, minus front matter and
+    setext underlines, with setext titles rewritten.
+    """
+    paragraph: List[str] = []  # pending lines that may still become a setext title
+    fence = None
+    for line in _skip_front_matter(iter(lines)):
+        if fence:
+            yield line
+            if line.strip().startswith(fence):
+                fence = None
+            continue
+        match = FENCE.match(line)
+        if match:
+            fence = match.group(1)[0] * 3
+            yield from paragraph
+            yield line
+            paragraph = []
+            continue
+        underline = SETEXT_UNDERLINE.match(line)
+        if underline and paragraph:
+            title = " ".join(part.strip() for part in paragraph)
+            yield ("# " if underline.group(1)[0] == "=" else "## ") + title
+            paragraph = []
+            continue
+        if not line.strip() or BLOCK_START.match(line) or line.startswith(("    ", "\t")):
+            yield from paragraph
+            yield line
+            paragraph = []
+        else:
+            paragraph.append(line)
+    yield from paragraph
+
+
+def normalize_markdown(text: str) -> str:
+    """
+    Strip front matter and rewrite setext headings ("Title" underlined with
+    === or ---) as ATX headings. Fenced code blocks are left alone.
+    """
+    return "\n".join(iter_normalized_lines(text.split("\n")))
+
+
+# ----------------------------------------------------------
+# HTML
+# ----------------------------------------------------------
+
+class _HtmlToMarkdown(HTMLParser):
+    BLOCKS = {
+        "p", "div", "section", "article", "header", "footer", "li", "ul", "ol",
+        "table", "tr", "blockquote", "dd", "dt", "br", "hr",
+    }
+    SKIP = {"script", "style", "head", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip = 0
+        self.pre = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif re.fullmatch(r"h[1-6]", tag):
+            self.parts.append("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag == "pre":
+            self.pre += 1
+            self.parts.append("\n\n```\n")
+        elif tag in self.BLOCKS:
+            self.parts.append("\n\n" if tag != "br" else "\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(self.skip - 1, 0)
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCKS:
+            self.parts.append("\n\n")
+        elif tag == "pre":
+            self.pre = max(self.pre - 1, 0)
+            self.parts.append("\n```\n\n")
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        self.parts.append(data if self.pre else re.sub(r"\s+", " ", data))
+
+
+def html_to_markdown(text: str) -> str:
+    """Headings h1-h6 become ATX headings; blocks become paragraphs; scripts and styles are dropped."""
+    parser = _HtmlToMarkdown()
+    parser.feed(text)
+    parser.close()
+    markdown = "".join(parser.parts)
+    markdown = re.sub(r"[ \t]*\n[ \t]*", "\n", markdown)
+    # Heading text must stay on its heading line
+    markdown = re.sub(r"^(#{1,6} )\n+", r"\1", markdown, flags=re.MULTILINE)
+    return re.sub(r"\n{3,}", "\n\n", markdown).strip() + "\n"
+
+
+# ----------------------------------------------------------
+# reStructuredText
+# ----------------------------------------------------------
+
+RST_ADORNMENT = re.compile(r"^([!-/:-@\[-`{-~])\1+[ \t]*$")
+
+
+def rst_to_markdown(text: str) -> str:
+    """
+    Rewrite reST section titles (underlined, optionally overlined) as ATX
+    headings. Levels follow the order in which adornment styles first
+    appear, as in docutils; bodies are kept verbatim.
+    """
+    lines = text.split("\n")
+    styles: List[tuple] = []
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        over = RST_ADORNMENT.match(line)
+        # Overline + title + underline
+        if (over and i + 2 < len(lines) and lines[i + 1].strip()
+                and lines[i + 2].rstrip() == line.rstrip()
+                and len(line.rstrip()) >= len(lines[i + 1].strip())):
+            title, style, i = lines[i + 1].strip(), (over.group(1), True), i + 3
+        else:
+            under = RST_ADORNMENT.match(lines[i + 1]) if i + 1 < len(lines) else None
+            if (under and line.strip() and not RST_ADORNMENT.match(line)
+                    and not line.startswith((" ", "\t"))
+                    and len(lines[i + 1].rstrip()) >= len(line.rstrip())):
+                title, style, i = line.strip(), (under.group(1), False), i + 2
+            else:
+                out.append(line)
+                i += 1
+                continue
+        if style not in styles:
+            styles.append(style)
+        out.append("#" * min(styles.index(style) + 1, 6) + " " + title)
+    return "\n".join(out)
+
+
+# ----------------------------------------------------------
+# Reader registry
+# ----------------------------------------------------------
+
+# format -> converter from decoded text to ATX markdown
+READERS: Dict[str, Callable[[str], str]] = {
+    "markdown": normalize_markdown,
+    "html": html_to_markdown,
+    "rst": rst_to_markdown,
+}
+EXTENSIONS: Dict[str, str] = {
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".mdown": "markdown",
+    ".txt": "markdown",
+    ".html": "html",
+    ".htm": "html",
+    ".xhtml": "html",
+    ".rst": "rst",
+    ".rest": "rst",
+}
+
+
+def register_reader(fmt: str, convert: Callable[[str], str], extensions=()) -> None:
+    """Add or replace the converter for fmt and map file extensions to it."""
+    READERS[fmt] = convert
+    for extension in extensions:
+        EXTENSIONS[extension.lower()] = fmt
+
+
+def is_source_file(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in EXTENSIONS
+
+
+def detect_format(path: str, text: str) -> str:
+    """Format by extension; unknown extensions are sniffed for HTML, else markdown."""
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt:
+        return fmt
+    if re.match(r"\s*<(?:!doctype html|html)\b", text[:1024], re.IGNORECASE):
+        return "html"
+    return "markdown"
+
+
+def check_markdown_source(path: str) -> None:
+    """
+    Raise ValueError if the file at path would be skipped, or is a format
+    that cannot be converted to markdown without reading it whole.
+    """
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    reason = sniff_bytes(head)
+    if reason:
+        raise ValueError(f"{path} looks {reason}; skipped.")
+    fmt = detect_format(path, head.decode("utf-8", errors="replace"))
+    if fmt != "markdown":
+        raise ValueError(
+            f"{path} is {fmt}; lean and out-of-core builds read markdown only. "
+            "Use the default build to convert it."
+        )
+
+
+def _lines(f: TextIO) -> Iterator[str]:
+    """Lines of f without their newlines, as str.split("\\n") would give them."""
+    line = ""
+    for line in f:
+        yield line.rstrip("\r\n")
+    if not line or line[-1] in "\r\n":
+        yield ""
+
+
+def _needs_normalizing(path: str) -> bool:
+    """True if the UTF-8 file at path has lone CR newlines, front matter or setext headings."""
+    count = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        def raw_lines() -> Iterator[str]:
+            nonlocal count
+            for line in _lines(f):
+                count += 1
+                yield line
+        kept = sum(1 for _ in iter_normalized_lines(raw_lines()))
+        f.seek(0)
+        lone_cr = any(line.endswith("\r") for line in f)
+    # Normalizing only ever drops lines (front matter, setext underlines)
+    return kept != count or lone_cr
+
+
+@contextmanager
+def markdown_source(path: str, spill_dir: str | None = None) -> Iterator[str]:
+    """
+    For builds that stream the file in place (lean, out-of-core): the path
+    of a UTF-8 file with the markdown read_source would return. That is path
+    itself when it needs no decoding or normalizing; otherwise the file is
+    converted line by line into a temporary copy in spill_dir, removed on
+    exit. Raises ValueError as check_markdown_source does.
+    """
+    check_markdown_source(path)
+    with open(path, "rb") as f:
+        convert = any(f.read(4).startswith(bom) for bom, _ in BOMS)
+    if not convert:
+        try:
+            convert = _needs_normalizing(path)
+        except UnicodeDecodeError:
+            convert = True
+    if not convert:
+        yield path
+        return
+    fd, spill_path = tempfile.mkstemp(prefix=".kgtool_source_", suffix=".md", dir=spill_dir)
+    try:
+        with open(fd, "w", encoding="utf-8", newline="\n") as out, \
+                open(path, encoding=source_encoding(path)) as f:
+            for i, line in enumerate(iter_normalized_lines(_lines(f))):
+                out.write(line if i == 0 else "\n" + line)
+        yield spill_path
+    finally:
+        os.remove(spill_path)
+
+
+def read_source(path: str) -> str:
+    """
+    Read any supported document as ATX-heading markdown, ready for
+    extract_chunks. Only the first SNIFF_BYTES are read before binary and
+    generated files are rejected with ValueError.
+    """
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        reason = sniff_bytes(head)
+        if reason:
+            raise ValueError(f"{path} looks {reason}; skipped.")
+        text = decode_bytes(head + f.read())
+    return READERS[detect_format(path, text)](text)
@@ -0,0 +1,362 @@
+import heapq
+import itertools
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+INDEX_FILE = "index.bin"
+MAGIC = b"KGIX1"
+# magic, reserved, docs, terms, avgdl, then offsets of the doc, title, term, text and postings sections
+HEADER = struct.Struct("<5sBxxIIdQQQQQ")
+TERM_ENTRY = np.dtype([
+    ("text_offset", "<u8"),
+    ("text_length", "<u4"),
+    ("df", "<u4"),
+    ("postings_offset", "<u8"),
+    ("postings_length", "<u4"),
+    ("positions_length", "<u4"),
+])
+TOKEN = re.compile(r"(?u)\b\w\w+\b")  # TfidfVectorizer's default token pattern
+QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+BM25_K1 = 1.2
+BM25_B = 0.75
+SPILL_POSTINGS = 1 << 24  # buffered postings values (4 bytes each) before a run is spilled
+RUN_RECORD = struct.Struct("<III")  # term length, doc/tf values, positions
+
+
+# ----------------------------------------------------------
+# Varint coding
+# ----------------------------------------------------------
+
+def encode_varints(values) -> bytes:
+    """LEB128-encode non-negative integers: 7 bits per byte, high bit = more follows."""
+    v = np.asarray(values, dtype=np.uint64)
+    if v.size == 0:
+        return b""
+    n_bytes = np.ones(v.size, dtype=np.int64)
+    for k in range(1, 10):
+        n_bytes += v >= np.uint64(1 << (7 * k))
+    owner = np.repeat(np.arange(v.size), n_bytes)
+    starts = np.cumsum(n_bytes) - n_bytes
+    shift = (7 * (np.arange(owner.size) - starts[owner])).astype(np.uint64)
+    out = ((v[owner] >> shift) & np.uint64(0x7F)).astype(np.uint8)
+    out[np.arange(owner.size) != (starts + n_bytes - 1)[owner]] |= 0x80
+    return out.tobytes()
+
+
+def decode_varints(data) -> np.ndarray:
+    """Inverse of encode_varints; data is any bytes-like object."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shift = 7 * (np.arange(raw.size) - np.repeat(starts, ends - starts + 1))
+    return np.add.reduceat((raw & 0x7F).astype(np.int64) << shift, starts)
+
+
+# ----------------------------------------------------------
+# Index build
+# ----------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def _sorted_postings(postings: Dict[str, Tuple[array, array]]) -> Iterator[Tuple[bytes, array, array]]:
+    for term in sorted(postings, key=lambda t: t.encode("utf-8")):
+        doc_tf, term_positions = postings.pop(term)
+        yield term.encode("utf-8"), doc_tf, term_positions
+
+
+def _write_run(path: str, postings: Dict[str, Tuple[array, array]]) -> None:
+    """Spill postings to a run file: per term, in term order, its text and both arrays."""
+    with open(path, "wb") as f:
+        for term, doc_tf, term_positions in _sorted_postings(postings):
+            f.write(RUN_RECORD.pack(len(term), len(doc_tf), len(term_positions)))
+            f.write(term)
+            doc_tf.tofile(f)
+            term_positions.tofile(f)
+
+
+def _read_run(path: str) -> Iterator[Tuple[bytes, array, array]]:
+    with open(path, "rb") as f:
+        while header := f.read(RUN_RECORD.size):
+            term_length, n_doc_tf, n_positions = RUN_RECORD.unpack(header)
+            term = f.read(term_length)
+            doc_tf, term_positions = array("I"), array("I")
+            doc_tf.fromfile(f, n_doc_tf)
+            term_positions.fromfile(f, n_positions)
+            yield term, doc_tf, term_positions
+
+
+def build_search_index(
+    path: str, docs: Iterable[Tuple[int, str, str]], spill_postings: int = SPILL_POSTINGS
+) -> int:
+    """
+    Write a positional inverted index over (node id, title, body) triples to
+    path. Title and body are indexed together; titles are kept for display.
+
+    Postings are stored per term as two varint blocks: doc-number deltas
+    interleaved with term frequencies, then the in-document position deltas.
+    Scoring reads only the first block; positions are decoded for phrase
+    queries. Terms are sorted, so lookups binary-search the memory-mapped
+    term table. Returns the number of indexed documents.
+
+    Once more than spill_postings values are buffered, they are written to a
+    sorted run file next to path; the runs are k-way merged term by term at
+    the end, so memory holds one run's buffer plus one term's postings.
+    """
+    doc_ids = array("q")
+    doc_lengths = array("I")
+    title_ends = array("q")
+    titles = bytearray()
+    postings: Dict[str, Tuple[array, array]] = {}
+    buffered = 0
+    run_paths: List[str] = []
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    blocks_path = f"{tmp_path}.postings"
+
+    try:
+        for doc, (node_id, title, body) in enumerate(docs):
+            positions: Dict[str, List[int]] = {}
+            tokens = tokenize(f"{title}\n{body}")
+            titles += title.encode("utf-8")
+            title_ends.append(len(titles))
+            for pos, token in enumerate(tokens):
+                positions.setdefault(token, []).append(pos)
+            doc_ids.append(node_id)
+            doc_lengths.append(len(tokens))
+            for term, term_positions in positions.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("I"))
+                entry[0].extend((doc, len(term_positions)))
+                entry[1].extend(term_positions)
+            buffered += 2 * len(positions) + len(tokens)
+            if buffered > spill_postings:
+                run_paths.append(f"{tmp_path}.run{len(run_paths)}")
+                _write_run(run_paths[-1], postings)
+                buffered = 0
+
+        n_docs = len(doc_ids)
+        avgdl = (sum(doc_lengths) / n_docs) if n_docs else 0.0
+        # Runs hold increasing doc ranges: merged in run order, postings stay sorted
+        runs = [_read_run(run_path) for run_path in run_paths] + [_sorted_postings(postings)]
+        entries = []
+        texts = bytearray()
+        blocks_length = 0
+        with open(blocks_path, "wb") as blocks:
+            merged = heapq.merge(*runs, key=lambda record: record[0])
+            for term, group in itertools.groupby(merged, key=lambda record: record[0]):
+                doc_tf, term_positions = array("I"), array("I")
+                for _, run_doc_tf, run_positions in group:
+                    doc_tf.extend(run_doc_tf)
+                    term_positions.extend(run_positions)
+                pairs = np.frombuffer(doc_tf, dtype=np.uint32).astype(np.int64).reshape(-1, 2)
+                pairs[1:, 0] = np.diff(pairs[:, 0])
+                pos = np.frombuffer(term_positions, dtype=np.uint32).astype(np.int64)
+                deltas = np.diff(pos, prepend=0)
+                doc_starts = np.cumsum(pairs[:, 1]) - pairs[:, 1]
+                deltas[doc_starts] = pos[doc_starts]
+                doc_block = encode_varints(pairs.ravel())
+                pos_block = encode_varints(deltas)
+
+                entries.append(
+                    (len(texts), len(term), len(pairs), blocks_length, len(doc_block), len(pos_block))
+                )
+                texts += term
+                blocks.write(doc_block)
+                blocks.write(pos_block)
+                blocks_length += len(doc_block) + len(pos_block)
+        table = np.array(entries, dtype=TERM_ENTRY)
+
+        docs_offset = HEADER.size
+        docs_offset += -docs_offset % 8
+        titles_offset = docs_offset + n_docs * 20
+        table_offset = titles_offset + len(titles)
+        table_offset += -table_offset % 8
+        text_offset = table_offset + table.nbytes
+        postings_offset = text_offset + len(texts)
+
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, 0, n_docs, len(table), avgdl,
+                docs_offset, titles_offset, table_offset, text_offset, postings_offset,
+            ))
+            f.write(b"\0" * (docs_offset - HEADER.size))
+            f.write(np.asarray(doc_ids, dtype="<i8").tobytes())
+            f.write(np.asarray(title_ends, dtype="<i8").tobytes())
+            f.write(np.asarray(doc_lengths, dtype="<u4").tobytes())
+            f.write(titles)
+            f.write(b"\0" * (table_offset - titles_offset - len(titles)))
+            f.write(table.tobytes())
+            f.write(texts)
+            with open(blocks_path, "rb") as blocks:
+                shutil.copyfileobj(blocks, f)
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in run_paths + [blocks_path, tmp_path]:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return n_docs
+
+
+# ----------------------------------------------------------
+# Query
+# ----------------------------------------------------------
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Split a query into scoring terms and "quoted phrases" (token lists)."""
+    terms, phrases = [], []
+    for match in QUERY_PART.finditer(query):
+        phrase, word = match.groups()
+        tokens = tokenize(phrase if phrase is not None else word)
+        terms.extend(tokens)
+        if phrase is not None and len(tokens) > 1:
+            phrases.append(tokens)
+    return terms, phrases
+
+
+class SearchIndex:
+    """
+    Read-only, memory-mapped view of an index written by build_search_index.
+    Only the postings of the queried terms are decoded.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise ValueError(
+                f"No search index at {path}; the graph was built with --no-search-index. "
+                "Rebuild it without that flag to search."
+            )
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, _, self.n_docs, self.n_terms, self.avgdl,
+         docs_offset, self._titles_offset, table_offset,
+         self._text_offset, self._postings_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a kgtool search index: {path}")
+        self.doc_ids = np.frombuffer(self._map, dtype="<i8", count=self.n_docs, offset=docs_offset)
+        self._title_ends = np.frombuffer(
+            self._map, dtype="<i8", count=self.n_docs, offset=docs_offset + 8 * self.n_docs
+        )
+        self.doc_lengths = np.frombuffer(
+            self._map, dtype="<u4", count=self.n_docs, offset=docs_offset + 16 * self.n_docs
+        )
+        self._table = np.frombuffer(self._map, dtype=TERM_ENTRY, count=self.n_terms, offset=table_offset)
+
+    def title(self, doc: int) -> str:
+        start = self._titles_offset + (int(self._title_ends[doc - 1]) if doc else 0)
+        return self._map[start:self._titles_offset + int(self._title_ends[doc])].decode("utf-8")
+
+    def _term_text(self, i: int) -> bytes:
+        start = self._text_offset + int(self._table["text_offset"][i])
+        return self._map[start:start + int(self._table["text_length"][i])]
+
+    def _lookup(self, term: str) -> int | None:
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_text(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._term_text(lo) == key:
+            return lo
+        return None
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc numbers, term frequencies) of a term; empty if unknown."""
+        i = self._lookup(term)
+        if i is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        entry = self._table[i]
+        start = self._postings_offset + int(entry["postings_offset"])
+        pairs = decode_varints(self._map[start:start + int(entry["postings_length"])]).reshape(-1, 2)
+        return np.cumsum(pairs[:, 0]), pairs[:, 1]
+
+    def positions(self, term: str) -> Dict[int, np.ndarray]:
+        """doc number -> token positions of a term."""
+        i = self._lookup(term)
+        if i is None:
+            return {}
+        docs, tfs = self.postings(term)
+        entry = self._table[i]
+        start = self._postings_offset + int(entry["postings_offset"]) + int(entry["postings_length"])
+        deltas = decode_varints(self._map[start:start + int(entry["positions_length"])])
+        bounds = np.cumsum(tfs)
+        return {
+            int(doc): np.cumsum(deltas[end - tf:end])
+            for doc, tf, end in zip(docs, tfs, bounds)
+        }
+
+    def _phrase_docs(self, tokens: List[str]) -> set:
+        per_term = [self.positions(t) for t in tokens]
+        docs = set(per_term[0])
+        for positions in per_term[1:]:
+            docs &= positions.keys()
+        matched = set()
+        for doc in docs:
+            starts = set(per_term[0][doc].tolist())
+            for k, positions in enumerate(per_term[1:], 1):
+                starts &= {int(p) - k for p in positions[doc]}
+            if starts:
+                matched.add(doc)
+        return matched
+
+    def search(self, query: str, top_k: int | None = 10) -> List[Tuple[int, str, float]]:
+        """
+        BM25-ranked (node id, title, score) triples for a query. Bare words are OR-ed;
+        "quoted phrases" must occur verbatim. top_k=None returns every match.
+        """
+        terms, phrases = parse_query(query)
+        if not terms or self.n_docs == 0:
+            return []
+
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        matched = np.zeros(self.n_docs, dtype=bool)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / (self.avgdl or 1.0))
+        for term in dict.fromkeys(terms):
+            docs, tfs = self.postings(term)
+            if docs.size == 0:
+                continue
+            idf = math.log(1 + (self.n_docs - docs.size + 0.5) / (docs.size + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+            matched[docs] = True
+
+        for tokens in phrases:
+            allowed = np.zeros(self.n_docs, dtype=bool)
+            allowed[list(self._phrase_docs(tokens))] = True
+            matched &= allowed
+
+        hits = np.flatnonzero(matched)
+        order = hits[np.lexsort((self.doc_ids[hits], -scores[hits]))]
+        if top_k is not None:
+            order = order[:top_k]
+        return [(int(self.doc_ids[d]), self.title(d), float(scores[d])) for d in order]
+
+    def close(self) -> None:
+        # Drop numpy views first: mmap refuses to close while buffers are exported
+        self.doc_ids = self.doc_lengths = self._title_ends = self._table = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def index_path(graph_path: str) -> str:
+    return os.path.join(os.path.dirname(graph_path), INDEX_FILE)
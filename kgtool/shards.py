@@ -0,0 +1,275 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from .concepts import CONCEPTS_FILE
+from .pipeline import (
+    HASH_FEATURES,
+    TOPIC_SCORES_FILE,
+    add_blockwise_similarity_edges,
+    apply_idf,
+    build_hashed_topic_vectors,
+    check_chunking,
+    compute_graph_analytics,
+    extract_chunks,
+    extract_keyphrases,
+    hashed_node_terms,
+    idf_from_document_frequency,
+    link_sub_nodes,
+    load_topic_terms,
+    make_hashing_vectorizer,
+    remove_embeddings,
+    remove_stale_output,
+    save_graph,
+    split_chunks,
+    topic_score_matrix,
+    write_concept_layer,
+    write_json_atomic,
+    write_topic_scores,
+)
+from .prune import parse_prune_spec, prune_edges
+from .readers import is_source_file, read_source
+
+SHARD_META = "partial.json"
+SHARD_COUNTS = "counts.npz"
+
+
+# ----------------------------------------------------------
+# Input partitioning
+# ----------------------------------------------------------
+
+def collect_input_files(inputs: List[str]) -> List[str]:
+    """
+    Expand directories to their readable source files (markdown, HTML, reST;
+    see kgtool.readers); returns a sorted, de-duplicated list.
+    """
+    files = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.update(os.path.join(root, n) for n in names if is_source_file(n))
+        else:
+            files.add(path)
+    return sorted(files)
+
+
+def partition_files(files: List[str], num_shards: int) -> List[List[str]]:
+    """
+    Split files into at most num_shards contiguous groups of similar total size.
+    Contiguous groups keep the merged node order equal to the file order,
+    so the merged graph does not depend on the shard count.
+    """
+    sizes = [os.path.getsize(path) for path in files]
+    target = sum(sizes) / max(num_shards, 1)
+    groups: List[List[str]] = [[]]
+    filled = 0
+    for path, size in zip(files, sizes):
+        if groups[-1] and filled >= target * len(groups) and len(groups) < num_shards:
+            groups.append([])
+        groups[-1].append(path)
+        filled += size
+    return [group for group in groups if group]
+
+
+# ----------------------------------------------------------
+# Shard build
+# ----------------------------------------------------------
+
+def build_shard(
+    files: List[str],
+    shard_dir: str,
+    top_keyphrases: int = 5,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+) -> str:
+    """
+    Chunk files, hash-vectorize them into raw term counts (shared hashed
+    vocabulary, so no cross-shard coordination is needed) and extract YAKE
+    keyphrases. Writes counts.npz and partial.json into shard_dir.
+    Binary, generated and heading-less files are skipped.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+
+    nodes = []
+    for path in files:
+        try:
+            chunks = extract_chunks(read_source(path))
+        except ValueError as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        if max_chunk_chars:
+            pieces = split_chunks(chunks, max_chunk_chars, chunk_overlap)
+        else:
+            pieces = ((title, body, None) for title, body in chunks)
+        first = len(nodes)
+        for title, body, parent in pieces:
+            nodes.append({
+                "title": title,
+                "body": body,
+                "source": path,
+                "parent": None if parent is None else first + parent,
+            })
+
+    bodies = [node["body"] for node in nodes]
+    counts = make_hashing_vectorizer().transform(bodies).tocsr()
+    sp.save_npz(os.path.join(shard_dir, SHARD_COUNTS), counts)
+    for node, keyphrases in zip(nodes, extract_keyphrases(bodies, top_keyphrases)):
+        node["keyphrases"] = keyphrases
+
+    write_json_atomic(os.path.join(shard_dir, SHARD_META), {"files": files, "nodes": nodes})
+    return shard_dir
+
+
+# ----------------------------------------------------------
+# Merge
+# ----------------------------------------------------------
+
+def merge_shards(
+    shard_dirs: List[str],
+    output_dir: str,
+    min_similarity: float = 0.3,
+    top_keywords: int = 5,
+    topic_terms_path: str | None = None,
+    analytics: bool = False,
+    compress_bodies: bool = False,
+    concepts: bool = False,
+    search_index: bool = True,
+    prune: str | None = None,
+) -> None:
+    """
+    Merge shard artifacts into one graph. Node ids are assigned by
+    concatenating shards in the given order. IDF is computed from the summed
+    shard document frequencies, then keywords, tags and the cross-shard
+    similarity join run on the re-weighted shards.
+    """
+    if prune:
+        parse_prune_spec(prune)
+    metas = []
+    df = np.zeros(HASH_FEATURES, dtype=np.int64)
+    for shard_dir in shard_dirs:
+        with open(os.path.join(shard_dir, SHARD_META), "r", encoding="utf-8") as f:
+            metas.append(json.load(f))
+        counts = sp.load_npz(os.path.join(shard_dir, SHARD_COUNTS))
+        df += np.bincount(counts.indices, minlength=HASH_FEATURES)
+    n_docs = sum(len(meta["nodes"]) for meta in metas)
+    if n_docs == 0:
+        raise ValueError("No headings found in document. Cannot chunk.")
+    idf = idf_from_document_frequency(df, n_docs)
+    del df
+
+    matrix_dir = os.path.join(output_dir, "matrix")
+    os.makedirs(matrix_dir, exist_ok=True)
+
+    vectorizer = make_hashing_vectorizer()
+    topic_terms = load_topic_terms(topic_terms_path)
+    topic_vecs = build_hashed_topic_vectors(topic_terms, vectorizer, idf) if topic_terms else None
+
+    G = nx.Graph()
+    parents = []
+    shard_paths = []
+    score_blocks = []
+    for k, (shard_dir, meta) in enumerate(zip(shard_dirs, metas)):
+        offset = G.number_of_nodes()
+        X = apply_idf(sp.load_npz(os.path.join(shard_dir, SHARD_COUNTS)), idf)
+        shard_path = os.path.join(matrix_dir, f"shard_{k:05d}.npz")
+        sp.save_npz(shard_path, X)
+        shard_paths.append(shard_path)
+        scores = topic_score_matrix(X, topic_vecs) if topic_vecs else None
+        if scores is not None:
+            score_blocks.append(sp.csr_matrix(scores, dtype=np.float32))
+
+        for row, node in enumerate(meta["nodes"]):
+            keywords, tags = hashed_node_terms(
+                X[row], node["title"], node["body"], vectorizer,
+                top_keywords, topic_terms, topic_vecs,
+                None if scores is None else scores[row],
+            )
+            G.add_node(
+                offset + row,
+                title=node["title"],
+                body=node["body"],
+                keywords=keywords,
+                keyphrases=node["keyphrases"],
+                tags=tags,
+                source=node["source"],
+            )
+            parents.append(None if node["parent"] is None else offset + node["parent"])
+
+    add_blockwise_similarity_edges(G, shard_paths, min_similarity)
+    link_sub_nodes(G, parents)
+    if prune:
+        prune_edges(G, *parse_prune_spec(prune))
+
+    if analytics:
+        compute_graph_analytics(G)
+    save_graph(G, output_dir, compress_bodies=compress_bodies, search_index=search_index)
+    if score_blocks:
+        scores_path = write_topic_scores(output_dir, sp.vstack(score_blocks), list(topic_terms))
+        print(f"Topic scores written to: {scores_path}")
+    else:
+        remove_stale_output(output_dir, TOPIC_SCORES_FILE)
+    if concepts:
+        write_concept_layer(G, output_dir)
+    else:
+        remove_stale_output(output_dir, CONCEPTS_FILE)
+    remove_embeddings(output_dir)
+
+
+def build_graph_sharded(
+    inputs: List[str],
+    output_dir: str,
+    shards: int = 1,
+    min_similarity: float = 0.3,
+    top_keywords: int = 5,
+    top_keyphrases: int = 5,
+    topic_terms_path: str | None = None,
+    analytics: bool = False,
+    max_chunk_chars: int | None = None,
+    chunk_overlap: int = 0,
+    compress_bodies: bool = False,
+    concepts: bool = False,
+    search_index: bool = True,
+    prune: str | None = None,
+) -> None:
+    """
+    Build a graph from many files on `shards` worker processes.
+    Shard artifacts go to output_dir/shards/shard_*/ and are then merged.
+    The result is the same for any shard count.
+    """
+    if prune:
+        parse_prune_spec(prune)
+    check_chunking(max_chunk_chars, chunk_overlap)
+    files = collect_input_files(inputs)
+    groups = partition_files(files, shards)
+    shard_dirs = [
+        os.path.join(output_dir, "shards", f"shard_{k:05d}") for k in range(len(groups))
+    ]
+
+    with ProcessPoolExecutor(max_workers=max(len(groups), 1)) as executor:
+        list(executor.map(
+            build_shard,
+            groups,
+            shard_dirs,
+            repeat(top_keyphrases),
+            repeat(max_chunk_chars),
+            repeat(chunk_overlap),
+        ))
+
+    merge_shards(
+        shard_dirs,
+        output_dir,
+        min_similarity=min_similarity,
+        top_keywords=top_keywords,
+        topic_terms_path=topic_terms_path,
+        analytics=analytics,
+        compress_bodies=compress_bodies,
+        concepts=concepts,
+        search_index=search_index,
+        prune=prune,
+    )
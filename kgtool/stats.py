@@ -0,0 +1,166 @@
+import json
+from collections import Counter
+from typing import Iterator, Tuple
+
+READ_SIZE = 1 << 20
+EDGE_KEYS = ("edges", "links")
+
+
+# ----------------------------------------------------------
+# Streaming graph.json reader
+# ----------------------------------------------------------
+
+def iter_graph_records(graph_path: str) -> Iterator[Tuple[str, object]]:
+    """
+    Stream a node_link graph.json without loading it whole.
+    Yields ("node", dict) and ("edge", dict) records in file order, plus
+    ("meta", (key, value)) for the other top-level keys. Only one record is
+    decoded at a time, so memory stays flat regardless of graph size.
+    """
+    decoder = json.JSONDecoder()
+    with open(graph_path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            more = f.read(READ_SIZE)
+            if not more:
+                eof = True
+                return False
+            buf = buf[pos:] + more
+            pos = 0
+            return True
+
+        def skip_ws() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        def expect(char: str) -> None:
+            nonlocal pos
+            if skip_ws() != char:
+                raise ValueError(f"Malformed graph file {graph_path}: expected '{char}'")
+            pos += 1
+
+        def decode():
+            nonlocal pos
+            skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A scalar ending at the buffer edge may be cut short
+                    if end < len(buf) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect("{")
+        while skip_ws() != "}":
+            key = decode()
+            expect(":")
+            if key == "nodes" or key in EDGE_KEYS:
+                kind = "node" if key == "nodes" else "edge"
+                expect("[")
+                while skip_ws() != "]":
+                    yield kind, decode()
+                    if skip_ws() == ",":
+                        pos += 1
+                pos += 1
+            else:
+                yield "meta", (key, decode())
+            if skip_ws() == ",":
+                pos += 1
+
+
+# ----------------------------------------------------------
+# Statistics
+# ----------------------------------------------------------
+
+def graph_stats(graph_path: str) -> dict:
+    """
+    Compute graph statistics in a single linear pass over graph.json:
+    node/edge counts, degree distribution, topic histogram, isolated nodes
+    and connected component sizes (union-find over node indices).
+    """
+    index = {}
+    degree = []
+    parent = []
+    topics = Counter()
+    n_edges = 0
+
+    def node_index(node_id) -> int:
+        i = index.get(node_id)
+        if i is None:
+            i = index[node_id] = len(degree)
+            degree.append(0)
+            parent.append(i)
+        return i
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for kind, record in iter_graph_records(graph_path):
+        if kind == "node":
+            node_index(record["id"])
+            topics.update(record.get("tags", []))
+        elif kind == "edge":
+            a = node_index(record["source"])
+            b = node_index(record["target"])
+            degree[a] += 1
+            degree[b] += 1
+            n_edges += 1
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    n_nodes = len(degree)
+    component_sizes = Counter(find(i) for i in range(n_nodes))
+    degree_distribution = Counter(degree)
+
+    return {
+        "nodes": n_nodes,
+        "edges": n_edges,
+        "avg_degree": (2 * n_edges / n_nodes) if n_nodes else 0.0,
+        "max_degree": max(degree, default=0),
+        "isolated_nodes": degree_distribution.get(0, 0),
+        "degree_distribution": dict(sorted(degree_distribution.items())),
+        "topics": dict(topics.most_common()),
+        "components": len(component_sizes),
+        "component_sizes": sorted(component_sizes.values(), reverse=True),
+    }
+
+
+def print_stats(stats: dict, top: int = 10) -> None:
+    n_nodes = stats["nodes"]
+    print(f"Nodes:           {n_nodes}")
+    print(f"Edges:           {stats['edges']}")
+    print(f"Avg degree:      {stats['avg_degree']:.2f}")
+    print(f"Max degree:      {stats['max_degree']}")
+    isolated = stats["isolated_nodes"]
+    share = (isolated / n_nodes * 100) if n_nodes else 0.0
+    print(f"Isolated nodes:  {isolated} ({share:.1f}%)")
+    sizes = stats["component_sizes"]
+    print(f"Components:      {stats['components']} (largest: {sizes[0] if sizes else 0})")
+
+    print("\nDegree distribution:")
+    for deg, count in stats["degree_distribution"].items():
+        print(f"  {deg:>6}: {count}")
+
+    print(f"\nTop topics (of {len(stats['topics'])}):")
+    for topic, count in list(stats["topics"].items())[:top]:
+        print(f"  {topic}: {count}")
@@ -0,0 +1,148 @@
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib with a preset dictionary is the fallback
+    zstandard = None
+
+
+MAGIC = b"KGBS1"
+HEADER = struct.Struct("<5sB16sI")  # magic, reserved, codec name, dictionary size
+DICT_SIZE = 32 * 1024  # zlib's preset dictionary window
+TRAINING_SAMPLES = 2000
+
+
+# ----------------------------------------------------------
+# Dictionary training
+# ----------------------------------------------------------
+
+def build_zlib_dictionary(samples: List[str], size: int = DICT_SIZE) -> bytes:
+    """
+    Preset dictionary for zlib: the most frequent words of the samples,
+    most frequent last (zlib references recent dictionary bytes cheapest).
+    """
+    counts = Counter(word for sample in samples for word in re.findall(r"\S+", sample))
+    words = [word for word, count in counts.most_common() if count > 1]
+    dictionary = b""
+    for word in words:
+        encoded = word.encode("utf-8") + b" "
+        if len(dictionary) + len(encoded) > size:
+            break
+        dictionary = encoded + dictionary
+    return dictionary
+
+
+def train_dictionary(samples: List[str], codec: str) -> bytes:
+    if codec == "zstd":
+        try:
+            trained = zstandard.train_dictionary(
+                DICT_SIZE, [s.encode("utf-8") for s in samples if s]
+            )
+            return trained.as_bytes()
+        except zstandard.ZstdError:
+            return b""  # too few samples to train on
+    return build_zlib_dictionary(samples)
+
+
+# ----------------------------------------------------------
+# Writing and reading
+# ----------------------------------------------------------
+
+def write_body_store(
+    path: str,
+    bodies: Iterable[str],
+    samples: List[str],
+    codec: str | None = None,
+) -> List[Tuple[int, int]]:
+    """
+    Compress each body independently into a single block file at path.
+    A dictionary trained on samples is stored in the header, so even short
+    sections compress well. Returns one (offset, length) reference per body.
+    codec is "zstd" (if zstandard is installed) or "zlib"; default picks zstd
+    when available.
+    """
+    if codec is None:
+        codec = "zstd" if zstandard is not None else "zlib"
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("codec 'zstd' requires the 'zstandard' package.")
+
+    dictionary = train_dictionary(samples[:TRAINING_SAMPLES], codec)
+    if codec == "zstd":
+        zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        compressor = zstandard.ZstdCompressor(level=10, dict_data=zdict)
+        compress = compressor.compress
+    else:
+        def compress(data: bytes) -> bytes:
+            co = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+            return co.compress(data) + co.flush()
+
+    refs = []
+    # Written next to path and renamed into place, like graph.json: readers
+    # holding a map of the old store keep reading the old file
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 0, codec.encode("ascii"), len(dictionary)))
+            f.write(dictionary)
+            offset = HEADER.size + len(dictionary)
+            for body in bodies:
+                block = compress(body.encode("utf-8"))
+                f.write(block)
+                refs.append((offset, len(block)))
+                offset += len(block)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return refs
+
+
+class BodyStore:
+    """
+    Read-only, memory-mapped view of a body store written by write_body_store.
+    Bodies are decompressed one at a time, only when asked for.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, codec, dict_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a kgtool body store: {path}")
+        self.codec = codec.rstrip(b"\0").decode("ascii")
+        self.dictionary = bytes(self._map[HEADER.size:HEADER.size + dict_size])
+
+        if self.codec == "zstd":
+            if zstandard is None:
+                self.close()
+                raise ValueError(f"{path} is zstd-compressed; install 'zstandard' to read it.")
+            zdict = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    def get(self, ref: Tuple[int, int]) -> str:
+        offset, length = ref
+        block = self._map[offset:offset + length]
+        if self.codec == "zstd":
+            data = self._decompressor.decompress(block)
+        elif self.dictionary:
+            data = zlib.decompressobj(zdict=self.dictionary).decompress(block)
+        else:
+            data = zlib.decompress(block)
+        return data.decode("utf-8")
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "BodyStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
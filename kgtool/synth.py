@@ -0,0 +1,129 @@
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+SYLLABLES = [
+    c + v
+    for c in "bdfgklmnprstvz"
+    for v in ("a", "e", "i", "o", "u", "ai", "or")
+]
+WORDS_PER_SENTENCE = 14
+SENTENCES_PER_PARAGRAPH = 4
+DUPLICATE_POOL = 1000  # recent bodies that later sections may duplicate
+CORE_SHARE = 0.02  # fraction of the vocabulary that is a topic's core words
+
+
+def make_vocabulary(size: int) -> np.ndarray:
+    """size distinct pseudo-words; word i spells i in base len(SYLLABLES), two syllables minimum."""
+    base = len(SYLLABLES)
+    words = []
+    for i in range(size):
+        n = i + base
+        parts = []
+        while n:
+            n, digit = divmod(n, base)
+            parts.append(SYLLABLES[digit])
+        words.append("".join(reversed(parts)))
+    return np.array(words, dtype=object)
+
+
+def _zipf_cdf(n: int, exponent: float = 1.07) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return np.cumsum(weights / weights.sum())
+
+
+def generate_corpus(
+    output_file: str,
+    sections: int = 1000,
+    vocabulary: int = 5000,
+    topics: int = 8,
+    mean_words: int = 200,
+    length_sigma: float = 0.6,
+    duplicate_rate: float = 0.05,
+    topic_mix: float = 0.3,
+    topic_skew: float = 0.0,
+    seed: int = 42,
+) -> dict:
+    """
+    Write a reproducible synthetic markdown corpus of `sections` "##" sections.
+
+    Words come from a Zipf-distributed vocabulary of pseudo-words. Each section
+    has one topic (topic k drawn with weight 1 / (k + 1) ** topic_skew, so 0 is
+    uniform); a topic_mix share of its words is drawn from that topic's core
+    words instead of the background vocabulary. Body lengths are lognormal
+    around mean_words with shape length_sigma. With probability
+    duplicate_rate a section repeats a recent body verbatim (under its own
+    title). The same arguments always produce the same bytes.
+
+    Returns a summary: section, duplicate, word and byte counts, and
+    topic_terms (topic name -> its most frequent core words) in the
+    topic_terms.json format.
+    """
+    if vocabulary < topics * 10:
+        raise ValueError("vocabulary must have at least 10 words per topic.")
+    rng = np.random.default_rng(seed)
+    words = make_vocabulary(vocabulary)
+    background_cdf = _zipf_cdf(vocabulary)
+
+    # Each topic gets a disjoint block of core words, Zipf-weighted within it
+    core_size = max(10, int(vocabulary * CORE_SHARE))
+    core_ids = rng.permutation(vocabulary)[:core_size * topics].reshape(topics, core_size)
+    core_cdf = _zipf_cdf(core_size)
+    topic_names = [f"topic_{k}_{words[core_ids[k, 0]]}" for k in range(topics)]
+    topic_cdf = np.cumsum(1.0 / np.arange(1, topics + 1) ** topic_skew)
+    topic_cdf /= topic_cdf[-1]
+
+    # lognormal with the requested mean: mu = ln(mean) - sigma^2 / 2
+    mu = np.log(mean_words) - length_sigma ** 2 / 2
+    recent = deque(maxlen=DUPLICATE_POOL)
+    duplicates = total_words = total_bytes = 0
+
+    with open(output_file, "w", encoding="utf-8", newline="\n") as f:
+        for i in range(sections):
+            topic = int(np.searchsorted(topic_cdf, rng.random()))
+            title = f"{i + 1}. {words[core_ids[topic, 0]].capitalize()} {words[core_ids[topic, 1 + i % 9]]}"
+
+            if recent and rng.random() < duplicate_rate:
+                body, n = recent[int(rng.integers(len(recent)))]
+                duplicates += 1
+            else:
+                n = max(5, int(rng.lognormal(mu, length_sigma)))
+                from_core = rng.random(n) < topic_mix
+                ids = np.searchsorted(background_cdf, rng.random(n))
+                core_picks = np.searchsorted(core_cdf, rng.random(int(from_core.sum())))
+                ids[from_core] = core_ids[topic, core_picks]
+                ids = np.minimum(ids, vocabulary - 1)  # guard against float rounding at the cdf end
+                body = _render_body(words[ids])
+                recent.append((body, n))
+
+            text = f"## {title}\n\n{body}\n\n"
+            f.write(text)
+            total_words += n
+            total_bytes += len(text.encode("utf-8"))
+
+    topic_terms: Dict[str, List[str]] = {
+        name: [str(w) for w in words[core_ids[k, :10]]] for k, name in enumerate(topic_names)
+    }
+    return {
+        "sections": sections,
+        "duplicates": duplicates,
+        "words": total_words,
+        "bytes": total_bytes,
+        "topic_terms": topic_terms,
+    }
+
+
+def _render_body(tokens: np.ndarray) -> str:
+    """Group tokens into capitalized sentences and blank-line separated paragraphs."""
+    paragraphs = []
+    sentences = []
+    for start in range(0, len(tokens), WORDS_PER_SENTENCE):
+        sentence = " ".join(tokens[start:start + WORDS_PER_SENTENCE])
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        if len(sentences) == SENTENCES_PER_PARAGRAPH:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
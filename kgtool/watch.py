@@ -0,0 +1,244 @@
+import asyncio
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import networkx as nx
+from networkx.readwrite import json_graph
+
+from .concepts import CONCEPTS_FILE
+from .pipeline import (
+    TOPIC_SCORES_FILE,
+    build_knowledge_graph,
+    extract_chunks,
+    extract_keyphrases,
+    graph_search_docs,
+    load_topic_terms,
+    remove_embeddings,
+    remove_stale_output,
+    write_json_atomic,
+    write_node_markdown,
+    write_search_index,
+)
+from .readers import is_source_file, read_source
+
+NODE_FILE = re.compile(r"node_(\d+)\.md")
+
+
+# ----------------------------------------------------------
+# File scanning
+# ----------------------------------------------------------
+
+def scan_markdown_files(input_dir: str) -> Dict[str, int]:
+    """Return {path: mtime_ns} for every source file (see is_source_file) under input_dir."""
+    found = {}
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if is_source_file(name):
+                path = os.path.join(root, name)
+                try:
+                    found[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    pass  # deleted between walk and stat
+    return found
+
+
+def read_chunks(path: str) -> List[Tuple[str, str]]:
+    """Chunks of one file; skipped and heading-less files contribute nothing."""
+    try:
+        return extract_chunks(read_source(path))
+    except (ValueError, FileNotFoundError):
+        return []
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def rebuild_graph(
+    chunks: List[Tuple[str, str]],
+    keyphrases: List[List[str]],
+    options: dict,
+) -> nx.Graph:
+    """Executor entry point: TF-IDF, tagging and edges with cached keyphrases."""
+    G, _, _ = build_knowledge_graph(chunks, keyphrases=keyphrases, **options)
+    return G
+
+
+# ----------------------------------------------------------
+# Watcher
+# ----------------------------------------------------------
+
+class Watcher:
+    """
+    Incrementally rebuild a knowledge graph from a directory of markdown files.
+
+    Each refresh re-reads and re-chunks only files whose mtime changed, runs
+    YAKE only on chunk bodies it has not seen before, and then redoes the
+    (cheap) corpus-wide TF-IDF, tagging and edges. File reads and writes run
+    concurrently on the default thread pool; CPU work runs on cpu_executor.
+    graph.json is published with write-then-rename; once no file has any
+    sections left, the published graph is empty.
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        min_similarity: float = 0.3,
+        top_keywords: int = 5,
+        top_keyphrases: int = 5,
+        topic_terms_path: str | None = None,
+        cpu_executor: Executor | None = None,
+    ):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.top_keyphrases = top_keyphrases
+        self.topic_terms_path = topic_terms_path
+        self.options = dict(min_similarity=min_similarity, top_keywords=top_keywords)
+        self.cpu_executor = cpu_executor
+
+        self.mtimes: Dict[str, int] = {}
+        self.file_chunks: Dict[str, List[Tuple[str, str]]] = {}
+        self.keyphrase_cache: Dict[str, List[str]] = {}
+
+    async def refresh(self) -> bool:
+        """Rebuild if any file was added, changed or removed. Returns True if rebuilt."""
+        loop = asyncio.get_running_loop()
+        current = await loop.run_in_executor(None, scan_markdown_files, self.input_dir)
+        changed = [p for p, mtime in current.items() if self.mtimes.get(p) != mtime]
+        removed = [p for p in self.mtimes if p not in current]
+        if not changed and not removed:
+            return False
+
+        for path in removed:
+            self.file_chunks.pop(path, None)
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, read_chunks, path) for path in changed)
+        )
+        self.file_chunks.update(zip(changed, results))
+        self.mtimes = current
+
+        await self.publish()
+        return True
+
+    async def publish(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        sources, chunks = [], []
+        for path in sorted(self.file_chunks):
+            rel_path = os.path.relpath(path, self.input_dir)
+            for chunk in self.file_chunks[path]:
+                sources.append(rel_path)
+                chunks.append(chunk)
+        if not chunks:
+            # Every file is gone or has no sections: publish an empty graph
+            self.keyphrase_cache = {}
+            await self.write_outputs(nx.Graph())
+            return
+
+        # YAKE only for bodies not seen before
+        new_bodies = list({body for _, body in chunks if body not in self.keyphrase_cache})
+        if new_bodies:
+            new_keyphrases = await loop.run_in_executor(
+                self.cpu_executor, extract_keyphrases, new_bodies, self.top_keyphrases
+            )
+            self.keyphrase_cache.update(zip(new_bodies, new_keyphrases))
+        live_bodies = {body for _, body in chunks}
+        self.keyphrase_cache = {
+            body: kp for body, kp in self.keyphrase_cache.items() if body in live_bodies
+        }
+        keyphrases = [self.keyphrase_cache[body] for _, body in chunks]
+
+        topic_terms = load_topic_terms(self.topic_terms_path)
+        G = await loop.run_in_executor(
+            self.cpu_executor,
+            rebuild_graph,
+            chunks,
+            keyphrases,
+            dict(self.options, topic_terms=topic_terms),
+        )
+        for node_id, source in enumerate(sources):
+            G.nodes[node_id]["source"] = source
+
+        await self.write_outputs(G)
+
+    async def write_outputs(self, G: nx.Graph) -> None:
+        loop = asyncio.get_running_loop()
+        nodes_dir = os.path.join(self.output_dir, "nodes")
+        os.makedirs(nodes_dir, exist_ok=True)
+
+        writes = [
+            loop.run_in_executor(None, write_node_markdown, nodes_dir, node_id, data, data["body"])
+            for node_id, data in G.nodes(data=True)
+        ]
+        # Node files beyond the new node count, including ones left by an earlier run
+        stale = [
+            name for name in os.listdir(nodes_dir)
+            if (match := NODE_FILE.fullmatch(name)) and int(match.group(1)) >= G.number_of_nodes()
+        ]
+        writes += [
+            loop.run_in_executor(None, remove_file, os.path.join(nodes_dir, name))
+            for name in stale
+        ]
+        await asyncio.gather(*writes)
+
+        await loop.run_in_executor(
+            None, write_search_index, self.output_dir, graph_search_docs(G), False
+        )
+        graph_path = os.path.join(self.output_dir, "graph.json")
+        await loop.run_in_executor(
+            None, write_json_atomic, graph_path, json_graph.node_link_data(G)
+        )
+        # A build into the same directory may have left these behind
+        remove_stale_output(self.output_dir, CONCEPTS_FILE)
+        remove_stale_output(self.output_dir, TOPIC_SCORES_FILE)
+        remove_embeddings(self.output_dir)
+        print(
+            f"Graph updated: {graph_path} "
+            f"(Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()})"
+        )
+
+    async def run(self, interval: float = 1.0, debounce: float = 0.5) -> None:
+        """
+        Poll every interval seconds. A rebuild starts only once the tree has
+        been quiet for debounce seconds, so bursts of saves trigger one rebuild.
+        """
+        loop = asyncio.get_running_loop()
+        await self.refresh()
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = await loop.run_in_executor(None, scan_markdown_files, self.input_dir)
+            if snapshot == self.mtimes:
+                continue
+            while True:
+                await asyncio.sleep(debounce)
+                settled = await loop.run_in_executor(None, scan_markdown_files, self.input_dir)
+                if settled == snapshot:
+                    break
+                snapshot = settled
+            await self.refresh()
+
+
+def watch(
+    input_dir: str,
+    output_dir: str,
+    interval: float = 1.0,
+    debounce: float = 0.5,
+    **options,
+) -> None:
+    """
+    Watch input_dir and keep output_dir's graph up to date until interrupted.
+    options are Watcher's build options (min_similarity, top_keywords, ...).
+    """
+    with ProcessPoolExecutor(max_workers=1) as cpu_executor:
+        watcher = Watcher(input_dir, output_dir, cpu_executor=cpu_executor, **options)
+        print(f"Watching {input_dir} (Ctrl+C to stop)")
+        try:
+            asyncio.run(watcher.run(interval=interval, debounce=debounce))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Load Test: End-to-End Throughput and Memory
+===========================================
+
+Generates seeded synthetic corpora (kgtool synth) and runs discover-topics,
+build and extract against each, one fresh process per step. Records wall
+time, sections per second, MB per second and the peak RSS of every step.
+
+Usage:
+    python load_test.py --sections 10000 100000 1000000
+    python load_test.py --sections 100000 --build-args="--lean --no-search-index"
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from kgtool.synth import generate_corpus
+
+
+def run_step(cmd: list, log_path: Path) -> dict:
+    """Run a command, returning wall time and the child's own peak RSS."""
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 reports this child's rusage alone, unlike RUSAGE_CHILDREN
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed; see {log_path}")
+    max_rss = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    return {"seconds": round(seconds, 2), "peak_rss_mb": round(max_rss, 1)}
+
+
+def load_test(sizes: list, work_dir: Path, seed: int, num_topics: int, build_args: list) -> list:
+    kgtool = [sys.executable, "-m", "kgtool.cli"]
+    results = []
+    for sections in sizes:
+        run_dir = work_dir / f"s{sections}"
+        run_dir.mkdir(parents=True, exist_ok=True)
+        corpus = run_dir / "corpus.md"
+        topics = run_dir / "topics.json"
+        graph_dir = run_dir / "kg"
+
+        start = time.perf_counter()
+        summary = generate_corpus(str(corpus), sections=sections, topics=num_topics, seed=seed)
+        generate_seconds = time.perf_counter() - start
+        mb = summary["bytes"] / 2**20
+        print(f"\n{sections} sections, {mb:.1f} MB corpus (generated in {generate_seconds:.1f}s)")
+
+        steps = [
+            ("discover-topics", kgtool + [
+                "discover-topics", "--input", str(corpus), "--output", str(topics),
+                "--num-topics", str(num_topics),
+            ]),
+            ("build", kgtool + [
+                "build", "--input", str(corpus), "--output", str(graph_dir), "--topics", str(topics),
+            ] + build_args),
+            ("extract", None),
+        ]
+        for name, cmd in steps:
+            if cmd is None:
+                topic = next(iter(json.loads(topics.read_text(encoding="utf-8"))))
+                cmd = kgtool + [
+                    "extract", "--topic", topic, "--graph", str(graph_dir / "graph.json"),
+                    "--output", str(run_dir / "context.md"),
+                ]
+            result = run_step(cmd, run_dir / f"{name}.log")
+            result.update(
+                step=name,
+                sections=sections,
+                corpus_mb=round(mb, 1),
+                sections_per_s=round(sections / max(result["seconds"], 1e-9)),
+                mb_per_s=round(mb / max(result["seconds"], 1e-9), 2),
+            )
+            results.append(result)
+            print(
+                f"  {name:<16} {result['seconds']:>9.2f}s {result['sections_per_s']:>10} sections/s "
+                f"{result['mb_per_s']:>8.2f} MB/s  peak RSS {result['peak_rss_mb']:>8.1f} MB"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end kgtool load test on synthetic corpora.")
+    parser.add_argument(
+        "--sections", type=int, nargs="+", default=[10000], help="Corpus sizes to test"
+    )
+    parser.add_argument("--work-dir", default="loadtest_output", help="Where corpora and graphs go")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    parser.add_argument("--num-topics", type=int, default=8, help="Topics to generate and discover")
+    parser.add_argument("--build-args", default="", help="Extra arguments for 'kgtool build'")
+    parser.add_argument(
+        "--results", default=None, help="JSON results file (default: <work-dir>/results.json)"
+    )
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = load_test(
+        args.sections, work_dir, args.seed, args.num_topics, shlex.split(args.build_args)
+    )
+    results_path = Path(args.results) if args.results else work_dir / "results.json"
+    results_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\nResults written to: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
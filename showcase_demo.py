@@ -68,12 +68,23 @@ def analyze_graph(graph_path: Path):
         graph_data = json.load(f)
     
     nodes = graph_data.get('nodes', [])
-    links = graph_data.get('links', [])
+    links = graph_data.get('links', graph_data.get('edges', []))
     
     print("📊 Graph Statistics:")
     print(f"   • Total Nodes: {len(nodes)}")
     print(f"   • Total Edges: {len(links)}")
     
+    # Precomputed analytics (kgtool build --analytics): no recounting of the link list
+    if nodes and 'hub_rank' in nodes[0]:
+        degrees = [node['degree'] for node in nodes]
+        print(f"   • Isolated Nodes: {sum(1 for d in degrees if d == 0)}")
+        print(f"   • Max Connections: {max(degrees)}")
+        print(f"   • Communities: {graph_data.get('graph', {}).get('communities', 0)}")
+        print(f"\n   • Top Hubs (PageRank):")
+        for node in sorted(nodes, key=lambda n: n['hub_rank'])[:3]:
+            print(f"     {node['hub_rank']}. {node.get('title', 'N/A')} "
+                  f"(pr={node['pagerank']:.4f}, {node['degree']} connections)")
+    
     # Analyze topics
     topics_count = {}
     for node in nodes:
@@ -197,8 +208,9 @@ def main():
          "--min-sim", "0.25",
          "--top-keywords", "8",
          "--top-keyphrases", "10",
-         "--topics", str(human_topics_file)],
-        "Building graph with semantic relationships and topic tagging"
+         "--topics", str(human_topics_file),
+         "--analytics"],
+        "Building graph with semantic relationships, topic tagging and analytics"
     )
     
     if not success:
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from kgtool.pipeline import build_graph, extract_topic_context
+
+
+def test_build_graph_analytics_sets_node_attributes(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        min_similarity=0.05,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        analytics=True,
+    )
+
+    graph = json.loads((tmp_output_dir / "graph.json").read_text(encoding="utf-8"))
+    nodes = graph["nodes"]
+    assert all(
+        {"community", "pagerank", "betweenness", "degree", "hub_rank"} <= n.keys() for n in nodes
+    )
+    degrees = {n["id"]: 0 for n in nodes}
+    edges_key = "links" if "links" in graph else "edges"
+    for edge in graph[edges_key]:
+        degrees[edge["source"]] += 1
+        degrees[edge["target"]] += 1
+    assert {n["id"]: n["degree"] for n in nodes} == degrees
+    assert sorted(n["hub_rank"] for n in nodes) == list(range(1, len(nodes) + 1))
+    assert abs(sum(n["pagerank"] for n in nodes) - 1.0) < 1e-3
+    assert graph["graph"]["communities"] == len({n["community"] for n in nodes})
+
+    output_file = tmp_output_dir / "frontend_context.md"
+    extract_topic_context(
+        topic="frontend",
+        graph_path=str(tmp_output_dir / "graph.json"),
+        output_file=str(output_file),
+        include_neighbors=True,
+        order_by="pagerank",
+    )
+    pagerank = {n["id"]: n["pagerank"] for n in nodes}
+    text = output_file.read_text(encoding="utf-8")
+    emitted = [int(line[4:line.index("]")]) for line in text.splitlines() if line.startswith("## [")]
+    assert emitted
+    assert [pagerank[n] for n in emitted] == sorted((pagerank[n] for n in emitted), reverse=True)
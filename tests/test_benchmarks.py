@@ -1,3 +1,7 @@
+import json
+import subprocess
+import sys
+
 import pytest
 
 from kgtool.pipeline import build_graph, discover_topics
@@ -5,6 +9,24 @@ from kgtool.pipeline import build_graph, discover_topics
 
 pytest.importorskip("pytest_benchmark")
 
+PEAK_RSS_SCRIPT = """
+import json, resource, sys
+from kgtool.pipeline import build_graph
+build_graph(**json.loads(sys.argv[1]))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def peak_rss_mb(**build_options) -> float:
+    """Peak RSS of one build_graph run in a fresh interpreter, in MB."""
+    result = subprocess.run(
+        [sys.executable, "-c", PEAK_RSS_SCRIPT, json.dumps(build_options)],
+        capture_output=True, text=True, check=True,
+    )
+    max_rss = int(result.stdout.split()[-1])
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return max_rss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
 
 def test_benchmark_discover_topics_extreme(extreme_doc, tmp_output_dir, benchmark):
     def _run():
@@ -17,13 +39,15 @@ def test_benchmark_discover_topics_extreme(extreme_doc, tmp_output_dir, benchmar
     benchmark(_run)
 
 
-def test_benchmark_build_graph_extreme(extreme_doc, tmp_output_dir, benchmark):
-    def _run():
-        build_graph(
-            input_file=str(extreme_doc),
-            output_dir=str(tmp_output_dir),
-            min_similarity=0.25,
-            top_keywords=8,
-            top_keyphrases=10,
-        )
-    benchmark(_run)
+@pytest.mark.parametrize("lean", [False, True], ids=["default", "lean"])
+def test_benchmark_build_graph_extreme(extreme_doc, tmp_output_dir, benchmark, lean):
+    options = dict(
+        input_file=str(extreme_doc),
+        output_dir=str(tmp_output_dir),
+        min_similarity=0.25,
+        top_keywords=8,
+        top_keyphrases=10,
+        lean=lean,
+    )
+    benchmark(build_graph, **options)
+    benchmark.extra_info["peak_rss_mb"] = round(peak_rss_mb(**options), 1)
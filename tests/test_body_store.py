@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from kgtool.pipeline import build_graph, extract_chunks, extract_topic_context
+from kgtool.store import BodyStore, write_body_store
+
+
+def test_body_store_roundtrip(tmp_output_dir: Path, enterprise_doc: Path):
+    bodies = [body for _, body in extract_chunks(enterprise_doc.read_text(encoding="utf-8"))]
+    bodies.append("")
+    path = str(tmp_output_dir / "bodies.bin")
+
+    refs = write_body_store(path, bodies, bodies, codec="zlib")
+    assert len(refs) == len(bodies)
+    assert (tmp_output_dir / "bodies.bin").stat().st_size < sum(len(b.encode()) for b in bodies)
+
+    with BodyStore(path) as store:
+        assert store.codec == "zlib"
+        assert [store.get(ref) for ref in reversed(refs)] == list(reversed(bodies))
+
+
+def test_body_store_rewrite_leaves_open_readers_intact(tmp_output_dir: Path):
+    path = str(tmp_output_dir / "bodies.bin")
+    old = ["alpha section body " * 20, "beta section body " * 20]
+    refs = write_body_store(path, old, old, codec="zlib")
+    with BodyStore(path) as store:
+        # A rebuild replaces the file; the open map still sees the old one
+        new_refs = write_body_store(path, ["gamma"] * 50, ["gamma"], codec="zlib")
+        assert [store.get(ref) for ref in refs] == old
+    assert sorted(p.name for p in tmp_output_dir.iterdir()) == ["bodies.bin"]
+
+    def failing():
+        yield "delta"
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        write_body_store(path, failing(), ["delta"], codec="zlib")
+    assert sorted(p.name for p in tmp_output_dir.iterdir()) == ["bodies.bin"]
+    with BodyStore(path) as store:
+        assert store.get(new_refs[-1]) == "gamma"  # the previous store is still in place
+
+
+def test_body_store_rejects_foreign_file(tmp_output_dir: Path):
+    path = tmp_output_dir / "bodies.bin"
+    path.write_bytes(b"not a store" * 10)
+    with pytest.raises(ValueError, match="Not a kgtool body store"):
+        BodyStore(str(path))
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_build_graph_compressed_bodies(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path, out_of_core: bool
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        compress_bodies=True,
+        out_of_core=out_of_core,
+    )
+
+    graph = json.loads((tmp_output_dir / "graph.json").read_text(encoding="utf-8"))
+    assert graph["graph"]["body_store"] == "bodies.bin"
+    assert all("body" not in node and "body_ref" in node for node in graph["nodes"])
+    assert not (tmp_output_dir / "nodes").exists()
+
+    output_file = tmp_output_dir / "frontend_context.md"
+    extract_topic_context(
+        topic="frontend",
+        graph_path=str(tmp_output_dir / "graph.json"),
+        output_file=str(output_file),
+        include_neighbors=False,
+    )
+    text = output_file.read_text(encoding="utf-8")
+    chunks = dict(extract_chunks(enterprise_doc.read_text(encoding="utf-8")))
+    frontend_titles = [n["title"] for n in graph["nodes"] if "frontend" in n["tags"]]
+    assert frontend_titles
+    assert all(chunks[title] in text for title in frontend_titles)
@@ -1,6 +1,9 @@
 from pathlib import Path
 
-from kgtool.pipeline import extract_chunks
+import networkx as nx
+import pytest
+
+from kgtool.pipeline import build_graph, extract_chunks, link_sub_nodes, split_body, split_chunks
 
 
 def test_extract_chunks_sample_has_multiple_sections(sample_doc: Path):
@@ -28,3 +31,59 @@ def test_extract_chunks_chaotic_handles_weird_headings(chaotic_doc: Path):
     assert len(chunks) > 0
     titles = [title for title, _ in chunks]
     assert any("intro" in t.lower() for t in titles)
+
+
+def test_split_body_respects_limit_and_boundaries():
+    paragraphs = [f"Paragraph {i} talks about caching. It has two sentences." for i in range(20)]
+    body = "\n\n".join(paragraphs)
+    pieces = split_body(body, max_chars=200, overlap=60)
+    assert len(pieces) > 1
+    assert all(len(p) <= 200 for p in pieces)
+    # Cuts fall on paragraph/sentence boundaries
+    assert all(p.endswith(".") for p in pieces)
+    # Consecutive pieces overlap
+    assert all(a.split("\n\n")[-1] in b for a, b in zip(pieces, pieces[1:]))
+    # Nothing is lost
+    assert all(any(p_text in p for p in pieces) for p_text in paragraphs)
+
+
+def test_split_body_handles_unpunctuated_text():
+    body = "word " * 500
+    pieces = split_body(body, max_chars=100)
+    assert all(len(p) <= 100 for p in pieces)
+    assert sum(len(p.split()) for p in pieces) == 500
+
+
+def test_split_chunks_titles_and_parents():
+    chunks = [("Short", "tiny"), ("Long", "Sentence one. " * 30), ("Next", "end")]
+    pieces = list(split_chunks(chunks, max_chars=120))
+    titles = [title for title, _, _ in pieces]
+    parents = [parent for _, _, parent in pieces]
+    assert titles[:3] == ["Short", "Long", "Long (part 2)"]
+    assert titles[-1] == "Next"
+    assert parents[0] is None and parents[1] is None and parents[-1] is None
+    assert set(parents[2:-1]) == {1}
+
+
+def test_link_sub_nodes_keeps_similarity_weights():
+    G = nx.Graph()
+    G.add_nodes_from(range(4))
+    G.add_edge(1, 2, weight=0.4)
+    link_sub_nodes(G, [None, None, 1, 1])
+    assert G.edges[1, 2] == {"weight": 0.4, "relation": "sequence"}
+    assert G.edges[2, 3] == {"weight": 1.0, "relation": "sequence"}
+    assert G.nodes[2]["parent"] == G.nodes[3]["parent"] == 1
+
+
+def test_bad_overlap_is_rejected_up_front(sample_doc: Path, tmp_output_dir: Path):
+    with pytest.raises(ValueError, match="chunk overlap"):
+        split_body("tiny", max_chars=100, overlap=100)
+    with pytest.raises(ValueError, match="chunk overlap"):
+        list(split_chunks([("Short", "tiny")], max_chars=100, overlap=150))
+    for lean in (False, True):
+        with pytest.raises(ValueError, match="chunk overlap"):
+            build_graph(
+                str(sample_doc), str(tmp_output_dir / "kg"), lean=lean,
+                max_chunk_chars=100_000, chunk_overlap=100_000,
+            )
+    assert not (tmp_output_dir / "kg").exists()
@@ -0,0 +1,88 @@
+import random
+
+import networkx as nx
+import pytest
+from rapidfuzz import fuzz
+
+from kgtool import concepts
+from kgtool.concepts import (
+    build_concept_layer,
+    find_concept,
+    group_similar_phrases,
+    load_concept_layer,
+    normalize_phrase,
+    related_concepts,
+)
+from kgtool.pipeline import build_graph
+
+
+def _graph():
+    G = nx.Graph()
+    G.add_node(0, keyphrases=["React Components", "state management"], keywords=["react"])
+    G.add_node(1, keyphrases=["react component", "State-management"], keywords=["hooks"])
+    G.add_node(2, keyphrases=["database schema"], keywords=["react", "hooks"])
+    return G
+
+
+def test_near_duplicate_phrases_are_merged():
+    assert normalize_phrase("  State-Management! ") == "state management"
+    groups = group_similar_phrases(["react component", "react components", "database"])
+    assert groups[0] == groups[1] != groups[2]
+
+
+def test_length_banded_grouping_matches_all_pairs(monkeypatch):
+    rng = random.Random(3)
+    phrases = sorted({
+        "".join(rng.choice("abcd ") for _ in range(rng.randint(1, 14))).strip() or "a"
+        for _ in range(300)
+    })
+    monkeypatch.setattr(concepts, "CDIST_CELLS", 64)  # many small blocks
+    for similarity in (60, 85, 90):
+        parent = list(range(len(phrases)))
+
+        def find(i):
+            while parent[i] != i:
+                i = parent[i]
+            return i
+
+        for i, a in enumerate(phrases):
+            for j in range(i + 1, len(phrases)):
+                if fuzz.ratio(a, phrases[j]) >= similarity:
+                    ra, rb = find(i), find(j)
+                    parent[max(ra, rb)] = min(ra, rb)
+        assert group_similar_phrases(phrases, similarity) == [find(i) for i in range(len(phrases))]
+
+
+def test_concept_index_and_cooccurrence():
+    layer = build_concept_layer(_graph())
+
+    component = find_concept(layer, "React components")
+    assert set(component["variants"]) == {"react component", "react components"}
+    assert component["sections"] == [0, 1]
+    assert find_concept(layer, "state management")["sections"] == [0, 1]
+    assert find_concept(layer, "quantum chromodynamics") is None
+
+    # Only pairs sharing two sections are linked
+    related = {c["label"]: n for c, n in related_concepts(layer, component["id"])}
+    assert related == {"state management": 2}
+    hooks = find_concept(layer, "hooks")
+    assert {c["label"] for c, _ in related_concepts(layer, hooks["id"])} == set()
+
+
+def test_build_writes_concept_layer(sample_doc, tmp_output_dir):
+    out = tmp_output_dir / "kg"
+    build_graph(input_file=str(sample_doc), output_dir=str(out), concepts=True)
+    layer = load_concept_layer(str(out / "graph.json"))
+    assert layer["concepts"]
+    # Every variant points at a concept that lists it
+    for variant, concept_id in layer["index"].items():
+        assert variant in layer["concepts"][concept_id]["variants"]
+
+
+@pytest.mark.parametrize("mode", [{}, {"lean": True}, {"out_of_core": True}])
+def test_rebuild_without_concepts_removes_layer(mode, sample_doc, tmp_output_dir):
+    out = tmp_output_dir / "kg"
+    build_graph(input_file=str(sample_doc), output_dir=str(out), concepts=True)
+    assert (out / "concepts.json").exists()
+    build_graph(input_file=str(sample_doc), output_dir=str(out), **mode)
+    assert not (out / "concepts.json").exists()
@@ -1,6 +1,7 @@
 from pathlib import Path
 
-from kgtool.pipeline import build_graph, extract_topic_context
+from kgtool.cache import QueryCache
+from kgtool.pipeline import build_graph, extract_topic_context, iter_topic_context
 
 
 def test_extract_frontend_context_from_sample(sample_doc: Path, tmp_output_dir: Path):
@@ -60,3 +61,37 @@ def test_extract_frontend_context_with_topics(
     text = output_file.read_text(encoding="utf-8")
     assert "frontend" in text.lower()
     assert text.count("## [") >= 2
+
+
+def test_streamed_extract_matches_file_output(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path, capsys
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        analytics=True,
+        compress_bodies=True,
+    )
+    graph_path = str(tmp_output_dir / "graph.json")
+    output_file = tmp_output_dir / "context.md"
+    extract_topic_context("backend", graph_path, str(output_file), order_by="pagerank")
+    expected = output_file.read_text(encoding="utf-8")
+
+    # Header first, then one section per node in rank order
+    parts = list(iter_topic_context(graph_path, "backend", order_by="pagerank"))
+    assert "".join(parts) == expected
+    assert parts[0].startswith("# Topic Context: backend")
+    assert all(part.startswith("## [") for part in parts[1:])
+    assert len(parts) - 1 == int(expected.split("Extracted ")[1].split()[0])
+
+    capsys.readouterr()
+    cache = QueryCache(directory=str(tmp_output_dir / "cache"))
+    for _ in range(2):  # cache miss, then hit
+        extract_topic_context("backend", graph_path, "-", order_by="pagerank", cache=cache)
+        captured = capsys.readouterr()
+        assert captured.out == expected
+    extract_topic_context("no-such-topic", graph_path, "-")
+    captured = capsys.readouterr()
+    assert captured.out == "" and "No nodes found" in captured.err
+    assert list(iter_topic_context(graph_path, "no-such-topic")) == []
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from kgtool.embeddings import EmbeddingIndex, semantic_search
+from kgtool.pipeline import (
+    LsaEmbeddings,
+    add_similarity_edges,
+    build_graph,
+    extract_chunks,
+    vectorize_chunks,
+)
+from kgtool.synth import generate_corpus
+
+
+def test_dense_similarity_edges_match_sparse():
+    X = sp.random(300, 40, density=0.2, random_state=1, format="csr")
+    edges = {}
+    for name, matrix in (("sparse", X), ("dense", X.toarray().astype(np.float32))):
+        G = nx.Graph()
+        G.add_nodes_from(range(300))
+        add_similarity_edges(G, matrix, 0.3)
+        edges[name] = {(i, j): w["weight"] for i, j, w in G.edges(data=True)}
+    assert edges["dense"].keys() == edges["sparse"].keys()
+    assert np.allclose(
+        [edges["dense"][e] for e in edges["sparse"]], list(edges["sparse"].values()), atol=1e-5
+    )
+
+
+def test_lsa_embeddings_shape_and_clipping(enterprise_doc: Path):
+    vectorizer, X = vectorize_chunks(extract_chunks(enterprise_doc.read_text(encoding="utf-8")))
+    embeddings = LsaEmbeddings.fit(vectorizer, X, 128)
+    # Fewer documents than requested dimensions: clipped to the matrix rank bound
+    assert embeddings.dims == X.shape[0]
+    assert embeddings.vectors.dtype == np.float32
+    norms = np.linalg.norm(embeddings.vectors, axis=1)
+    assert np.allclose(norms[norms > 0], 1, atol=1e-5)
+    with pytest.raises(ValueError):
+        LsaEmbeddings.fit(vectorizer, X, 0)
+
+
+def test_embedding_build_and_semantic_search(tmp_output_dir: Path):
+    summary = generate_corpus(str(tmp_output_dir / "corpus.md"), sections=200, topics=4, seed=7)
+    topics_path = tmp_output_dir / "topics.json"
+    topics_path.write_text(json.dumps(summary["topic_terms"]), encoding="utf-8")
+    out = tmp_output_dir / "kg"
+    build_graph(
+        str(tmp_output_dir / "corpus.md"), str(out), topic_terms_path=str(topics_path),
+        embedding_dims=64,
+    )
+
+    vectors = np.load(out / "embeddings.npy", mmap_mode="r")
+    assert vectors.shape == (200, 64) and vectors.dtype == np.float32
+
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    edges_key = "links" if "links" in graph else "edges"
+    assert graph[edges_key]
+    for link in graph[edges_key][:50]:
+        cosine = float(vectors[link["source"]] @ vectors[link["target"]])
+        assert cosine == pytest.approx(link["weight"], abs=1e-5)
+    tagged = sum(bool(set(n["tags"]) & set(summary["topic_terms"])) for n in graph["nodes"])
+    assert tagged > 0.9 * len(graph["nodes"])
+
+    # Query projection reproduces the stored node vectors
+    index = EmbeddingIndex(str(out / "graph.json"))
+    node = graph["nodes"][5]
+    assert np.allclose(index.embed([node["body"]])[0], vectors[5], atol=1e-5)
+
+    topic, terms = next(iter(summary["topic_terms"].items()))
+    results = semantic_search(str(out / "graph.json"), " ".join(terms[:5]), top_k=10)
+    assert len(results) == 10
+    assert [r[2] for r in results] == sorted((r[2] for r in results), reverse=True)
+    titles = {n["id"]: n["title"] for n in graph["nodes"]}
+    assert all(title == titles[node_id] for node_id, title, _ in results)
+    assert sum(topic in graph["nodes"][node_id]["tags"] for node_id, _, _ in results) >= 8
+
+
+def test_lean_build_embeddings_match_default(tmp_output_dir: Path):
+    generate_corpus(str(tmp_output_dir / "corpus.md"), sections=100, seed=3)
+    for mode in ("default", "lean"):
+        build_graph(
+            str(tmp_output_dir / "corpus.md"), str(tmp_output_dir / mode),
+            lean=mode == "lean", embedding_dims=32,
+        )
+    assert np.array_equal(
+        np.load(tmp_output_dir / "lean" / "embeddings.npy"),
+        np.load(tmp_output_dir / "default" / "embeddings.npy"),
+    )
+    graphs = [
+        json.loads((tmp_output_dir / mode / "graph.json").read_text(encoding="utf-8"))
+        for mode in ("default", "lean")
+    ]
+    assert graphs[0] == graphs[1]
+
+
+def test_embeddings_rejected_out_of_core(enterprise_doc: Path, tmp_output_dir: Path):
+    with pytest.raises(ValueError):
+        build_graph(str(enterprise_doc), str(tmp_output_dir), out_of_core=True, embedding_dims=64)
+    with pytest.raises(ValueError):
+        EmbeddingIndex(str(tmp_output_dir / "graph.json"))
+
+
+@pytest.mark.parametrize("mode", [{}, {"lean": True}, {"out_of_core": True}])
+def test_rebuild_without_embeddings_removes_them(
+    mode, enterprise_doc: Path, sample_doc: Path, tmp_output_dir: Path
+):
+    build_graph(str(enterprise_doc), str(tmp_output_dir), embedding_dims=16)
+    build_graph(str(sample_doc), str(tmp_output_dir), **mode)
+    assert not (tmp_output_dir / "embeddings.npy").exists()
+    assert not (tmp_output_dir / "embeddings.model.npz").exists()
+    with pytest.raises(ValueError, match="embedding-dims"):
+        EmbeddingIndex(str(tmp_output_dir / "graph.json"))
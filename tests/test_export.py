@@ -0,0 +1,78 @@
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from kgtool import KnowledgeGraph
+from kgtool.export import export_graph
+from kgtool.pipeline import build_graph
+
+
+@pytest.fixture
+def built_graph(sample_doc: Path, tmp_output_dir: Path):
+    out = tmp_output_dir / "kg"
+    build_graph(
+        input_file=str(sample_doc),
+        output_dir=str(out),
+        min_similarity=0.05,
+        max_chunk_chars=300,
+        compress_bodies=True,
+    )
+    graph_path = out / "graph.json"
+    return graph_path, KnowledgeGraph.load(str(graph_path)).graph
+
+
+def test_export_sqlite_with_tag_index(built_graph, tmp_output_dir: Path):
+    graph_path, G = built_graph
+    counts = export_graph(str(graph_path), str(tmp_output_dir / "sql"), "sqlite")
+    assert counts == {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+
+    db = sqlite3.connect(tmp_output_dir / "sql" / "graph.sqlite")
+    node_id, title, body, tags = db.execute(
+        "SELECT id, title, body, tags FROM nodes ORDER BY id LIMIT 1"
+    ).fetchone()
+    assert (title, body, json.loads(tags)) == (
+        G.nodes[node_id]["title"], G.nodes[node_id]["body"], G.nodes[node_id]["tags"]
+    )
+    tag = G.nodes[node_id]["tags"][0]
+    plan = " ".join(row[-1] for row in db.execute(
+        "EXPLAIN QUERY PLAN SELECT node_id FROM node_tags WHERE tag = ?", (tag,)
+    ))
+    assert "node_tags_tag" in plan
+    relations = dict(db.execute("SELECT relation, COUNT(*) FROM edges GROUP BY relation"))
+    assert relations["sequence"] == sum(1 for _, d in G.nodes(data=True) if "parent" in d)
+    db.close()
+
+
+def test_export_neo4j_csv(built_graph, tmp_output_dir: Path):
+    graph_path, G = built_graph
+    export_graph(str(graph_path), str(tmp_output_dir / "neo"), "neo4j", include_bodies=False)
+
+    with open(tmp_output_dir / "neo" / "nodes.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:3] == ["id:ID", "title:string", "tags:string[]"]
+    assert rows[0][-1] == ":LABEL"
+    assert len(rows) == G.number_of_nodes() + 1
+    first = dict(zip(rows[0], rows[1]))
+    assert first["tags:string[]"] == ";".join(G.nodes[int(first["id:ID"])]["tags"])
+
+    with open(tmp_output_dir / "neo" / "edges.csv", encoding="utf-8", newline="") as f:
+        edges = list(csv.reader(f))
+    assert edges[0] == [":START_ID", ":END_ID", "weight:double", ":TYPE"]
+    assert {row[3] for row in edges[1:]} <= {"SIMILARITY", "SEQUENCE"}
+    assert len(edges) == G.number_of_edges() + 1
+
+
+def test_export_parquet_matches_library_export(built_graph, tmp_output_dir: Path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    graph_path, G = built_graph
+    export_graph(str(graph_path), str(tmp_output_dir / "file"), "parquet")
+    KnowledgeGraph(G).export(str(tmp_output_dir / "lib"), "parquet")
+
+    for name in ("nodes.parquet", "edges.parquet"):
+        from_file = pq.read_table(tmp_output_dir / "file" / name)
+        assert from_file.equals(pq.read_table(tmp_output_dir / "lib" / name))
+    nodes = pq.read_table(tmp_output_dir / "file" / "nodes.parquet").to_pylist()
+    assert [n["body"] for n in nodes] == [G.nodes[n["id"]]["body"] for n in nodes]
@@ -59,3 +59,27 @@ def test_build_graph_with_topics_sets_tags(
     node_tags = [tag for node in nodes for tag in node.get("tags", [])]
     assert len(node_tags) > 0
     assert any(t in node_tags for t in topic_keys)
+
+
+def test_build_graph_splits_oversized_sections(sample_doc: Path, tmp_output_dir: Path):
+    build_graph(
+        input_file=str(sample_doc),
+        output_dir=str(tmp_output_dir),
+        max_chunk_chars=300,
+        chunk_overlap=80,
+    )
+
+    graph = _load_graph(tmp_output_dir / "graph.json")
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    assert all(len(node["body"]) <= 300 for node in nodes.values())
+
+    sub_nodes = [node for node in nodes.values() if "parent" in node]
+    assert sub_nodes
+    for node in sub_nodes:
+        parent = nodes[node["parent"]]
+        assert "parent" not in parent
+        assert node["title"].startswith(parent["title"] + " (part ")
+
+    edges_key = "links" if "links" in graph else "edges"
+    sequence = {(e["source"], e["target"]) for e in graph[edges_key] if e.get("relation") == "sequence"}
+    assert all((node["id"] - 1, node["id"]) in sequence for node in sub_nodes)
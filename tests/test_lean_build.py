@@ -0,0 +1,81 @@
+import codecs
+import json
+from pathlib import Path
+
+import pytest
+
+from kgtool.pipeline import NodeRecord, SourceText, build_graph, extract_chunks, lean_node_records
+
+
+def _graph(path: Path) -> dict:
+    return json.loads((path / "graph.json").read_text(encoding="utf-8"))
+
+
+def test_source_sections_match_extract_chunks(enterprise_doc: Path, tmp_output_dir: Path):
+    # CRLF line endings and multi-byte characters must not shift the spans
+    text = enterprise_doc.read_text(encoding="utf-8") + "\n## Überblick ✓\n\n  Größe — naïve café.  \n"
+    crlf = tmp_output_dir / "crlf.md"
+    crlf.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+
+    with SourceText(str(crlf)) as source:
+        chunks = [(title, source.text(start, end)) for title, start, end in source.sections()]
+        records, _ = lean_node_records(source, max_chunk_chars=200, chunk_overlap=40)
+    assert chunks == extract_chunks(text)
+    assert not hasattr(records[0], "__dict__")
+    assert isinstance(records[0], NodeRecord)
+
+
+def test_lean_build_matches_default_build(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    options = dict(
+        min_similarity=0.05,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        max_chunk_chars=400,
+        chunk_overlap=80,
+        analytics=True,
+    )
+    build_graph(str(enterprise_doc), str(tmp_output_dir / "default"), **options)
+    build_graph(str(enterprise_doc), str(tmp_output_dir / "lean"), lean=True, **options)
+
+    assert _graph(tmp_output_dir / "lean") == _graph(tmp_output_dir / "default")
+    for node_file in (tmp_output_dir / "default" / "nodes").iterdir():
+        assert (tmp_output_dir / "lean" / "nodes" / node_file.name).read_text(
+            encoding="utf-8"
+        ) == node_file.read_text(encoding="utf-8")
+    assert (tmp_output_dir / "lean" / "index.bin").read_bytes() == (
+        tmp_output_dir / "default" / "index.bin"
+    ).read_bytes()
+
+
+SECTIONS = "# Überblick\n\nGröße — naïve café.\n\n## Details\n\nMore text here.\n"
+
+
+@pytest.mark.parametrize("encode", [
+    pytest.param(lambda t: t.replace("\n", "\r").encode("utf-8"), id="lone-cr"),
+    pytest.param(lambda t: codecs.BOM_UTF8 + t.encode("utf-8"), id="utf8-bom"),
+    pytest.param(lambda t: codecs.BOM_UTF16_LE + t.encode("utf-16-le"), id="utf16"),
+    pytest.param(lambda t: t.encode("cp1252"), id="cp1252"),
+    pytest.param(lambda t: ("---\nid: 1\n---\n" + t).encode("utf-8"), id="front-matter"),
+    pytest.param(
+        lambda t: t.replace("# Überblick\n", "Überblick\n=========\n").encode("utf-8"),
+        id="setext",
+    ),
+])
+def test_lean_build_matches_default_beyond_utf8_atx(tmp_output_dir: Path, encode):
+    path = tmp_output_dir / "doc.md"
+    path.write_bytes(encode(SECTIONS))
+    build_graph(str(path), str(tmp_output_dir / "default"), min_similarity=0.0)
+    build_graph(str(path), str(tmp_output_dir / "lean"), lean=True, min_similarity=0.0)
+
+    lean = _graph(tmp_output_dir / "lean")
+    assert [node["title"] for node in lean["nodes"]] == ["Überblick", "Details"]
+    assert lean == _graph(tmp_output_dir / "default")
+
+
+def test_source_text_rejects_undecodable_bytes(tmp_output_dir: Path):
+    path = tmp_output_dir / "legacy.md"
+    path.write_bytes(SECTIONS.encode("cp1252"))
+    with pytest.raises(ValueError, match="not valid UTF-8"):
+        with SourceText(str(path)) as source:
+            list(source.sections())
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+
+from kgtool import KnowledgeGraph
+
+
+def test_knowledge_graph_discover_classify_extract(enterprise_doc: Path):
+    kg = KnowledgeGraph.from_text(enterprise_doc.read_text(encoding="utf-8"))
+
+    topic_terms = kg.discover_topics(num_topics=5, terms_per_topic=15)
+    assert len(topic_terms) == 5
+
+    kg.classify(topic_terms)
+    node_tags = {tag for _, data in kg.graph.nodes(data=True) for tag in data["tags"]}
+    assert node_tags & set(topic_terms)
+
+    context = kg.extract("topic_0", include_neighbors=False)
+    assert context.startswith("# Topic Context: topic_0")
+    assert context.count("## [") == len(kg.nodes_for("topic_0", include_neighbors=False))
+    assert kg.extract("no-such-topic") == ""
+    assert "".join(kg.iter_extract("topic_0", include_neighbors=False)) == context
+
+
+def test_knowledge_graph_save_load_roundtrip(
+    sample_doc: Path, tmp_output_dir: Path, topic_terms_enterprise: dict
+):
+    kg = KnowledgeGraph.from_text(sample_doc.read_text(encoding="utf-8"), min_similarity=0.2)
+    kg.save(str(tmp_output_dir))
+    assert (tmp_output_dir / "graph.json").exists()
+
+    loaded = KnowledgeGraph.load(str(tmp_output_dir))
+    assert loaded.chunks == kg.chunks
+    assert loaded.extract("frontend") == kg.extract("frontend")
+
+    # Re-tagging a loaded graph refits vectors from the stored bodies
+    loaded.classify(topic_terms_enterprise)
+    assert loaded.nodes_for("frontend", include_neighbors=False)
+
+
+def test_knowledge_graph_rejects_score_selection(sample_doc: Path):
+    kg = KnowledgeGraph.from_text(sample_doc.read_text(encoding="utf-8"))
+    with pytest.raises(ValueError, match="topic scores"):
+        kg.extract("frontend", order_by="score")
+    with pytest.raises(ValueError, match="topic scores"):
+        kg.nodes_for("frontend", order_by="score")
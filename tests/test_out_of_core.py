@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from kgtool.pipeline import (
+    HASHED_TOPIC_THRESHOLD,
+    TOPIC_THRESHOLD,
+    TopicScores,
+    build_graph,
+    build_graph_out_of_core,
+    extract_chunks,
+    extract_topic_context,
+    iter_chunks,
+)
+from kgtool.synth import generate_corpus
+
+
+def test_iter_chunks_matches_extract_chunks(enterprise_doc: Path):
+    text = enterprise_doc.read_text(encoding="utf-8")
+    assert list(iter_chunks(str(enterprise_doc))) == extract_chunks(text)
+
+
+def test_build_graph_out_of_core_writes_shards(
+    enterprise_doc: Path,
+    tmp_output_dir: Path,
+    gold_dir: Path,
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        min_similarity=0.05,
+        top_keywords=8,
+        top_keyphrases=10,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        out_of_core=True,
+        shard_size=7,
+    )
+
+    graph = json.loads((tmp_output_dir / "graph.json").read_text(encoding="utf-8"))
+    chunks = extract_chunks(enterprise_doc.read_text(encoding="utf-8"))
+    assert len(graph["nodes"]) == len(chunks)
+    assert [n["body"] for n in graph["nodes"]] == [body for _, body in chunks]
+    assert len(list((tmp_output_dir / "matrix").glob("shard_*.npz"))) == -(-len(chunks) // 7)
+
+    # Edges must cross shard boundaries, not only stay within them
+    edges_key = "links" if "links" in graph else "edges"
+    assert any(e["source"] // 7 != e["target"] // 7 for e in graph[edges_key])
+    assert any(n["keywords"] for n in graph["nodes"])
+
+    output_file = tmp_output_dir / "frontend_context.md"
+    extract_topic_context(
+        topic="frontend",
+        graph_path=str(tmp_output_dir / "graph.json"),
+        output_file=str(output_file),
+        include_neighbors=False,
+    )
+    assert "frontend" in output_file.read_text(encoding="utf-8").lower()
+
+
+def test_out_of_core_rejects_undecodable_input_up_front(tmp_output_dir: Path):
+    legacy = tmp_output_dir / "legacy.md"
+    legacy.write_bytes("# Café\n\ncrème brûlée\n".encode("cp1252"))
+    with pytest.raises(ValueError, match="not valid UTF-8"):
+        list(iter_chunks(str(legacy)))
+    with pytest.raises(ValueError, match="legacy.md"):
+        build_graph_out_of_core(str(legacy), str(tmp_output_dir / "kg"))
+    assert not (tmp_output_dir / "kg").exists()
+
+
+def test_hashed_topic_threshold_matches_fitted_tags(tmp_output_dir: Path):
+    summary = generate_corpus(str(tmp_output_dir / "corpus.md"), sections=200, topics=3, seed=5)
+    topics_path = tmp_output_dir / "topics.json"
+    topics_path.write_text(json.dumps(summary["topic_terms"]), encoding="utf-8")
+    for name, out_of_core in (("fitted", False), ("hashed", True)):
+        build_graph(
+            str(tmp_output_dir / "corpus.md"), str(tmp_output_dir / name),
+            topic_terms_path=str(topics_path), out_of_core=out_of_core, search_index=False,
+        )
+
+    fitted = TopicScores(str(tmp_output_dir / "fitted" / "topic_scores.npz")).matrix().toarray()
+    hashed = TopicScores(str(tmp_output_dir / "hashed" / "topic_scores.npz")).matrix().toarray()
+    # Tags come from the cosine scores, not the fuzzy fallback, in both modes
+    assert (hashed.max(axis=1) > HASHED_TOPIC_THRESHOLD).mean() > 0.9
+    assert ((hashed > HASHED_TOPIC_THRESHOLD) == (fitted > TOPIC_THRESHOLD)).mean() > 0.95
@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from kgtool.prune import parse_prune_spec, prune_edges
+from kgtool.pipeline import build_graph
+
+
+def _random_graph(n: int = 200, p: float = 0.3, seed: int = 0) -> nx.Graph:
+    rng = np.random.default_rng(seed)
+    G = nx.gnp_random_graph(n, p, seed=seed)
+    for a, b in G.edges():
+        G.edges[a, b]["weight"] = float(rng.uniform(0.3, 1.0))
+    return G
+
+
+def test_mutual_knn_matches_brute_force():
+    G0 = _random_graph()
+    G = G0.copy()
+    prune_edges(G, "knn", 4, keep_connected=False)
+
+    top = {
+        n: set(sorted(G0[n], key=lambda m: (-G0[n][m]["weight"], m))[:4]) for n in G0
+    }
+    expected = {(a, b) for a, b in G0.edges() if b in top[a] and a in top[b]}
+    assert {tuple(sorted(e)) for e in G.edges()} == expected
+
+
+@pytest.mark.parametrize("spec", ["knn:3", "adaptive:1.5", "backbone:0.2"])
+def test_pruning_shrinks_graph_and_keeps_components(spec: str):
+    G0 = _random_graph()
+    G0.add_edge(500, 501, weight=0.4)  # a separate component must survive
+    G0.add_edge(7, 8, weight=0.1, relation="sequence")
+    G = G0.copy()
+    removed = prune_edges(G, *parse_prune_spec(spec))
+
+    assert removed == G0.number_of_edges() - G.number_of_edges()
+    assert G.number_of_edges() * 5 < G0.number_of_edges()
+    assert nx.number_connected_components(G) == nx.number_connected_components(G0)
+    assert G.edges[7, 8]["relation"] == "sequence"
+    assert set(G.edges()) <= set(G0.edges())
+
+
+def test_backbone_keeps_dominant_edges():
+    # A hub with one strong link among many weak ones
+    G = nx.Graph()
+    G.add_edge(0, 1, weight=0.95)
+    for i in range(2, 30):
+        G.add_edge(0, i, weight=0.05)
+        G.add_edge(1, i, weight=0.05)
+    prune_edges(G, "backbone", 0.05, keep_connected=False)
+    assert list(G.edges()) == [(0, 1)]
+
+
+def test_parse_prune_spec():
+    assert parse_prune_spec("knn") == ("knn", 10.0)
+    assert parse_prune_spec("backbone:0.01") == ("backbone", 0.01)
+    for bad in ("nearest", "knn:0", "knn:2.5", "backbone:2", "adaptive:x"):
+        with pytest.raises(ValueError):
+            parse_prune_spec(bad)
+
+
+def test_build_graph_with_pruning(enterprise_doc: Path, tmp_output_dir: Path):
+    options = dict(min_similarity=0.02, max_chunk_chars=300)
+    build_graph(str(enterprise_doc), str(tmp_output_dir / "full"), **options)
+    build_graph(str(enterprise_doc), str(tmp_output_dir / "knn"), prune="knn:2", **options)
+    build_graph(
+        str(enterprise_doc), str(tmp_output_dir / "lean"), prune="knn:2", lean=True, **options
+    )
+
+    full, knn, lean = (
+        json.loads((tmp_output_dir / name / "graph.json").read_text(encoding="utf-8"))
+        for name in ("full", "knn", "lean")
+    )
+    edges_key = "links" if "links" in full else "edges"
+    assert len(knn[edges_key]) < len(full[edges_key])
+    assert knn == lean
+    sequence = [e for e in full[edges_key] if e.get("relation") == "sequence"]
+    assert sequence and all(e in knn[edges_key] for e in sequence)
+
+    with pytest.raises(ValueError):
+        build_graph(str(enterprise_doc), str(tmp_output_dir / "bad"), prune="nearest")
@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from kgtool import KnowledgeGraph
+from kgtool import cache as cache_module
+from kgtool.cache import QueryCache, graph_attributes, graph_version
+from kgtool.pipeline import build_graph, extract_topic_context, write_topic_scores
+from kgtool.search import build_search_index
+
+
+def _extract(graph_file: Path, output_file: Path, cache: QueryCache, **params):
+    extract_topic_context(
+        topic="frontend",
+        graph_path=str(graph_file),
+        output_file=str(output_file),
+        cache=cache,
+        **params,
+    )
+    return output_file.read_text(encoding="utf-8")
+
+
+def test_query_cache_hits_and_invalidates_on_rebuild(
+    enterprise_doc: Path, sample_doc: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    graph_dir = tmp_output_dir / "kg"
+    topics = str(gold_dir / "topic_terms_enterprise.json")
+    build_graph(input_file=str(enterprise_doc), output_dir=str(graph_dir), topic_terms_path=topics)
+    graph_file = graph_dir / "graph.json"
+    output_file = tmp_output_dir / "context.md"
+    cache_dir = graph_dir / ".kgtool_cache"
+
+    cache = QueryCache(maxsize=4, directory=str(cache_dir))
+    first = _extract(graph_file, output_file, cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert _extract(graph_file, output_file, cache) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Parameters are part of the key
+    _extract(graph_file, output_file, cache, include_neighbors=False)
+    assert cache.misses == 2
+
+    # A fresh process (new cache object) reuses the on-disk entries
+    cold = QueryCache(directory=str(cache_dir))
+    assert _extract(graph_file, output_file, cold) == first
+    assert cold.hits == 1
+
+    # Rebuilding the graph invalidates everything and prunes old entries
+    build_graph(input_file=str(sample_doc), output_dir=str(graph_dir), topic_terms_path=topics)
+    rebuilt = _extract(graph_file, output_file, cache)
+    assert rebuilt != first
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_query_cache_lru_eviction(sample_doc: Path, tmp_output_dir: Path):
+    build_graph(input_file=str(sample_doc), output_dir=str(tmp_output_dir))
+    graph_file = str(tmp_output_dir / "graph.json")
+
+    cache = QueryCache(maxsize=2)
+    for topic in ["a", "b", "c"]:
+        cache.put(graph_file, {"topic": topic}, topic)
+    assert cache.get(graph_file, {"topic": "a"}) is None
+    assert cache.get(graph_file, {"topic": "c"}) == "c"
+
+
+def test_knowledge_graph_extract_cache_dropped_on_retag(
+    enterprise_doc: Path, topic_terms_enterprise: dict
+):
+    kg = KnowledgeGraph.from_text(enterprise_doc.read_text(encoding="utf-8"))
+    before = kg.extract("frontend")
+    assert kg.extract("frontend") is before
+
+    kg.classify(topic_terms_enterprise)
+    assert kg.extract("frontend") != before
+
+
+def test_query_cache_keys_on_the_sidecars_a_query_reads(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    topics = str(gold_dir / "topic_terms_enterprise.json")
+    build_graph(
+        input_file=str(enterprise_doc), output_dir=str(tmp_output_dir),
+        topic_terms_path=topics, compress_bodies=True,
+    )
+    graph_file = tmp_output_dir / "graph.json"
+    output_file = tmp_output_dir / "context.md"
+    assert graph_attributes(str(graph_file)) == {"body_store": "bodies.bin"}
+    assert graph_version(str(graph_file)) != cache_module.file_content_hash(str(graph_file))
+
+    cache = QueryCache()
+    assert _extract(graph_file, output_file, cache, order_by="score", min_score=0.05)
+    assert _extract(graph_file, output_file, cache, query="react")
+    n_nodes = len(json.loads(graph_file.read_text(encoding="utf-8"))["nodes"])
+    topic_names = list(json.loads(Path(topics).read_text(encoding="utf-8")))
+
+    # Rewriting only a sidecar (same graph.json) must not serve the old result:
+    # all-zero scores and an index without the frontend sections match nothing
+    write_topic_scores(str(tmp_output_dir), np.zeros((n_nodes, len(topic_names))), topic_names)
+    build_search_index(str(tmp_output_dir / "index.bin"), [(0, "Other", "unrelated text")])
+    output_file.unlink()
+    for params in (dict(order_by="score", min_score=0.05), dict(query="react")):
+        extract_topic_context("frontend", str(graph_file), str(output_file), cache=cache, **params)
+        assert not output_file.exists()
+    assert (cache.hits, cache.misses) == (0, 4)
+
+
+def test_hash_memo_is_bounded(tmp_output_dir: Path):
+    for k in range(cache_module.HASH_MEMO_SIZE + 10):
+        path = tmp_output_dir / f"f{k}"
+        path.write_text(str(k), encoding="utf-8")
+        cache_module.file_content_hash(str(path))
+    assert len(cache_module._hash_memo) == cache_module.HASH_MEMO_SIZE
@@ -0,0 +1,175 @@
+import codecs
+import json
+from pathlib import Path
+
+import pytest
+
+from kgtool import readers
+from kgtool.pipeline import build_graph, extract_chunks
+from kgtool.readers import (
+    decode_bytes,
+    html_to_markdown,
+    normalize_markdown,
+    read_source,
+    register_reader,
+    rst_to_markdown,
+    sniff_bytes,
+)
+from kgtool.shards import build_graph_sharded, collect_input_files
+
+SETEXT = """---
+title: Setext guide
+tags: [docs]
+---
+Setext Guide
+============
+
+Intro paragraph.
+
+Installing
+----------
+
+Run the installer.
+
+```
+Not a heading
+-------------
+```
+"""
+
+RST = """==========
+Operations
+==========
+
+Overview of operations.
+
+Backups
+-------
+
+Nightly snapshots.
+
+Restore drill
+~~~~~~~~~~~~~
+
+Quarterly.
+
+----
+
+Monitoring
+----------
+
+Dashboards and alerts.
+"""
+
+HTML = """<!DOCTYPE html>
+<html><head><title>ignored</title><style>h1 { color: red }</style></head>
+<body>
+<h1>Frontend Guide</h1>
+<p>Components &amp; state
+   management.</p>
+<script>var junk = 1;</script>
+<h2>Routing <code>v6</code></h2>
+<ul><li>nested routes</li><li>loaders</li></ul>
+</body></html>
+"""
+
+
+def test_markdown_setext_and_front_matter():
+    chunks = extract_chunks(normalize_markdown(SETEXT))
+    assert [title for title, _ in chunks] == ["Setext Guide", "Installing"]
+    assert "title:" not in chunks[0][1]
+    assert "Not a heading\n-------------" in chunks[1][1]
+    # ATX-only documents pass through unchanged
+    assert normalize_markdown("# A\n\ntext\n\n---\n\n## B\n") == "# A\n\ntext\n\n---\n\n## B\n"
+
+
+def test_rst_titles_become_atx_levels():
+    markdown = rst_to_markdown(RST)
+    assert [line for line in markdown.split("\n") if line.startswith("#")] == [
+        "# Operations", "## Backups", "### Restore drill", "## Monitoring",
+    ]
+    assert "----" in markdown  # transitions are kept as body text
+
+
+def test_html_headings_and_text():
+    chunks = extract_chunks(html_to_markdown(HTML))
+    assert chunks == [
+        ("Frontend Guide", "Components & state management."),
+        ("Routing v6", "nested routes\n\nloaders"),
+    ]
+
+
+def test_sniffing_and_decoding():
+    assert sniff_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR") == "binary"
+    assert sniff_bytes(b"<!-- Code generated by tool. DO NOT EDIT. -->\n# API\n") == "generated"
+    assert sniff_bytes(b"x" * 10000) == "generated"  # minified: no newline in the first 4 KB
+    assert sniff_bytes(b"# Notes\n\nDo not edit production data by hand.\n" * 3) is None
+
+    assert decode_bytes("# Café\r\n\r\nnaïve".encode("cp1252")) == "# Café\n\nnaïve"
+    utf16 = codecs.BOM_UTF16_LE + "# Überblick\n".encode("utf-16-le")
+    assert sniff_bytes(utf16) is None
+    assert decode_bytes(utf16) == "# Überblick\n"
+
+
+def test_register_reader(tmp_output_dir: Path, monkeypatch):
+    monkeypatch.setattr(readers, "READERS", dict(readers.READERS))
+    monkeypatch.setattr(readers, "EXTENSIONS", dict(readers.EXTENSIONS))
+    register_reader("org", lambda text: text.replace("* ", "# "), extensions=[".org"])
+    path = tmp_output_dir / "notes.org"
+    path.write_text("* Heading\nbody\n", encoding="utf-8")
+    assert extract_chunks(read_source(str(path))) == [("Heading", "body")]
+
+
+def test_mixed_sources_build(tmp_output_dir: Path):
+    docs = tmp_output_dir / "docs"
+    docs.mkdir()
+    (docs / "guide.md").write_text(SETEXT, encoding="utf-8")
+    (docs / "ops.rst").write_text(RST, encoding="utf-8")
+    (docs / "frontend.html").write_text(HTML, encoding="utf-8")
+    (docs / "legacy.md").write_bytes("# Legacy\r\n\r\nCafé crème notes.\r\n".encode("cp1252"))
+    (docs / "api.md").write_text("<!-- @generated -->\n# API\n\nSchema dump.\n", encoding="utf-8")
+    (docs / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0")
+    (docs / "image.md").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0")
+
+    files = collect_input_files([str(docs)])
+    assert [Path(f).name for f in files] == [
+        "api.md", "frontend.html", "guide.md", "image.md", "legacy.md", "ops.rst",
+    ]
+    build_graph_sharded([str(docs)], str(tmp_output_dir / "kg"), min_similarity=0.1)
+    graph = json.loads((tmp_output_dir / "kg" / "graph.json").read_text(encoding="utf-8"))
+    titles = [node["title"] for node in graph["nodes"]]
+    assert titles == [
+        "Frontend Guide", "Routing v6", "Setext Guide", "Installing", "Legacy",
+        "Operations", "Backups", "Restore drill", "Monitoring",
+    ]
+    assert "Café crème notes." in [node["body"] for node in graph["nodes"]]
+
+    # Single-file builds read through the same layer; streaming builds refuse conversions
+    build_graph(str(docs / "ops.rst"), str(tmp_output_dir / "rst"))
+    with pytest.raises(ValueError, match="binary"):
+        build_graph(str(docs / "image.md"), str(tmp_output_dir / "png"))
+    with pytest.raises(ValueError, match="markdown only"):
+        build_graph(str(docs / "ops.rst"), str(tmp_output_dir / "lean"), lean=True)
+
+
+@pytest.mark.parametrize("mode", ["lean", "out_of_core"])
+def test_streaming_builds_normalize_like_default(tmp_output_dir: Path, mode: str):
+    doc = SETEXT.replace("Intro paragraph.", "Café crème, naïve.") + "\nPlain # not a heading\n"
+    path = tmp_output_dir / "legacy.md"
+    path.write_bytes(doc.replace("\n", "\r\n").encode("cp1252"))
+
+    graphs = {}
+    for name in ("default", mode):
+        build_graph(str(path), str(tmp_output_dir / name), **({name: True} if name == mode else {}))
+        graphs[name] = json.loads((tmp_output_dir / name / "graph.json").read_text(encoding="utf-8"))
+    assert [node["title"] for node in graphs[mode]["nodes"]] == ["Setext Guide", "Installing"]
+    assert graphs[mode]["nodes"][0]["body"] == "Café crème, naïve."
+    sections = {
+        name: [(node["title"], node["body"]) for node in graph["nodes"]]
+        for name, graph in graphs.items()
+    }
+    assert sections[mode] == sections["default"]
+    if mode == "lean":  # out-of-core keywords come from hashed features
+        assert graphs[mode] == graphs["default"]
+    # The converted copy is removed once the build is done
+    assert not list((tmp_output_dir / mode).glob(".kgtool_source_*"))
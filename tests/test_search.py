@@ -0,0 +1,111 @@
+import re
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from kgtool.pipeline import build_graph, extract_chunks, extract_topic_context, load_graph
+from kgtool.search import (
+    SearchIndex,
+    build_search_index,
+    decode_varints,
+    encode_varints,
+    index_path,
+)
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2**35 + 7])
+    encoded = encode_varints(values)
+    assert len(encoded) == 1 + 1 + 1 + 2 + 2 + 3 + 6
+    assert decode_varints(encoded).tolist() == values.tolist()
+
+
+def test_bm25_ranking_and_phrases(tmp_output_dir: Path):
+    path = str(tmp_output_dir / "index.bin")
+    build_search_index(path, [
+        (10, "Intro", "the quick brown fox"),
+        (11, "Foxes", "quick quick fox jumps"),
+        (12, "Bears", "brown bear, the fox is quick"),
+    ])
+    with SearchIndex(path) as index:
+        assert [node_id for node_id, _, _ in index.search("quick")] == [11, 10, 12]
+        assert index.search("zebra") == []
+        # Phrases must occur verbatim; titles are indexed and returned
+        assert [r[:2] for r in index.search('"brown fox"')] == [(10, "Intro")]
+        assert [r[0] for r in index.search('"fox is quick" brown')] == [12]
+        assert [r[0] for r in index.search("bears")] == [12]
+        # Positions count from the title's first token
+        positions = {doc: p.tolist() for doc, p in index.positions("quick").items()}
+        assert positions == {0: [2], 1: [1, 2], 2: [6]}
+
+
+def test_build_index_finds_untagged_sections(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+    )
+    graph_path = str(tmp_output_dir / "graph.json")
+    G = load_graph(graph_path)
+    with SearchIndex(index_path(graph_path)) as index:
+        hits = index.search("kubernetes", top_k=None)
+    expected = {
+        node_id for node_id, data in G.nodes(data=True)
+        if re.search(r"\bkubernetes\b", f"{data['title']}\n{data['body']}", re.IGNORECASE)
+    }
+    assert expected and {node_id for node_id, _, _ in hits} == expected
+
+    # The query filters the topic's nodes before neighbor expansion
+    output = tmp_output_dir / "context.md"
+    extract_topic_context("frontend", graph_path, str(output), include_neighbors=False, query="react")
+    ids = [int(i) for i in re.findall(r"^## \[(\d+)\]", output.read_text(encoding="utf-8"), re.M)]
+    assert ids
+    for node_id in ids:
+        assert any("frontend" in tag.lower() for tag in G.nodes[node_id]["tags"])
+        assert "react" in f"{G.nodes[node_id]['title']} {G.nodes[node_id]['body']}".lower()
+
+
+def test_out_of_core_index_matches_in_memory(enterprise_doc: Path, tmp_output_dir: Path):
+    for name, out_of_core in (("mem", False), ("ooc", True)):
+        build_graph(str(enterprise_doc), str(tmp_output_dir / name), out_of_core=out_of_core, shard_size=5)
+    with SearchIndex(str(tmp_output_dir / "mem" / "index.bin")) as a, \
+            SearchIndex(str(tmp_output_dir / "ooc" / "index.bin")) as b:
+        assert a.n_docs == b.n_docs == len(extract_chunks(enterprise_doc.read_text(encoding="utf-8")))
+        assert a.search('state "data model"', top_k=None) == b.search('state "data model"', top_k=None)
+
+
+def test_spilled_runs_merge_to_the_same_index(enterprise_doc: Path, tmp_output_dir: Path):
+    build_graph(str(enterprise_doc), str(tmp_output_dir / "kg"))
+    G = load_graph(str(tmp_output_dir / "kg" / "graph.json"))
+    docs = [(node_id, data["title"], data["body"]) for node_id, data in G.nodes(data=True)]
+    build_search_index(str(tmp_output_dir / "spilled.bin"), docs, spill_postings=50)
+    assert (tmp_output_dir / "spilled.bin").read_bytes() == (
+        tmp_output_dir / "kg" / "index.bin"
+    ).read_bytes()
+    assert sorted(p.name for p in tmp_output_dir.iterdir()) == ["kg", "spilled.bin"]
+
+    build_search_index(str(tmp_output_dir / "empty.bin"), [])
+    with SearchIndex(str(tmp_output_dir / "empty.bin")) as index:
+        assert index.n_docs == 0 and index.search("anything") == []
+
+
+def test_missing_index_is_reported(enterprise_doc: Path, tmp_output_dir: Path):
+    build_graph(str(enterprise_doc), str(tmp_output_dir), search_index=False)
+    graph_path = str(tmp_output_dir / "graph.json")
+    with pytest.raises(ValueError, match="no-search-index"):
+        SearchIndex(index_path(graph_path))
+    with pytest.raises(ValueError, match="no-search-index"):
+        extract_topic_context("frontend", graph_path, str(tmp_output_dir / "out.md"), query="react")
+
+
+@pytest.mark.parametrize("mode", [{}, {"lean": True}, {"out_of_core": True}])
+def test_rebuild_without_index_removes_it(
+    mode, enterprise_doc: Path, sample_doc: Path, tmp_output_dir: Path
+):
+    build_graph(str(enterprise_doc), str(tmp_output_dir))
+    build_graph(str(sample_doc), str(tmp_output_dir), search_index=False, **mode)
+    with pytest.raises(ValueError, match="no-search-index"):
+        SearchIndex(index_path(str(tmp_output_dir / "graph.json")))
@@ -0,0 +1,64 @@
+import json
+import shutil
+from pathlib import Path
+
+from kgtool.shards import build_graph_sharded, build_shard, merge_shards, partition_files
+
+
+def _docs(data_dir: Path, target: Path) -> Path:
+    target.mkdir()
+    for name in ["sample_spec.md", "enterprise_architecture_spec.md", "chaotic_mess.md"]:
+        shutil.copy(data_dir / name, target / name)
+    shutil.copy(data_dir / "edge_cases" / "tiny_frontend.md", target / "tiny_frontend.md")
+    shutil.copy(data_dir / "edge_cases" / "no_headings.md", target / "no_headings.md")
+    return target
+
+
+def _graph(output_dir: Path) -> dict:
+    return json.loads((output_dir / "graph.json").read_text(encoding="utf-8"))
+
+
+def test_partition_files_is_contiguous(data_dir: Path):
+    files = sorted(str(p) for p in data_dir.glob("*.md"))
+    groups = partition_files(files, 3)
+    assert 1 < len(groups) <= 3
+    assert [f for group in groups for f in group] == files
+
+
+def test_sharded_build_is_independent_of_shard_count(
+    data_dir: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    docs = _docs(data_dir, tmp_output_dir / "docs")
+    options = dict(
+        min_similarity=0.1,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+        max_chunk_chars=800,
+    )
+
+    build_graph_sharded([str(docs)], str(tmp_output_dir / "one"), shards=1, **options)
+    build_graph_sharded([str(docs)], str(tmp_output_dir / "three"), shards=3, **options)
+
+    one, three = _graph(tmp_output_dir / "one"), _graph(tmp_output_dir / "three")
+    assert one == three
+    assert len(list((tmp_output_dir / "three" / "shards").iterdir())) > 1
+    assert {Path(n["source"]).name for n in one["nodes"]} == {
+        "sample_spec.md", "enterprise_architecture_spec.md", "chaotic_mess.md", "tiny_frontend.md"
+    }
+    edges_key = "links" if "links" in one else "edges"
+    sources = {n["id"]: n["source"] for n in one["nodes"]}
+    assert any(sources[e["source"]] != sources[e["target"]] for e in one[edges_key])
+
+
+def test_shards_built_separately_merge_like_a_local_build(
+    data_dir: Path, tmp_output_dir: Path
+):
+    docs = _docs(data_dir, tmp_output_dir / "docs")
+    files = sorted(str(p) for p in docs.glob("*.md"))
+
+    # As if produced on two machines, then merged elsewhere
+    build_shard(files[:2], str(tmp_output_dir / "a"))
+    build_shard(files[2:], str(tmp_output_dir / "b"))
+    merge_shards([str(tmp_output_dir / "a"), str(tmp_output_dir / "b")], str(tmp_output_dir / "merged"))
+
+    build_graph_sharded(files, str(tmp_output_dir / "local"), shards=2)
+    assert _graph(tmp_output_dir / "merged") == _graph(tmp_output_dir / "local")
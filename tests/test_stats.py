@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import networkx as nx
+
+from kgtool import stats
+from kgtool.pipeline import build_graph
+
+
+def test_graph_stats_matches_networkx(
+    enterprise_doc: Path, tmp_output_dir: Path, gold_dir: Path, monkeypatch
+):
+    build_graph(
+        input_file=str(enterprise_doc),
+        output_dir=str(tmp_output_dir),
+        min_similarity=0.05,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"),
+    )
+    graph_file = tmp_output_dir / "graph.json"
+
+    # Tiny reads force records to straddle buffer boundaries
+    monkeypatch.setattr(stats, "READ_SIZE", 7)
+    result = stats.graph_stats(str(graph_file))
+
+    data = json.loads(graph_file.read_text(encoding="utf-8"))
+    edges_key = "links" if "links" in data else "edges"
+    G = nx.Graph()
+    G.add_nodes_from(n["id"] for n in data["nodes"])
+    G.add_edges_from((e["source"], e["target"]) for e in data[edges_key])
+
+    assert result["nodes"] == G.number_of_nodes()
+    assert result["edges"] == G.number_of_edges()
+    assert result["isolated_nodes"] == nx.number_of_isolates(G)
+    assert result["components"] == nx.number_connected_components(G)
+    assert result["component_sizes"] == sorted(
+        (len(c) for c in nx.connected_components(G)), reverse=True
+    )
+    assert sum(result["degree_distribution"].values()) == G.number_of_nodes()
+    assert sum(result["topics"].values()) == sum(len(n["tags"]) for n in data["nodes"])
+
+
+def test_iter_graph_records_reads_legacy_links_key(tmp_output_dir: Path):
+    graph_file = tmp_output_dir / "graph.json"
+    graph_file.write_text(
+        json.dumps({
+            "directed": False,
+            "multigraph": False,
+            "graph": {},
+            "nodes": [{"id": 0, "tags": ["a"]}, {"id": 1, "tags": []}, {"id": 2}],
+            "links": [{"source": 0, "target": 1, "weight": 0.5}],
+        }),
+        encoding="utf-8",
+    )
+    kinds = [kind for kind, _ in stats.iter_graph_records(str(graph_file))]
+    assert kinds == ["meta", "meta", "meta", "node", "node", "node", "edge"]
+
+    result = stats.graph_stats(str(graph_file))
+    assert result["isolated_nodes"] == 1
+    assert result["component_sizes"] == [2, 1]
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import numpy as np
+
+from kgtool.pipeline import extract_chunks
+from kgtool.synth import generate_corpus, make_vocabulary
+
+
+def test_vocabulary_words_are_distinct():
+    words = make_vocabulary(20000)
+    assert len(set(words)) == 20000
+    assert all(w.isalpha() and w.islower() for w in words[:100])
+
+
+def test_corpus_is_seeded_and_controllable(tmp_output_dir: Path):
+    a, b, c = (tmp_output_dir / name for name in ("a.md", "b.md", "c.md"))
+    summary = generate_corpus(str(a), sections=400, mean_words=120, duplicate_rate=0.25, seed=7)
+    generate_corpus(str(b), sections=400, mean_words=120, duplicate_rate=0.25, seed=7)
+    generate_corpus(str(c), sections=400, mean_words=120, duplicate_rate=0.25, seed=8)
+    assert a.read_bytes() == b.read_bytes() != c.read_bytes()
+
+    chunks = extract_chunks(a.read_text(encoding="utf-8"))
+    assert len(chunks) == summary["sections"] == 400
+    assert summary["bytes"] == a.stat().st_size
+
+    bodies = [body for _, body in chunks]
+    repeated = len(bodies) - len(set(bodies))
+    assert repeated == summary["duplicates"]
+    assert 60 <= summary["duplicates"] <= 140
+
+    lengths = np.array([len(body.split()) for body in bodies])
+    assert lengths.sum() == summary["words"]
+    assert 90 <= lengths.mean() <= 150
+
+
+def test_topic_words_dominate_their_sections(tmp_output_dir: Path):
+    path = tmp_output_dir / "topics.md"
+    summary = generate_corpus(str(path), sections=200, topics=4, topic_mix=0.5, duplicate_rate=0)
+    topic_terms = summary["topic_terms"]
+    assert len(topic_terms) == 4
+
+    for title, body in extract_chunks(path.read_text(encoding="utf-8")):
+        words = body.lower().replace(".", "").split()
+        hits = {name: sum(w in terms for w in words) for name, terms in topic_terms.items()}
+        # The title names the section's topic through its first core word
+        owner = next(name for name, terms in topic_terms.items() if terms[0] in title.lower().split())
+        assert max(hits, key=hits.get) == owner
@@ -38,3 +38,62 @@ def test_discover_topics_enterprise_has_reasonable_topics(enterprise_doc: Path,
     assert any(term in joined_terms for term in ["frontend", "react", "ui", "component"])
     assert any(term in joined_terms for term in ["backend", "service", "api", "microservice"])
     assert any(term in joined_terms for term in ["kubernetes", "cluster", "infra"])
+
+
+def test_discover_topics_incremental_preserves_names(
+    enterprise_doc: Path, sample_doc: Path, tmp_output_dir: Path
+):
+    first = tmp_output_dir / "topics.json"
+    discover_topics(
+        input_file=str(enterprise_doc),
+        output_file=str(first),
+        num_topics=4,
+        terms_per_topic=10,
+    )
+    assert (tmp_output_dir / "topics.model.json").exists()
+
+    # Curate names by hand, as users do
+    terms = json.loads(first.read_text(encoding="utf-8"))
+    curated = {f"curated_{i}": t for i, t in enumerate(terms.values())}
+    first.write_text(json.dumps(curated), encoding="utf-8")
+
+    # Same corpus: warm start reproduces the same topics with no drift
+    again = tmp_output_dir / "topics_again.json"
+    discover_topics(
+        input_file=str(enterprise_doc),
+        output_file=str(again),
+        num_topics=4,
+        terms_per_topic=10,
+        previous=str(first),
+    )
+    data = json.loads(again.read_text(encoding="utf-8"))
+    assert list(data) == list(curated)
+    assert data == curated
+    model = json.loads((tmp_output_dir / "topics_again.model.json").read_text(encoding="utf-8"))
+    assert all(value < 1e-6 for value in model["drift"].values())
+
+    # Different corpus, one more topic: names survive, the extra topic is new
+    evolved = tmp_output_dir / "topics_evolved.json"
+    discover_topics(
+        input_file=str(sample_doc),
+        output_file=str(evolved),
+        num_topics=5,
+        terms_per_topic=10,
+        previous=str(first),
+    )
+    model = json.loads((tmp_output_dir / "topics_evolved.model.json").read_text(encoding="utf-8"))
+    assert model["names"][:4] == list(curated)
+    assert model["drift"][model["names"][4]] is None
+    assert all(0.0 <= model["drift"][name] <= 1.0 for name in curated)
+
+
+def test_discover_topics_previous_requires_model(sample_doc: Path, tmp_output_dir: Path):
+    previous = tmp_output_dir / "hand_written.json"
+    previous.write_text(json.dumps({"frontend": ["react"]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="No topic model found"):
+        discover_topics(
+            input_file=str(sample_doc),
+            output_file=str(tmp_output_dir / "topics.json"),
+            num_topics=1,
+            previous=str(previous),
+        )
@@ -0,0 +1,101 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from kgtool.pipeline import (
+    TopicScores,
+    build_graph,
+    build_topic_vectors,
+    extract_chunks,
+    render_topic_context,
+    topic_score_matrix,
+    topic_scores_path,
+    vectorize_chunks,
+    write_topic_scores,
+)
+from kgtool.synth import generate_corpus
+
+
+@pytest.fixture
+def scored_graph(tmp_output_dir: Path):
+    summary = generate_corpus(str(tmp_output_dir / "corpus.md"), sections=120, topics=3, seed=11)
+    topics_path = tmp_output_dir / "topics.json"
+    topics_path.write_text(json.dumps(summary["topic_terms"]), encoding="utf-8")
+    build_graph(
+        str(tmp_output_dir / "corpus.md"), str(tmp_output_dir / "kg"),
+        topic_terms_path=str(topics_path),
+    )
+    return tmp_output_dir / "kg" / "graph.json", summary["topic_terms"]
+
+
+def test_score_file_matches_matrix(enterprise_doc: Path, tmp_output_dir: Path):
+    vectorizer, X = vectorize_chunks(extract_chunks(enterprise_doc.read_text(encoding="utf-8")))
+    topic_terms = {"security": ["security", "authentication"], "api": ["api", "kubernetes"]}
+    topic_vecs = build_topic_vectors(topic_terms, vectorizer)
+    scores = topic_score_matrix(X, topic_vecs)
+    stored = TopicScores(write_topic_scores(str(tmp_output_dir), scores, list(topic_vecs)))
+
+    assert stored.topics == ["security", "api"]
+    assert stored.shape == scores.shape
+    assert np.allclose(stored.matrix().toarray(), scores, atol=1e-6)
+    for topic in stored.topics:
+        nodes, values = stored.ranked(topic)
+        assert len(values) and values.dtype == np.float32
+        assert list(values) == sorted(values, reverse=True)
+        cut_nodes, cut_values = stored.ranked(topic, values[len(values) // 2])
+        assert list(cut_nodes) == list(nodes[:len(cut_nodes)])
+        assert cut_values.min() >= values[len(values) // 2]
+
+
+def test_extract_min_score_and_score_order(scored_graph):
+    graph_path, topic_terms = scored_graph
+    stored = TopicScores(topic_scores_path(str(graph_path)))
+    topic = next(iter(topic_terms))
+    scores = stored.node_scores(topic)
+
+    def node_ids(markdown: str):
+        lines = markdown.split("\n")
+        return [int(line[4:line.index("]")]) for line in lines if line.startswith("## [")]
+
+    loose = render_topic_context(str(graph_path), topic, False, "score", min_score=0.05)
+    strict = render_topic_context(str(graph_path), topic, False, "score", min_score=0.2)
+    assert 0 < len(node_ids(strict)) < len(node_ids(loose))
+
+    ranked = [scores[node_id] for node_id in node_ids(loose)]
+    assert ranked == sorted(ranked, reverse=True)
+    assert min(ranked) >= 0.05
+    assert len(ranked) == sum(score >= 0.05 for score in scores.values())
+
+    # Without min_score, tags select and scores only order
+    tagged = render_topic_context(str(graph_path), topic, False, "score")
+    assert sorted(node_ids(tagged)) == node_ids(render_topic_context(str(graph_path), topic, False))
+
+
+def test_missing_scores_raise(enterprise_doc: Path, tmp_output_dir: Path):
+    build_graph(str(enterprise_doc), str(tmp_output_dir))
+    with pytest.raises(ValueError, match="topic scores"):
+        render_topic_context(str(tmp_output_dir / "graph.json"), "security", min_score=0.1)
+
+
+@pytest.mark.parametrize("mode", [{}, {"lean": True}, {"out_of_core": True}])
+def test_rebuild_without_topics_removes_scores(mode, scored_graph, sample_doc: Path):
+    graph_path, _ = scored_graph
+    build_graph(str(sample_doc), str(graph_path.parent), **mode)
+    assert not Path(topic_scores_path(str(graph_path))).exists()
+    with pytest.raises(ValueError, match="topic scores"):
+        render_topic_context(str(graph_path), "frontend", min_score=0.05)
+
+
+def test_scores_for_another_graph_are_rejected(
+    scored_graph, sample_doc: Path, tmp_output_dir: Path
+):
+    graph_path, _ = scored_graph
+    stale = tmp_output_dir / "stale.npz"
+    shutil.copy(topic_scores_path(str(graph_path)), stale)
+    build_graph(str(sample_doc), str(graph_path.parent))
+    shutil.copy(stale, topic_scores_path(str(graph_path)))
+    with pytest.raises(ValueError, match="rebuild the graph"):
+        render_topic_context(str(graph_path), "frontend", min_score=0.05)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import shutil
+from pathlib import Path
+
+from kgtool.pipeline import build_graph
+from kgtool.watch import Watcher
+
+
+def _touch_later(path: Path):
+    # Make sure the mtime differs even on coarse-grained filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watcher_rebuilds_only_on_change(data_dir: Path, tmp_output_dir: Path):
+    docs = tmp_output_dir / "docs"
+    out = tmp_output_dir / "kg"
+    docs.mkdir()
+    shutil.copy(data_dir / "edge_cases" / "tiny_frontend.md", docs / "frontend.md")
+    shutil.copy(data_dir / "edge_cases" / "tiny_backend.md", docs / "backend.md")
+    shutil.copy(data_dir / "edge_cases" / "no_headings.md", docs / "notes.md")
+
+    watcher = Watcher(str(docs), str(out), min_similarity=0.1)
+
+    assert asyncio.run(watcher.refresh()) is True
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    sources = {node["source"] for node in graph["nodes"]}
+    assert sources == {"frontend.md", "backend.md"}
+    node_count = len(graph["nodes"])
+    assert len(list((out / "nodes").glob("*.md"))) == node_count
+
+    # Nothing changed: no rebuild
+    assert asyncio.run(watcher.refresh()) is False
+
+    # Append a section to one file; only it is re-read, cached keyphrases are reused
+    cached = dict(watcher.keyphrase_cache)
+    frontend = docs / "frontend.md"
+    frontend.write_text(
+        frontend.read_text(encoding="utf-8") + "\n## Theming\n\nDark mode tokens for the UI.\n",
+        encoding="utf-8",
+    )
+    _touch_later(frontend)
+    assert asyncio.run(watcher.refresh()) is True
+    assert all(watcher.keyphrase_cache[body] is kp for body, kp in cached.items())
+
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    assert len(graph["nodes"]) == node_count + 1
+    assert not list(out.glob("graph.json.tmp*"))
+
+    # Removing a file drops its nodes and their markdown files
+    (docs / "backend.md").unlink()
+    assert asyncio.run(watcher.refresh()) is True
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    assert {node["source"] for node in graph["nodes"]} == {"frontend.md"}
+    assert len(list((out / "nodes").glob("*.md"))) == len(graph["nodes"])
+
+    # Deleting the last file publishes an empty graph and clears nodes/
+    (docs / "frontend.md").unlink()
+    assert asyncio.run(watcher.refresh()) is True
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    edges_key = "links" if "links" in graph else "edges"
+    assert graph["nodes"] == [] and graph[edges_key] == []
+    assert not list((out / "nodes").glob("*.md"))
+
+
+def test_watcher_clears_node_files_of_an_earlier_run(data_dir: Path, tmp_output_dir: Path):
+    docs = tmp_output_dir / "docs"
+    out = tmp_output_dir / "kg"
+    docs.mkdir()
+    (out / "nodes").mkdir(parents=True)
+    for i in range(5):
+        (out / "nodes" / f"node_{i}.md").write_text("# old\n", encoding="utf-8")
+    shutil.copy(data_dir / "edge_cases" / "tiny_frontend.md", docs / "frontend.md")
+
+    watcher = Watcher(str(docs), str(out), min_similarity=0.1)
+    assert asyncio.run(watcher.refresh()) is True
+    graph = json.loads((out / "graph.json").read_text(encoding="utf-8"))
+    assert sorted(p.name for p in (out / "nodes").iterdir()) == sorted(
+        f"node_{node['id']}.md" for node in graph["nodes"]
+    )
+
+
+def test_watcher_removes_outputs_of_an_earlier_build(
+    data_dir: Path, tmp_output_dir: Path, gold_dir: Path
+):
+    docs = tmp_output_dir / "docs"
+    out = tmp_output_dir / "kg"
+    docs.mkdir()
+    shutil.copy(data_dir / "edge_cases" / "tiny_frontend.md", docs / "frontend.md")
+    build_graph(
+        str(data_dir / "enterprise_architecture_spec.md"), str(out), concepts=True,
+        topic_terms_path=str(gold_dir / "topic_terms_enterprise.json"), embedding_dims=8,
+    )
+    stale = ["concepts.json", "topic_scores.npz", "embeddings.npy", "embeddings.model.npz"]
+    assert all((out / name).exists() for name in stale)
+
+    assert asyncio.run(Watcher(str(docs), str(out)).refresh()) is True
+    assert not any((out / name).exists() for name in stale)
@@ -2,6 +2,7 @@
 """
 Simple visualization of the knowledge graph statistics and structure.
 This creates a text-based summary of the graph for quick inspection.
+For large graphs, use `kgtool stats --graph graph.json`, which streams the file.
 """
 
 import json
@@ -21,7 +22,7 @@ def visualize_graph(graph_path: Path):
         graph_data = json.load(f)
     
     nodes = graph_data.get('nodes', [])
-    links = graph_data.get('links', [])
+    links = graph_data.get('links', graph_data.get('edges', []))
     
     print("\n" + "=" * 80)
     print("KNOWLEDGE GRAPH VISUALIZATION")
@@ -51,16 +52,21 @@ def visualize_graph(graph_path: Path):
             print(f"{topic:20s} │ {bar} {count:2d} nodes")
         print()
     
-    # Node connectivity
+    # Node connectivity: stored degrees (kgtool build --analytics), else counted from the links
     node_connections = Counter()
-    for link in links:
-        node_connections[link['source']] += 1
-        node_connections[link['target']] += 1
+    if nodes and 'degree' in nodes[0]:
+        for i, node in enumerate(nodes):
+            if node['degree']:
+                node_connections[node.get('id', i)] = node['degree']
+    else:
+        for link in links:
+            node_connections[link['source']] += 1
+            node_connections[link['target']] += 1
     
     if node_connections:
         print(f"🔗 NODE CONNECTIVITY")
         print(f"{'─' * 80}")
-        isolated = sum(1 for n in nodes if node_connections.get(n.get('id', nodes.index(n)), 0) == 0)
+        isolated = sum(1 for i, n in enumerate(nodes) if node_connections.get(n.get('id', i), 0) == 0)
         avg_connections = sum(node_connections.values()) / len(nodes) if nodes else 0
         max_connections = max(node_connections.values()) if node_connections else 0
         
@@ -69,6 +75,17 @@ def visualize_graph(graph_path: Path):
         print(f"Max connections: {max_connections:3d}")
         print()
     
+    # Precomputed analytics (kgtool build --analytics)
+    if nodes and 'hub_rank' in nodes[0]:
+        print(f"⭐ TOP HUBS (PageRank)")
+        print(f"{'─' * 80}")
+        for node in sorted(nodes, key=lambda n: n['hub_rank'])[:5]:
+            title = node.get('title', 'Untitled')[:50]
+            print(f"{node['hub_rank']:3d}. {title:50s} │ pr={node['pagerank']:.4f} community={node['community']}")
+        community_sizes = Counter(node['community'] for node in nodes)
+        print(f"Communities:     {len(community_sizes):3d} (largest: {max(community_sizes.values())} nodes)")
+        print()
+    
     # Sample nodes by topic
     print(f"📄 SAMPLE NODES BY TOPIC")
     print(f"{'─' * 80}")